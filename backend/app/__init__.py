@@ -2,6 +2,10 @@ from flask import Flask
 from flask_cors import CORS
 
 def create_app():
+    # Cap native thread pools per worker before numpy/cv2/torch spin them up
+    from app.runtime import apply_thread_budget
+    apply_thread_budget()
+
     app = Flask(__name__)
     CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 
@@ -13,4 +17,8 @@ def create_app():
     from app.routes import bp
     app.register_blueprint(bp)
 
+    # Unload idle heavy models (EasyOCR, embeddings, FAISS, SHAP) in the background
+    from app.utils.model_lifecycle import lifecycle
+    lifecycle.start_reaper()
+
     return app
@@ -33,4 +33,52 @@ OCR_MODELS_DIR = os.path.join(MODEL_DIR, "ocr_models")
 # Set RAG_LABEL_ENABLED=false to disable RAG even for label scans.
 RAG_ENABLED = False  # Barcode path: NEVER use RAG (score from XGBoost + DB)
 RAG_LABEL_ENABLED = os.getenv("RAG_LABEL_ENABLED", "true").lower() == "true"  # Label path only
+# Context retrieval: "auto" (vector store, else char n-grams), "ngram"
+# (pure NumPy — no torch/faiss, for lean deployments) or "keyword".
+RAG_RETRIEVAL_BACKEND = os.getenv("RAG_RETRIEVAL_BACKEND", "auto").lower()
+# Embedding runtime: "auto" (sentence-transformers for now), "onnx" (int8
+# ONNX export, no torch) or "sentence-transformers".
+RAG_EMBEDDER = os.getenv("RAG_EMBEDDER", "auto").lower()
+# Search-time recall/speed knobs for approximate vector stores (built with
+# `python -m rag_pipeline.utils.embedder --index hnsw|ivf`): HNSW efSearch
+# and IVF nprobe. Higher → better recall, slower. Flat stores ignore them.
+RAG_ANN_EF_SEARCH = int(os.getenv("RAG_ANN_EF_SEARCH", "64"))
+RAG_ANN_NPROBE = int(os.getenv("RAG_ANN_NPROBE", "8"))
+# Cache of whole label analyses, keyed by parsed nutrition + ordered
+# ingredient tokens + KB version: RAG_RESULT_CACHE_SIZE results per worker in
+# memory (0 disables the cache) and, with RAG_RESULT_CACHE_PERSIST, a SQLite
+# tier in rag_pipeline/vector_store/result_cache.db shared by all workers,
+# capped at about RAG_RESULT_CACHE_MAX_ROWS rows (oldest pruned first).
+# Results expire after RAG_RESULT_CACHE_TTL_DAYS (0 = never).
+RAG_RESULT_CACHE_SIZE = int(os.getenv("RAG_RESULT_CACHE_SIZE", "1024"))
+RAG_RESULT_CACHE_PERSIST = os.getenv("RAG_RESULT_CACHE_PERSIST", "true").lower() == "true"
+RAG_RESULT_CACHE_MAX_ROWS = int(os.getenv("RAG_RESULT_CACHE_MAX_ROWS", "50000"))
+RAG_RESULT_CACHE_TTL_DAYS = float(os.getenv("RAG_RESULT_CACHE_TTL_DAYS", "30"))
 
+
+# ── Label image quality gate ──────────────────────────────────────────────────
+# Reject blurry / badly exposed / text-less label photos with a "retake photo"
+# response before OCR runs. Set LABEL_QUALITY_GATE_ENABLED=false to disable.
+LABEL_QUALITY_GATE_ENABLED = os.getenv("LABEL_QUALITY_GATE_ENABLED", "true").lower() == "true"
+
+# ── CPU thread budget (per gunicorn worker) ───────────────────────────────────
+# torch, OpenCV, XGBoost, FAISS and BLAS each default to one thread per core.
+# With several gunicorn workers that oversubscribes the host, so every worker
+# gets THREADS_PER_WORKER threads (0 = auto: cpu_count // WEB_CONCURRENCY).
+# Applied once at startup by app.runtime.apply_thread_budget().
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+THREADS_PER_WORKER = int(os.getenv("THREADS_PER_WORKER", "0"))
+
+# ── Model lifecycle (idle eviction) ───────────────────────────────────────────
+# EasyOCR, SentenceTransformer, FAISS and SHAP stay resident once loaded. On
+# small deployments (HF Space) unload them after MODEL_IDLE_TTL_S seconds idle,
+# or LRU-first while process RSS exceeds MODEL_RSS_LIMIT_MB. 0 disables either.
+MODEL_IDLE_TTL_S = int(os.getenv("MODEL_IDLE_TTL_S", "900"))
+MODEL_RSS_LIMIT_MB = int(os.getenv("MODEL_RSS_LIMIT_MB", "0"))
+MODEL_REAPER_INTERVAL_S = int(os.getenv("MODEL_REAPER_INTERVAL_S", "60"))
+
+# ── Additive rules hot reload ─────────────────────────────────────────────────
+# AdditivesExpert re-checks additives_db.json's mtime at most this often and
+# swaps in the new rules without a restart. Each result carries rules_version
+# (content hash of the file). 0 disables hot reload.
+ADDITIVES_RELOAD_INTERVAL_S = int(os.getenv("ADDITIVES_RELOAD_INTERVAL_S", "30"))
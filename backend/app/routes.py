@@ -39,14 +39,22 @@ from app.services.barcode_service import extract_barcode_from_image
 from app.services.nutrition_db import get_product_by_gtin
 
 # ── History & analytics service ───────────────────────────────────────────────
-from app.services.history_service import save_scan, get_history, get_analytics, init_db, delete_scan
+from app.services.history_service import (
+    save_scan, get_history, get_analytics, init_db, delete_scan, get_preferences, save_preferences,
+)
 
 # ── Legacy OCR/NLP services (kept for research, NOT called in primary flow) ───
 from app.services.ocr_pipeline import AdvancedOCRPipeline
 from app.services.health_scoring import HealthScoreEnsemble  # also used in primary flow for scoring
 from app.services.additives_expert import AdditivesExpert
+from app.services.dietary_rules import DietaryRuleEngine
 from app.services.ner_service import NERService
 from app.services.xai_service import XAIService
+from app.utils.image_quality import assess_image_quality
+from rag_pipeline.utils.nutrition_extractor import extract_nutrition
+from rag_pipeline.utils.ocr_parser import parse_ingredients
+from app.runtime import get_runtime_settings
+from app.utils.model_lifecycle import lifecycle as _model_lifecycle
 from app import config as _config
 
 # ── JWT secret (change in production via env var) ────────────────────────────
@@ -121,6 +129,7 @@ bp = Blueprint("api", __name__)
 #         confined to one place per object — safer under gunicorn workers.
 _scoring_engine: Optional[HealthScoreEnsemble] = None
 _additives_expert_singleton: Optional[AdditivesExpert] = None
+_dietary_engine_singleton: Optional[DietaryRuleEngine] = None
 _xai_service_singleton: Optional[XAIService] = None
 _ocr_pipeline: Optional[AdvancedOCRPipeline] = None
 _ner_service: Optional[NERService] = None
@@ -137,10 +146,31 @@ def _get_additives_expert() -> AdditivesExpert:
     """Fix 7: Return module-level singleton — avoids re-parsing JSON every request."""
     global _additives_expert_singleton
     if _additives_expert_singleton is None:
-        _additives_expert_singleton = AdditivesExpert()
+        _additives_expert_singleton = AdditivesExpert(
+            reload_interval_s=getattr(_config, "ADDITIVES_RELOAD_INTERVAL_S", 0),
+        )
     return _additives_expert_singleton
 
 
+def _get_dietary_engine() -> DietaryRuleEngine:
+    """Dietary rules compiled once from dietary_rules.json, shared by both scan paths."""
+    global _dietary_engine_singleton
+    if _dietary_engine_singleton is None:
+        _dietary_engine_singleton = DietaryRuleEngine()
+    return _dietary_engine_singleton
+
+
+def _load_preferences(user_id: Optional[int]) -> Dict[str, bool]:
+    """Every known diet → enabled flag for this user (all off on any DB error)."""
+    prefs = _get_dietary_engine().default_preferences()
+    try:
+        stored = get_preferences(user_id)
+        prefs.update({k: v for k, v in stored.items() if k in prefs})
+    except Exception as exc:
+        logger.warning("Preferences load failed (non-fatal): %s", exc)
+    return prefs
+
+
 def _get_xai_service() -> XAIService:
     """Fix 8: Centralised getter replaces scattered global assignments."""
     global _xai_service_singleton
@@ -204,6 +234,27 @@ def read_root():
     return jsonify({"status": "ok", "message": "Food Scanner API is running!"})
 
 
+@bp.route("/api/diagnostics/runtime", methods=["GET"])
+def runtime_diagnostics():
+    """Effective per-worker CPU thread settings (see app/runtime.py)."""
+    return jsonify(get_runtime_settings())
+
+
+@bp.route("/api/diagnostics/models", methods=["GET"])
+def model_diagnostics():
+    """Loaded heavy models, idle time, approximate memory and eviction counts."""
+    return jsonify(_model_lifecycle.stats())
+
+
+@bp.route("/api/diagnostics/caches", methods=["GET"])
+def cache_diagnostics():
+    """Hit rates of the RAG result cache and query-embedding cache (this worker)."""
+    from rag_pipeline.rag_analyzer import result_cache_stats
+    from rag_pipeline.utils.embedder import embedding_cache_stats
+
+    return jsonify({"result_cache": result_cache_stats(), "embedding_cache": embedding_cache_stats()})
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # PRIMARY ENDPOINT — barcode-first pipeline
 # ─────────────────────────────────────────────────────────────────────────────
@@ -294,12 +345,15 @@ def scan():
     n100 = product.get("nutrition_per_100g") or {}
     ingredients_list = product.get("ingredients") or []
     ingredients_text = ", ".join(ingredients_list)
+    # Parsed once; additives, dietary checks and any later consumer share it
+    parsed_ingredients = parse_ingredients(ingredients_text)
 
     # Fix 7: use singleton instead of instantiating on every request
-    additives_expert = _get_additives_expert()
-    detected_additives, additive_impact = additives_expert.analyze_text(ingredients_text)
-    coloring_agents = [a for a in detected_additives if a.get("category") == "Colour"]
-    risk_summary = additives_expert.get_risk_summary(detected_additives)
+    additive_analysis = _get_additives_expert().analyze(parsed_ingredients.text)
+    detected_additives = list(additive_analysis.detected)
+    additive_impact = additive_analysis.impact
+    coloring_agents = additive_analysis.coloring_agents
+    risk_summary = additive_analysis.risk_summary
 
     logger.info(
         "POST /api/scan — additives: %d detected (impact=%.1f, risk=%s)",
@@ -307,7 +361,6 @@ def scan():
     )
 
     # ── Step 5: Health score using nutrition + additive impact ────────────────
-    _add_feats = getattr(additives_expert, "last_additive_features", {})
     features = {
         "sugar_g":               n100.get("sugars_g"),
         "fat_g":                 n100.get("fat_g"),
@@ -318,8 +371,8 @@ def scan():
         "fiber_g":               n100.get("fiber_g"),
         "sodium_mg":             n100.get("sodium_mg"),
         "additive_impact":       additive_impact,
-        "additive_count":        _add_feats.get("additive_count", len(detected_additives)),
-        "has_critical_additive": _add_feats.get("has_critical_additive", 0),
+        "additive_count":        additive_analysis.additive_count,
+        "has_critical_additive": additive_analysis.has_critical_additive,
         "nova_group":            product.get("nova_group"),
     }
     scoring_engine = _get_scoring_engine()
@@ -360,70 +413,12 @@ def scan():
 
     # ── Step 5b: Load user preferences and apply dietary overrides ────────────
     user_id = _get_current_user_id()   # resolve early — needed for prefs lookup AND history save
-    prefs = {"vegan": False, "no_sugar": False, "low_sodium": False, "gluten_free": False}
-    preference_warnings = []
-    try:
-        from app.services.history_service import _get_conn as _hconn
-        with _hconn() as _pc:
-            _prow = _pc.execute(
-                "SELECT vegan, no_sugar, low_sodium, gluten_free FROM preferences WHERE user_id=?",
-                (user_id or 0,)
-            ).fetchone()
-            if _prow:
-                prefs = {
-                    "vegan":       bool(_prow[0]),
-                    "no_sugar":    bool(_prow[1]),
-                    "low_sodium":  bool(_prow[2]),
-                    "gluten_free": bool(_prow[3]),
-                }
-    except Exception as _pe:
-        logger.warning("Preferences load failed (non-fatal): %s", _pe)
-
-    # Check each preference against the product's data
-    ing_lower = ingredients_text.lower()
-    if prefs["vegan"]:
-        animal_keywords = ["milk", "cheese", "paneer", "butter", "ghee", "cream",
-                           "egg", "meat", "chicken", "fish", "gelatin", "honey",
-                           "whey", "lactose", "casein", "lard"]
-        violations = [kw for kw in animal_keywords if kw in ing_lower]
-        if violations:
-            preference_warnings.append(
-                f"⚠️ Not vegan: contains {', '.join(violations[:3])}"
-            )
-            health_score = "RED"  # hard violation
-
-    if prefs["no_sugar"]:
-        sugar_g = n100.get("sugars_g") or 0
-        sugar_keywords = ["sugar", "sucrose", "glucose syrup", "corn syrup", "dextrose",
-                          "fructose", "maltose", "molasses", "cane juice"]
-        has_sugar_ing = any(kw in ing_lower for kw in sugar_keywords)
-        if sugar_g > 5 or has_sugar_ing:
-            preference_warnings.append(
-                f"⚠️ High sugar: {sugar_g}g per 100g — not suitable for no-sugar diet"
-            )
-            if health_score == "GREEN":
-                health_score = "YELLOW"
-
-    if prefs["low_sodium"]:
-        sodium_mg = n100.get("sodium_mg") or 0
-        if sodium_mg > 400:
-            preference_warnings.append(
-                f"⚠️ High sodium: {sodium_mg}mg per 100g — exceeds low-sodium limit"
-            )
-            if health_score == "GREEN":
-                health_score = "YELLOW"
-            if sodium_mg > 800:
-                health_score = "RED"
-
-    if prefs["gluten_free"]:
-        gluten_keywords = ["wheat", "barley", "rye", "oat", "gluten", "wheat flour",
-                           "maida", "semolina", "atta"]
-        violations = [kw for kw in gluten_keywords if kw in ing_lower]
-        if violations:
-            preference_warnings.append(
-                f"⚠️ Contains gluten: {', '.join(violations[:3])}"
-            )
-            health_score = "RED"  # hard violation for celiac
+    prefs = _load_preferences(user_id)
+    dietary = _get_dietary_engine().evaluate(
+        parsed_ingredients.folded, features, [d for d, on in prefs.items() if on], health_score,
+    )
+    preference_warnings = dietary.warnings
+    health_score = dietary.health_color
 
     # Build personalised healthy_alt
     if preference_warnings:
@@ -448,6 +443,7 @@ def scan():
         "additives":             detected_additives,
         "coloring_agents":       coloring_agents,
         "risk_summary":          risk_summary,
+        "rules_version":         additive_analysis.rules_version,
         "nutriscore":            nutriscore_info,
         "healthy_alternative":   healthy_alt,
         "preference_warnings":   preference_warnings,
@@ -471,6 +467,7 @@ def scan():
             source=product.get("source"),
             scan_mode="barcode",
             user_id=user_id,
+            rules_version=additive_analysis.rules_version,
         )
         logger.info(
             "Scan saved — user=%s | %s | %s %.1f | %d additives",
@@ -544,10 +541,12 @@ def analyze():
 
         # NER + Additives + Scoring + XAI
         features = ner_service.extract(raw_text)
-        detected_additives, additive_impact = additives_expert.analyze_text(raw_text)
-        risk_summary = additives_expert.get_risk_summary(detected_additives)
+        additive_analysis = additives_expert.analyze(raw_text)
+        detected_additives = list(additive_analysis.detected)
+        additive_impact = additive_analysis.impact
+        risk_summary = additive_analysis.risk_summary
         features["additive_impact"] = additive_impact
-        coloring_agents = [a for a in detected_additives if a.get("category") == "Colour"]
+        coloring_agents = additive_analysis.coloring_agents
         health_score = scoring_engine.calculate_raw_score(features)
         xai_explanations = xai_service.explain_score(
             None, features, ["sugar_g", "additive_impact", "calories", "protein_g"]
@@ -683,6 +682,16 @@ def scan_label():
       "image"        : "<base64 of ingredients/nutrition table photo>",
       "product_name" : "Maggi 2-Minute Noodles"   # required: entered by user
     }
+
+    Response — image fails the quality gate (HTTP 422)
+    ---------------------------------------------------
+    {
+      "status": "retake_photo",
+      "message": "image_quality_low",
+      "reason": "blurry" | "too_dark" | "overexposed" | "no_text",
+      "hint": "...",
+      "quality": { laplacian_var, dark_fraction, ..., elapsed_ms }
+    }
     """
     import sys as _sys
     import os as _os
@@ -703,6 +712,24 @@ def scan_label():
     img_path   = None
     raw_ocr_text = ""
 
+    # ── Step 0: Quality gate — reject unreadable photos before OCR ──────────
+    if image_b64 and getattr(_config, "LABEL_QUALITY_GATE_ENABLED", True):
+        _gate_img = _decode_base64_image(image_b64)
+        if _gate_img is not None:
+            quality = assess_image_quality(_gate_img)
+            if not quality["ok"]:
+                logger.info(
+                    "scan-label: quality gate rejected image (%s) %s",
+                    quality["reason"], quality["metrics"]
+                )
+                return jsonify({
+                    "status":  "retake_photo",
+                    "message": "image_quality_low",
+                    "reason":  quality["reason"],
+                    "hint":    quality["hint"],
+                    "quality": quality["metrics"],
+                }), 422
+
     try:
         # ── Step 1: OCR the label image (if provided) ───────────────────────
         structured_nutrition_from_ocr = {}
@@ -734,6 +761,17 @@ def scan_label():
 
         # ── Step 1b: Second OCR pass for nutrition table image (if provided) ─
         nutrition_image_b64 = data.get("nutrition_image")
+        if nutrition_image_b64 and nutrition_image_b64 != image_b64 and getattr(_config, "LABEL_QUALITY_GATE_ENABLED", True):
+            _nutr_gate_img = _decode_base64_image(nutrition_image_b64)
+            if _nutr_gate_img is not None:
+                _nutr_quality = assess_image_quality(_nutr_gate_img)
+                if not _nutr_quality["ok"]:
+                    # Secondary image: skip its OCR pass rather than failing the scan
+                    logger.info(
+                        "scan-label: nutrition image skipped by quality gate (%s)",
+                        _nutr_quality["reason"]
+                    )
+                    nutrition_image_b64 = None
         if nutrition_image_b64 and nutrition_image_b64 != image_b64:
             nutr_temp_id  = str(uuid.uuid4())
             nutr_img_path = f"label_nutr_{nutr_temp_id}.jpg"
@@ -778,11 +816,14 @@ def scan_label():
         # Prefer OCR-extracted ingredients text when the lookup returned nothing
         if not ingredients_text:
             ingredients_text = ingredients_text_from_ocr or raw_ocr_text
+        # Parsed once; additives, dietary checks and RAG all share it
+        parsed_ingredients = parse_ingredients(ingredients_text)
 
         # Fix: use singleton instead of instantiating on every request
-        additives_expert = _get_additives_expert()
-        detected_additives, additive_impact = additives_expert.analyze_text(ingredients_text)
-        coloring_agents = [a for a in detected_additives if a.get("category") == "Colour"]
+        additive_analysis  = _get_additives_expert().analyze(parsed_ingredients.text)
+        detected_additives = list(additive_analysis.detected)
+        additive_impact    = additive_analysis.impact
+        coloring_agents    = additive_analysis.coloring_agents
 
         # Prefer structured_nutrition from OCR pipeline over regex-extracted nutr dict
         # structured_nutrition_from_ocr uses canonical keys (energy_kcal, fat_g, etc.)
@@ -800,7 +841,6 @@ def scan_label():
                     return float(v)
             return None
 
-        _add_feats_label = getattr(additives_expert, "last_additive_features", {})
         features = {
             "calories":              _pick("energy_kcal",    "calories"),
             "sugar_g":               _pick("sugar_g",        "sugar"),
@@ -811,14 +851,14 @@ def scan_label():
             "fiber_g":               _pick("fiber_g",        "fiber"),
             "sodium_mg":             _pick("sodium_mg",      "sodium"),
             "additive_impact":       additive_impact,
-            "additive_count":        _add_feats_label.get("additive_count", len(detected_additives)),
-            "has_critical_additive": _add_feats_label.get("has_critical_additive", 0),
+            "additive_count":        additive_analysis.additive_count,
+            "has_critical_additive": additive_analysis.has_critical_additive,
             "nova_group":            product.get("nova_group"),
         }
         scoring_engine = _get_scoring_engine()
         health_score   = scoring_engine.calculate_raw_score(features)
         nutriscore_info = scoring_engine.get_nutriscore(features)
-        risk_summary   = additives_expert.get_risk_summary(detected_additives)
+        risk_summary   = additive_analysis.risk_summary
         risk_tier      = risk_summary.get("risk_tier", "SAFE")
 
         if risk_tier in ("CRITICAL", "HIGH_RISK"):
@@ -854,60 +894,12 @@ def scan_label():
 
         # ── Step 3b: Apply user dietary preferences (same logic as barcode path) ─
         user_id = _get_current_user_id()
-        prefs = {"vegan": False, "no_sugar": False, "low_sodium": False, "gluten_free": False}
-        preference_warnings = []
-        try:
-            from app.services.history_service import _get_conn as _hconn
-            with _hconn() as _pc:
-                _prow = _pc.execute(
-                    "SELECT vegan, no_sugar, low_sodium, gluten_free FROM preferences WHERE user_id=?",
-                    (user_id or 0,)
-                ).fetchone()
-                if _prow:
-                    prefs = {
-                        "vegan":       bool(_prow[0]),
-                        "no_sugar":    bool(_prow[1]),
-                        "low_sodium":  bool(_prow[2]),
-                        "gluten_free": bool(_prow[3]),
-                    }
-        except Exception as _pe:
-            logger.warning("scan-label: preferences load failed (non-fatal): %s", _pe)
-
-        ing_lower = ingredients_text.lower()
-        if prefs["vegan"]:
-            animal_kw = ["milk", "cheese", "paneer", "butter", "ghee", "cream",
-                         "egg", "meat", "chicken", "fish", "gelatin", "honey",
-                         "whey", "lactose", "casein", "lard"]
-            violations = [kw for kw in animal_kw if kw in ing_lower]
-            if violations:
-                preference_warnings.append(f"⚠️ Not vegan: contains {', '.join(violations[:3])}")
-                health_color = "RED"
-
-        if prefs["no_sugar"]:
-            sugar_val = features.get("sugar_g") or 0
-            sugar_kw = ["sugar", "sucrose", "glucose syrup", "corn syrup", "dextrose",
-                        "fructose", "maltose", "molasses", "cane juice"]
-            if sugar_val > 5 or any(kw in ing_lower for kw in sugar_kw):
-                preference_warnings.append(f"⚠️ High sugar: {sugar_val}g per 100g")
-                if health_color == "GREEN":
-                    health_color = "YELLOW"
-
-        if prefs["low_sodium"]:
-            sodium_val = features.get("sodium_mg") or 0
-            if sodium_val > 400:
-                preference_warnings.append(f"⚠️ High sodium: {sodium_val}mg per 100g")
-                if health_color == "GREEN":
-                    health_color = "YELLOW"
-                if sodium_val > 800:
-                    health_color = "RED"
-
-        if prefs["gluten_free"]:
-            gluten_kw = ["wheat", "barley", "rye", "oat", "gluten",
-                         "wheat flour", "maida", "semolina", "atta"]
-            violations = [kw for kw in gluten_kw if kw in ing_lower]
-            if violations:
-                preference_warnings.append(f"⚠️ Contains gluten: {', '.join(violations[:3])}")
-                health_color = "RED"
+        prefs = _load_preferences(user_id)
+        dietary = _get_dietary_engine().evaluate(
+            parsed_ingredients.folded, features, [d for d, on in prefs.items() if on], health_color,
+        )
+        preference_warnings = dietary.warnings
+        health_color = dietary.health_color
 
         if preference_warnings:
             healthy_alt = " | ".join(preference_warnings)
@@ -924,6 +916,7 @@ def scan_label():
             "additives":           detected_additives,
             "coloring_agents":     coloring_agents,
             "risk_summary":        risk_summary,
+            "rules_version":       additive_analysis.rules_version,
             "nutriscore":          nutriscore_info,
             "xai":                 {"shap_impacts": _get_xai_service().explain_score(None, features, [])},
             "warnings":            product.get("warnings", []),
@@ -943,6 +936,7 @@ def scan_label():
                 _rag_result = _rag_analyze(
                     nutrition_text=raw_ocr_text,
                     ingredients_text=ingredients_text,
+                    parsed_ingredients=parsed_ingredients,
                 )
                 response_body["rag_analysis"] = _rag_result
                 logger.info("RAG label analysis complete — score=%.1f (%s)",
@@ -965,6 +959,7 @@ def scan_label():
                 source=product.get("source", "ocr_extracted"),
                 scan_mode="label",
                 user_id=user_id,
+                rules_version=additive_analysis.rules_version,
             )
             logger.info("scan-label: saved to history (user_id=%s)", user_id)
         except Exception as _he:
@@ -991,23 +986,9 @@ def _ocr_only_extract(product_name: str, raw_text: str) -> dict:
     import re
     text_lower = raw_text.lower()
 
-    def _find(patterns):
-        for pat in patterns:
-            m = re.search(pat, text_lower)
-            if m:
-                try:
-                    return float(m.group(1))
-                except Exception:
-                    pass
-        return None
-
-    calories = _find([r"energy[^\d]*(\d+(?:\.\d+)?)\s*k?cal", r"calories?[^\d]*(\d+(?:\.\d+)?)", r"(\d+(?:\.\d+)?)\s*k?cal"])
-    protein  = _find([r"protein[^\d]*(\d+(?:\.\d+)?)\s*g"])
-    fat      = _find([r"total\s+fat[^\d]*(\d+(?:\.\d+)?)\s*g", r"fat[^\d]*(\d+(?:\.\d+)?)\s*g"])
-    carbs    = _find([r"total\s+carbo[^\d]*(\d+(?:\.\d+)?)\s*g", r"carbohydrate[^\d]*(\d+(?:\.\d+)?)\s*g", r"carbs?[^\d]*(\d+(?:\.\d+)?)\s*g"])
-    sugar    = _find([r"sugar[^\d]*(\d+(?:\.\d+)?)\s*g"])
-    sodium   = _find([r"sodium[^\d]*(\d+(?:\.\d+)?)\s*m?g", r"salt[^\d]*(\d+(?:\.\d+)?)\s*g"])
-    fiber    = _find([r"(?:dietary\s+)?fi(?:b|e)r(?:e)?[^\d]*(\d+(?:\.\d+)?)\s*g"])
+    n = extract_nutrition(raw_text)
+    calories, protein, fat = n["calories"], n["protein_g"], n["fat_g"]
+    carbs, sugar, sodium, fiber = n["carbohydrates_g"], n["sugars_g"], n["sodium_mg"], n["fiber_g"]
 
     ing_match = re.search(r"ingredients?\s*:?\s*([^.]{10,400})", raw_text, re.IGNORECASE | re.DOTALL)
     ingredients = []
@@ -1119,56 +1100,17 @@ def auth_me():
 @bp.route("/preferences", methods=["GET", "POST"])
 def preferences():
     """Persist dietary preferences per user (or globally for guests)."""
-    from app.services.history_service import _get_conn
     user_id = _get_current_user_id()
 
-    with _get_conn() as conn:
-        # Ensure preferences table exists
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS preferences (
-                user_id   INTEGER PRIMARY KEY,
-                vegan     INTEGER DEFAULT 0,
-                no_sugar  INTEGER DEFAULT 0,
-                low_sodium INTEGER DEFAULT 0,
-                gluten_free INTEGER DEFAULT 0
-            )
-        """)
-        conn.commit()
-
-        if request.method == "POST":
-            data = request.get_json(silent=True) or {}
-            uid = user_id if user_id is not None else 0
-            conn.execute("""
-                INSERT INTO preferences (user_id, vegan, no_sugar, low_sodium, gluten_free)
-                VALUES (?,?,?,?,?)
-                ON CONFLICT(user_id) DO UPDATE SET
-                    vegan=excluded.vegan,
-                    no_sugar=excluded.no_sugar,
-                    low_sodium=excluded.low_sodium,
-                    gluten_free=excluded.gluten_free
-            """, (
-                uid,
-                1 if data.get("vegan") else 0,
-                1 if data.get("no_sugar") else 0,
-                1 if data.get("low_sodium") else 0,
-                1 if data.get("gluten_free") else 0,
-            ))
-            conn.commit()
-            return jsonify({"status": "updated"})
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        save_preferences(
+            {diet: bool(data.get(diet)) for diet in _get_dietary_engine().default_preferences()},
+            user_id,
+        )
+        return jsonify({"status": "updated"})
 
-        # GET
-        uid = user_id if user_id is not None else 0
-        row = conn.execute(
-            "SELECT * FROM preferences WHERE user_id=?", (uid,)
-        ).fetchone()
-        if not row:
-            return jsonify({"vegan": False, "no_sugar": False, "low_sodium": False, "gluten_free": False})
-        return jsonify({
-            "vegan": bool(row["vegan"]),
-            "no_sugar": bool(row["no_sugar"]),
-            "low_sodium": bool(row["low_sodium"]),
-            "gluten_free": bool(row["gluten_free"]),
-        })
+    return jsonify(_load_preferences(user_id))
 
 
 @bp.route("/<path:path>")
@@ -0,0 +1,144 @@
+"""
+runtime.py
+──────────
+Per-worker CPU thread budget for the native libraries used by the backend.
+
+Under gunicorn every worker process loads its own torch (EasyOCR,
+sentence-transformers), OpenCV, XGBoost and FAISS. Each of them defaults
+to one thread per core, so N workers on a C-core host run up to N×C busy
+threads per library and tail latency explodes. This module reads one
+budget from app.config and applies it everywhere at startup:
+
+  - BLAS / OpenMP env vars  (OMP, OpenBLAS, MKL, numexpr, Accelerate;
+                              values the deployment already set win)
+  - cv2.setNumThreads
+  - torch.set_num_threads   (now if loaded, else when EasyOCR loads torch)
+  - faiss.omp_set_num_threads
+  - XGBoost "nthread"       (via xgboost_nthread() for Booster params)
+  - rapidfuzz cdist workers (RAG additive matching, via thread_budget())
+  - onnxruntime intra-op threads (RAG ONNX embedder, via thread_budget())
+
+Env vars must be set before numpy/torch initialise their thread pools, so
+apply_thread_budget() is the first thing create_app() calls.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from typing import Any, Dict, Optional
+
+from app import config as _config
+
+logger = logging.getLogger(__name__)
+
+_BLAS_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+_budget: Optional[int] = None
+_applied: Dict[str, Any] = {}
+
+
+def thread_budget() -> int:
+    """Threads each worker may use: THREADS_PER_WORKER, or cpu_count // workers."""
+    global _budget
+    if _budget is None:
+        configured = int(getattr(_config, "THREADS_PER_WORKER", 0) or 0)
+        if configured > 0:
+            _budget = configured
+        else:
+            workers = max(1, int(getattr(_config, "WEB_CONCURRENCY", 1) or 1))
+            _budget = max(1, (os.cpu_count() or 1) // workers)
+    return _budget
+
+
+def configure_torch() -> None:
+    """Apply the budget to torch. Call right after `import torch`."""
+    try:
+        import torch
+        torch.set_num_threads(thread_budget())
+        _applied["torch"] = torch.get_num_threads()
+    except Exception as exc:
+        logger.debug("torch thread config skipped: %s", exc)
+
+
+def xgboost_nthread() -> int:
+    """Value for the XGBoost `nthread` parameter."""
+    _applied["xgboost"] = thread_budget()
+    return thread_budget()
+
+
+def apply_thread_budget() -> Dict[str, Any]:
+    """
+    Apply the per-worker thread budget to every library. Idempotent.
+
+    Returns the effective settings (same dict as get_runtime_settings()).
+    """
+    n = thread_budget()
+    if _applied.get("budget") == n:
+        return get_runtime_settings()
+
+    for var in _BLAS_ENV_VARS:
+        os.environ.setdefault(var, str(n))
+    _applied["budget"] = n
+
+    try:
+        import cv2
+        cv2.setNumThreads(n)
+        _applied["cv2"] = cv2.getNumThreads()
+    except Exception as exc:
+        logger.debug("cv2 thread config skipped: %s", exc)
+
+    # torch is heavy — only configure it here if something already imported
+    # it; otherwise OMP_NUM_THREADS covers it and _get_reader() calls
+    # configure_torch() when EasyOCR pulls it in.
+    if "torch" in sys.modules:
+        configure_torch()
+
+    try:
+        import faiss
+        faiss.omp_set_num_threads(n)
+        _applied["faiss"] = faiss.omp_get_max_threads()
+    except Exception as exc:
+        logger.debug("faiss thread config skipped: %s", exc)
+
+    xgboost_nthread()
+
+    logger.info(
+        "Runtime: thread budget %d/worker (cpu=%s, workers=%s) applied to %s",
+        n, os.cpu_count(), getattr(_config, "WEB_CONCURRENCY", 1),
+        sorted(k for k in _applied if k != "budget"),
+    )
+    return get_runtime_settings()
+
+
+def get_runtime_settings() -> Dict[str, Any]:
+    """Effective thread settings, for the diagnostics endpoint."""
+    libraries: Dict[str, Any] = {
+        "cv2":     None,
+        "torch":   None,
+        "faiss":   None,
+        "xgboost": _applied.get("xgboost"),
+    }
+    if "cv2" in sys.modules:
+        libraries["cv2"] = sys.modules["cv2"].getNumThreads()
+    if "torch" in sys.modules:
+        libraries["torch"] = sys.modules["torch"].get_num_threads()
+    if "faiss" in sys.modules:
+        libraries["faiss"] = sys.modules["faiss"].omp_get_max_threads()
+
+    return {
+        "thread_budget":      thread_budget(),
+        "threads_per_worker": int(getattr(_config, "THREADS_PER_WORKER", 0) or 0),
+        "web_concurrency":    int(getattr(_config, "WEB_CONCURRENCY", 1) or 1),
+        "cpu_count":          os.cpu_count(),
+        "pid":                os.getpid(),
+        "env":                {var: os.environ.get(var) for var in _BLAS_ENV_VARS},
+        "libraries":          libraries,
+    }
@@ -1,118 +1,442 @@
+import copy
 import re
 import json
 import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Tuple
+
+
+from app.utils.keyword_matcher import trie_regex
+from app.utils.ocr_confusions import CODE_PATTERN, code_variants, name_variants, real_digit_count
+from rag_pipeline.utils.additive_index import open_index
+
+
+@dataclass(frozen=True)
+class AdditiveAnalysis:
+    """
+    Complete, immutable result of one additive analysis.
+
+    Returned by AdditivesExpert.analyze(); nothing is kept on the expert
+    instance, so one shared expert is safe across threads.
+    """
+    detected: Tuple[Dict[str, Any], ...]
+    impact: float
+    additive_count: int
+    has_critical_additive: int
+    risk_summary: Dict[str, Any]
+    hits: Tuple[Dict[str, Any], ...] = ()
+    rules_version: str = ""
+
+    @property
+    def interactions(self):
+        return self.risk_summary.get("interaction_warnings", [])
+
+    @property
+    def coloring_agents(self):
+        return [a for a in self.detected if a.get("category") == "Colour"]
+
+    @property
+    def features(self):
+        """Scoring-vector fields contributed by the additive analysis."""
+        return {
+            "additive_impact":       self.impact,
+            "additive_count":        self.additive_count,
+            "has_critical_additive": self.has_critical_additive,
+        }
+
+
+@dataclass(frozen=True)
+class AdditiveBatchResult:
+    """Per-text results (input order) plus aggregate counts for analyze_many()."""
+    results: Tuple[AdditiveAnalysis, ...]
+    aggregate: Dict[str, Any]
+
+
+def _rules_version(index):
+    """Short content hash of additives_db.json — identifies one rule set."""
+    return index.expert_sha1[:12]
+
+
+def _normalize_text(text):
+    """Collapse whitespace so line-wrapped names ("Palm\nOil") still match."""
+    return " ".join((text or "").split())
+
+
+# ── Process-pool workers for analyze_many ─────────────────────────────────────
+_worker_expert = None
+
+
+def _init_batch_worker(db_path):
+    global _worker_expert
+    _worker_expert = AdditivesExpert(db_path)
+
+
+def _analyze_chunk(texts):
+    summary_cache = {}
+    return [_worker_expert._analyze(t, summary_cache) for t in texts]
+
+
+class _RuleSet:
+    """
+    One compiled, read-only version of the additive rules.
+
+    AdditivesExpert swaps whole rule sets by a single attribute assignment,
+    so a request that grabbed a rule set keeps a consistent view of it even
+    while a reload is in progress.
+    """
+    __slots__ = ("version", "additives", "by_id", "interaction_map",
+                 "code_ids", "literal_hits", "matcher")
+
+    def __init__(self, additives, version):
+        self.version = version
+        self.additives = additives
+        self.by_id = {}            # id -> (db index, additive)
+        self.interaction_map = {}  # id -> list of conflicting ids
+        self.code_ids = {}         # "621" / "150A" and OCR variants ("6Z1") -> [ids]
+        literal_ids = {}           # upper-case name literal or OCR variant -> [ids]
+
+        for idx, additive in enumerate(additives):
+            ins_id = additive["id"]
+            self.by_id.setdefault(ins_id, (idx, additive))
+            if additive.get("interaction_warnings"):
+                self.interaction_map[ins_id] = additive["interaction_warnings"]
+
+            # Names, short names and codes are expanded once into their OCR
+            # look-alike variants ("TARTRAZLNE", "6Z1"), so misread labels
+            # still resolve through an exact lookup.
+            name = additive["name"].upper()
+            literals = {name, name.split("(")[0].strip()} - {""}
+            for literal in literals | {v for lit in literals for v in name_variants(lit)}:
+                ids = literal_ids.setdefault(literal, [])
+                if ins_id not in ids:
+                    ids.append(ins_id)
+
+            if "INS" in ins_id:
+                code = ins_id.replace("INS", "").strip().upper()
+                for variant in code_variants(code):
+                    self.code_ids.setdefault(variant, []).append(ins_id)
+
+        # A greedy match only reports the longest literal at a start
+        # position, so each literal also carries the ids of its prefixes.
+        self.literal_hits = {}
+        for literal, ids in literal_ids.items():
+            hit_ids = list(ids)
+            for i in range(1, len(literal)):
+                for other_id in literal_ids.get(literal[:i], ()):
+                    if other_id not in hit_ids:
+                        hit_ids.append(other_id)
+            self.literal_hits[literal] = hit_ids
+
+        # Names and their short forms ("TBHQ" for "TBHQ (Tertiary ...)") go
+        # into a prefix-factored alternation; INS/E codes share CODE_PATTERN
+        # and are resolved through code_ids. The whole thing sits inside a
+        # lookahead so finditer reports a hit at every start position,
+        # including names nested inside longer names. A code-shaped token
+        # that is not a known code must not hide a name starting at the same
+        # position, hence the second, independent name lookahead.
+        names = trie_regex(literal_ids)
+        self.matcher = re.compile(
+            rf"(?=(?:{CODE_PATTERN}))(?=(?P<name>{names}))?|(?=(?P<name_only>{names}))",
+            re.IGNORECASE,
+        )
+
 
 class AdditivesExpert:
     """
     Comprehensive FSSAI/INS additives detection, high-risk flagging,
     and interaction warning system.
-    Loads data from app.services.additives_db.json and uses robust regex matching.
+    Loads data from app.services.additives_db.json (through the shared,
+    memory-mapped rag_pipeline.utils.additive_index) and compiles every name,
+    short name and INS/E code into one regex at load time, so analyze_text
+    is a single pass over the text.
+
+    With reload_interval_s > 0 the database file is re-checked (mtime) at
+    most that often; a changed file is parsed and compiled on a background
+    thread and swapped in atomically. Every result carries the rules_version
+    (content hash of the file) that produced it.
     """
     # Risk tier thresholds
     HIGH_RISK_RED_COUNT = 3      # ≥3 RED additives = HIGH_RISK
     MODERATE_RISK_RED_COUNT = 1  # ≥1 RED additive  = MODERATE_RISK
 
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, reload_interval_s=0):
         if db_path is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             db_path = os.path.join(current_dir, "..", "data", "additives_db.json")
         
         self.db_path = db_path
-        self.additives = []
-        self._interaction_map = {}  # id -> list of conflicting ids
+        self.reload_interval_s = reload_interval_s
+        self._rules = _RuleSet([], "empty")
+        self._db_mtime = None
+        self._last_check = time.monotonic()
+        self._reload_lock = threading.Lock()
         self.load_database()
 
+    @property
+    def additives(self):
+        return self._rules.additives
+
+    @property
+    def rules_version(self):
+        return self._rules.version
+
     def load_database(self):
         try:
             if os.path.exists(self.db_path):
-                with open(self.db_path, 'r', encoding='utf-8') as f:
-                    self.additives = json.load(f)
-                self._build_interaction_map()
-                print(f"AdditivesExpert: Loaded {len(self.additives)} items from {self.db_path}")
+                self._db_mtime = os.stat(self.db_path).st_mtime_ns
+                index = open_index(expert_path=self.db_path)
+                self._rules = _RuleSet(index.expert_entries(), _rules_version(index))
+                print(f"AdditivesExpert: Loaded {len(self.additives)} items from {self.db_path} "
+                      f"(rules {self.rules_version})")
             else:
                 print(f"AdditivesExpert: Warning! Database not found at {self.db_path}. Using minimal fallback.")
-                self.additives = [
+                self._rules = _RuleSet([
                     {"id": "INS 621", "name": "MSG", "risk_level": "RED", "impact": -3.5,
                      "description": "Flavor enhancer.", "fssai_status": "restricted",
                      "interaction_warnings": [], "tags": []},
                     {"id": "INS 319", "name": "TBHQ", "risk_level": "RED", "impact": -3.0,
                      "description": "Preservative.", "fssai_status": "restricted",
                      "interaction_warnings": [], "tags": []}
-                ]
+                ], "fallback")
         except Exception as e:
             print(f"AdditivesExpert: Error loading database: {e}")
-            self.additives = []
+            self._rules = _RuleSet([], "empty")
 
-    def _build_interaction_map(self):
-        """Pre-build a map of additive interactions for O(1) lookups."""
-        self._interaction_map = {}
-        for additive in self.additives:
-            warnings = additive.get("interaction_warnings", [])
-            if warnings:
-                self._interaction_map[additive["id"]] = warnings
+    # ── Hot reload ───────────────────────────────────────────────────────────
 
-    def analyze_text(self, text):
+    def reload_if_changed(self):
+        """
+        Re-read the database and swap in new rules if its content changed.
+
+        Returns True if a new rule set was installed. A file that fails to
+        parse is logged and ignored; the current rules stay active.
         """
-        Detect additives in OCR text using robust pattern matching.
+        try:
+            mtime = os.stat(self.db_path).st_mtime_ns
+        except OSError as e:
+            print(f"AdditivesExpert: Reload skipped, cannot read {self.db_path}: {e}")
+            return False
+
+        try:
+            index = open_index(expert_path=self.db_path)  # rebuilds the shared index if stale
+            version = _rules_version(index)
+            if version == self._rules.version:
+                self._db_mtime = mtime
+                return False
+            rules = _RuleSet(index.expert_entries(), version)
+        except Exception as e:
+            print(f"AdditivesExpert: Reload failed, keeping rules {self._rules.version}: {e}")
+            self._db_mtime = mtime
+            return False
+
+        previous = self._rules.version
+        self._rules = rules
+        self._db_mtime = mtime
+        print(f"AdditivesExpert: Reloaded {len(rules.additives)} items "
+              f"(rules {previous} -> {rules.version})")
+        return True
+
+    def _maybe_reload(self):
+        """Cheap per-call check; the actual rebuild runs on a background thread."""
+        if not self.reload_interval_s:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval_s:
+            return
+        self._last_check = now
+        try:
+            mtime = os.stat(self.db_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._db_mtime or not self._reload_lock.acquire(blocking=False):
+            return
+
+        def _run():
+            try:
+                self.reload_if_changed()
+            finally:
+                self._reload_lock.release()
 
-        Returns: (detected_list, total_impact)
+        threading.Thread(target=_run, name="additives-reload", daemon=True).start()
+
+    # ── Matching ─────────────────────────────────────────────────────────────
+
+    def find_hits(self, text, rules=None):
+        """
+        Return every additive reference in `text` in one pass.
+
+        Each hit is {"id", "start", "end", "matched", "kind"} with kind
+        "code" or "name"; hits are ordered by offset. One reference to a
+        code ("INS 621") is reported once, not again for its bare number.
+        OCR look-alikes ("1NS 62l", "E 6Z1", "Tartrazlne") match exactly
+        through the precomputed variant tables.
+        """
+        rules = rules or self._rules
+        text = text or ""
+        hits = []
+        code_end = -1
+
+        def _add(ids, start, end, kind):
+            for ins_id in ids:
+                hits.append({
+                    "id":      ins_id,
+                    "start":   start,
+                    "end":     end,
+                    "matched": text[start:end],
+                    "kind":    kind,
+                })
+
+        for m in rules.matcher.finditer(text):
+            code = m.group("code")
+            # A bare number needs two real digits ("62l"); with an INS/E
+            # prefix one is enough ("1NS 6Zl")
+            if code and m.start() >= code_end and (
+                m.group("prefix") or real_digit_count(code) >= 2
+            ):
+                ids = rules.code_ids.get(code.upper())
+                if ids:
+                    code_end = m.end("code")
+                    _add(ids, m.start(), code_end, "code")
+
+            name_group = "name" if m.group("name") else "name_only"
+            if m.group(name_group):
+                _add(rules.literal_hits[m.group(name_group).upper()],
+                     m.start(name_group), m.end(name_group), "name")
+        return hits
+
+    def analyze(self, text):
+        """
+        Detect additives in OCR text with the compiled matcher (see find_hits)
+        and assess their risk.
 
-        Also sets self.last_additive_features dict with vector fields:
-            additive_count        — total number of distinct additives found
-            has_critical_additive — 1 if any additive is banned or RED risk, else 0
-        These are consumed by routes.py to build the full scoring feature vector.
+        Returns an AdditiveAnalysis with the detected list (database order),
+        total impact, scoring features (additive_count, has_critical_additive),
+        risk summary, interaction warnings and the rules_version used.
         """
+        self._maybe_reload()
+        return self._analyze(text)
+
+    def _analyze(self, text, summary_cache=None):
+        """analyze(), optionally sharing risk summaries by detected-id set."""
+        rules = self._rules  # one consistent snapshot for the whole call
         detected = []
         total_impact = 0
-        text_upper = text.upper()
-        detected_ids = set()
         has_critical = 0
 
-        for additive in self.additives:
+        # Report in database order, as callers and tests expect
+        hits = self.find_hits(text, rules)
+        detected_ids = {hit["id"] for hit in hits}
+        for _idx, additive in sorted(rules.by_id[i] for i in detected_ids):
             ins_id = additive["id"]
-            name = additive["name"].upper()
+            risk_level  = additive["risk_level"]
+            fssai_status = additive.get("fssai_status", "unknown")
+            if risk_level == "RED" or fssai_status == "banned":
+                has_critical = 1
+            entry = {
+                "name":         f"{additive['name']} ({ins_id})",
+                "reason":       additive.get("description", "Additive used in food processing."),
+                "risk_level":   risk_level,
+                "category":     additive.get("category", "Unknown"),
+                "fssai_status": fssai_status,
+                "tags":         additive.get("tags", []),
+            }
+            detected.append(entry)
+            total_impact += additive.get("impact", 0)
 
-            patterns = [re.escape(name)]
-            short_name = name.split("(")[0].strip()
-            if short_name != name:
-                patterns.append(re.escape(short_name))
+        if summary_cache is None:
+            risk_summary = self.get_risk_summary(detected, rules)
+        else:
+            # Computed once per id set; every result gets its own copy
+            key = (rules.version, frozenset(detected_ids))
+            cached = summary_cache.get(key)
+            if cached is None:
+                cached = summary_cache[key] = self.get_risk_summary(detected, rules)
+            risk_summary = copy.deepcopy(cached)
 
-            if "INS" in ins_id:
-                simple_code = ins_id.replace("INS", "").strip()
-                patterns.append(re.escape(ins_id))
-                patterns.append(rf"INS[\s\-]*{simple_code}")
-                patterns.append(rf"E[\s]*{simple_code}")
-                patterns.append(rf"\b{simple_code}\b")
-
-            combined_pattern = "|".join(patterns)
-
-            if re.search(combined_pattern, text_upper):
-                if ins_id not in detected_ids:
-                    risk_level  = additive["risk_level"]
-                    fssai_status = additive.get("fssai_status", "unknown")
-                    if risk_level == "RED" or fssai_status == "banned":
-                        has_critical = 1
-                    entry = {
-                        "name":         f"{additive['name']} ({ins_id})",
-                        "reason":       additive.get("description", "Additive used in food processing."),
-                        "risk_level":   risk_level,
-                        "category":     additive.get("category", "Unknown"),
-                        "fssai_status": fssai_status,
-                        "tags":         additive.get("tags", []),
-                    }
-                    detected.append(entry)
-                    total_impact += additive.get("impact", 0)
-                    detected_ids.add(ins_id)
-
-        # Store vector features for caller to pick up
-        self.last_additive_features = {
-            "additive_count":        len(detected),
-            "has_critical_additive": has_critical,
+        return AdditiveAnalysis(
+            detected=tuple(detected),
+            impact=total_impact,
+            additive_count=len(detected),
+            has_critical_additive=has_critical,
+            risk_summary=risk_summary,
+            hits=tuple(hits),
+            rules_version=rules.version,
+        )
+
+    def analyze_many(self, texts: Iterable[str], workers: int = 0, chunk_size: int = 2000):
+        """
+        Analyze a batch of ingredient texts (catalog enrichment, re-scoring).
+
+        Texts are whitespace-normalized and de-duplicated, so identical
+        ingredient lists are matched once, and risk summaries are shared
+        between texts with the same set of additives. Hit offsets refer to
+        the normalized text.
+
+        workers > 1 fans the unique texts out over a process pool in chunks
+        of chunk_size; each worker compiles its own matcher once.
+
+        Returns an AdditiveBatchResult: results in input order plus aggregate
+        counts (texts, unique_texts, with_additives, with_critical,
+        total_detected, by_risk_tier, by_additive).
+        """
+        self._maybe_reload()
+        normalized = [_normalize_text(t) for t in texts]
+        unique = list(dict.fromkeys(normalized))
+
+        if workers and workers > 1 and len(unique) > chunk_size:
+            chunks = [unique[i:i + chunk_size] for i in range(0, len(unique), chunk_size)]
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_batch_worker, initargs=(self.db_path,),
+            ) as pool:
+                analyzed = [r for chunk in pool.map(_analyze_chunk, chunks) for r in chunk]
+        else:
+            summary_cache = {}
+            analyzed = [self._analyze(t, summary_cache) for t in unique]
+
+        by_text = dict(zip(unique, analyzed))
+        seen = set()
+        results = []
+        for t in normalized:
+            result = by_text[t]
+            if t in seen:  # repeated text: same analysis, its own risk summary
+                result = replace(result, risk_summary=copy.deepcopy(result.risk_summary))
+            seen.add(t)
+            results.append(result)
+        results = tuple(results)
+        return AdditiveBatchResult(results=results, aggregate=self._aggregate(results, len(unique)))
+
+    @staticmethod
+    def _aggregate(results: Tuple[AdditiveAnalysis, ...], unique_count: int) -> Dict[str, Any]:
+        by_additive: Counter = Counter()
+        by_tier: Counter = Counter()
+        for r in results:
+            by_additive.update(a["name"] for a in r.detected)
+            by_tier[r.risk_summary.get("risk_tier", "SAFE")] += 1
+        return {
+            "texts":          len(results),
+            "unique_texts":   unique_count,
+            "with_additives": sum(1 for r in results if r.additive_count),
+            "with_critical":  sum(r.has_critical_additive for r in results),
+            "total_detected": sum(r.additive_count for r in results),
+            "by_risk_tier":   dict(by_tier),
+            "by_additive":    dict(by_additive.most_common()),
         }
 
-        return detected, total_impact
+    def analyze_text(self, text):
+        """
+        Tuple API kept for existing callers.
+
+        Returns: (detected_list, total_impact). Use analyze() for the full
+        result including scoring features and risk summary.
+        """
+        result = self.analyze(text)
+        return list(result.detected), result.impact
 
-    def get_risk_summary(self, detected_additives):
+    def get_risk_summary(self, detected_additives, rules=None):
         """
         Generate a structured risk assessment from detected additives.
         Returns a dict with risk_tier, counts, banned items, interaction warnings, and recommendation.
@@ -145,7 +469,7 @@ class AdditivesExpert:
                 watchlist_items.append(entry["name"])
 
         # Check interactions
-        interaction_warnings = self._check_interactions(detected_ids)
+        interaction_warnings = self._check_interactions(detected_ids, rules or self._rules)
 
         # Determine risk tier
         if banned_items:
@@ -192,7 +516,7 @@ class AdditivesExpert:
             "recommendation": recommendation
         }
 
-    def _check_interactions(self, detected_ids):
+    def _check_interactions(self, detected_ids, rules):
         """
         Cross-check detected additive IDs for known dangerous combinations.
         Returns list of warning strings.
@@ -201,26 +525,26 @@ class AdditivesExpert:
         checked_pairs = set()
 
         for additive_id in detected_ids:
-            if additive_id in self._interaction_map:
-                for conflict_id in self._interaction_map[additive_id]:
+            if additive_id in rules.interaction_map:
+                for conflict_id in rules.interaction_map[additive_id]:
                     if conflict_id in detected_ids:
                         pair = tuple(sorted([additive_id, conflict_id]))
                         if pair not in checked_pairs:
                             checked_pairs.add(pair)
                             # Look up names
-                            name_a = self._get_name(additive_id)
-                            name_b = self._get_name(conflict_id)
+                            name_a = self._get_name(additive_id, rules)
+                            name_b = self._get_name(conflict_id, rules)
                             warnings.append(
                                 f"[WARNING] {name_a} + {name_b}: Known dangerous interaction. "
                                 f"These substances together may produce harmful compounds."
                             )
         return warnings
 
-    def _get_name(self, additive_id):
+    def _get_name(self, additive_id, rules):
         """Get display name for an additive ID."""
-        for a in self.additives:
-            if a["id"] == additive_id:
-                return f"{a['name']} ({a['id']})"
+        if additive_id in rules.by_id:
+            a = rules.by_id[additive_id][1]
+            return f"{a['name']} ({a['id']})"
         return additive_id
 
     def _extract_id(self, display_name):
@@ -0,0 +1,143 @@
+"""
+dietary_rules.py
+────────────────
+Data-driven dietary preference checks shared by /scan and /scan-label.
+
+Diets are defined in app/data/dietary_rules.json. Each diet has:
+  - keywords    ingredient words that break the diet
+  - match       "substring" (default, same as `kw in ingredients`) or "word"
+  - severity    colour applied when a keyword is found
+  - thresholds  [{"nutrient": "sodium_mg", "above": 400, "severity": "YELLOW"}, ...]
+  - message     warning template; {matches} and any nutrient name are filled in
+
+On load, the keywords of every diet go into one KeywordMatcher. A request
+scans the ingredient text once, whatever diets are active, and each active
+diet then only intersects that result with its own keywords. A new diet is
+a JSON entry and costs no extra pass over the text.
+
+    engine = DietaryRuleEngine()
+    verdict = engine.evaluate(ingredients, features, ["vegan", "low_sodium"], "GREEN")
+    verdict.warnings, verdict.health_color
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from app.utils.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+_RULES_PATH = Path(__file__).resolve().parents[1] / "data" / "dietary_rules.json"
+
+# Worst-wins ordering for combining a diet's severity with the current colour
+_SEVERITY_RANK = {"GREEN": 0, "YELLOW": 1, "RED": 2}
+
+
+class _Diet(NamedTuple):
+    id: str
+    label: str
+    keywords: Tuple[str, ...]
+    whole_word: bool
+    severity: str
+    thresholds: Tuple[Tuple[str, float, str], ...]
+    message: str
+
+
+class DietaryVerdict(NamedTuple):
+    warnings: List[str]
+    health_color: str
+    violations: Dict[str, List[str]]   # diet id → matched keywords
+
+
+def _worse(current: str, severity: str) -> str:
+    return severity if _SEVERITY_RANK.get(severity, 0) > _SEVERITY_RANK.get(current, 0) else current
+
+
+def _is_word(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end >= len(text) or not text[end].isalnum())
+
+
+class DietaryRuleEngine:
+    """Evaluates every active dietary preference in one pass over the ingredients."""
+
+    def __init__(self, rules_path: Optional[Path] = None):
+        self.rules_path = Path(rules_path or _RULES_PATH)
+        with open(self.rules_path, encoding="utf-8") as f:
+            raw = json.load(f)
+        self.version = raw.get("version", 1)
+        self.diets: Dict[str, _Diet] = {}
+        for entry in raw.get("diets", []):
+            diet = _Diet(
+                id=entry["id"],
+                label=entry.get("label", entry["id"]),
+                keywords=tuple(k.lower() for k in entry.get("keywords", [])),
+                whole_word=entry.get("match", "substring") == "word",
+                severity=entry.get("severity", "YELLOW"),
+                thresholds=tuple(
+                    (t["nutrient"], float(t["above"]), t.get("severity", "YELLOW"))
+                    for t in entry.get("thresholds", [])
+                ),
+                message=entry.get("message", "⚠️ Not suitable for " + entry.get("label", entry["id"])),
+            )
+            self.diets[diet.id] = diet
+        self._matcher = KeywordMatcher(kw for d in self.diets.values() for kw in d.keywords)
+        logger.info("DietaryRuleEngine: %d diets, %d keywords (rules v%s)",
+                    len(self.diets), len(self._matcher.keywords), self.version)
+
+    def default_preferences(self) -> Dict[str, bool]:
+        return {diet_id: False for diet_id in self.diets}
+
+    def evaluate(
+        self,
+        ingredients: str,
+        nutrients: Mapping[str, Any],
+        active: Iterable[str],
+        health_color: str,
+    ) -> DietaryVerdict:
+        """
+        Check the product against each active diet.
+
+        Returns the warnings (in rules-file order), the colour after applying
+        every violated diet's severity (worst wins) and the matched keywords
+        per diet.
+        """
+        active = set(active)
+        active_diets = [diet for diet_id, diet in self.diets.items() if diet_id in active]
+        if not active_diets:
+            return DietaryVerdict([], health_color, {})
+
+        text = ingredients or ""
+        found = self._matcher.find(text) if any(d.keywords for d in active_diets) else {}
+
+        warnings: List[str] = []
+        violations: Dict[str, List[str]] = {}
+        for diet in active_diets:
+            matches = [
+                kw for kw in diet.keywords
+                if kw in found and (not diet.whole_word or any(_is_word(text, s, e) for s, e in found[kw]))
+            ]
+            severity = diet.severity if matches else None
+            for nutrient, limit, level in diet.thresholds:
+                if (nutrients.get(nutrient) or 0) > limit:
+                    severity = level if severity is None else _worse(severity, level)
+            if severity is None:
+                continue
+
+            values = {name: nutrients.get(name) or 0 for name, _, _ in diet.thresholds}
+            warnings.append(diet.message.format_map(
+                _Defaults(matches=", ".join(matches[:3]), **values)
+            ))
+            violations[diet.id] = matches
+            health_color = _worse(health_color, severity)
+        return DietaryVerdict(warnings, health_color, violations)
+
+
+class _Defaults(dict):
+    """format_map source that leaves unknown placeholders as 0."""
+
+    def __missing__(self, key: str) -> Any:
+        return 0
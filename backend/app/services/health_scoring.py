@@ -26,6 +26,12 @@ try:
 except Exception:
     HEALTH_SCORE_MODEL_PATH = ""
 
+try:
+    from app.runtime import xgboost_nthread as _xgboost_nthread
+except Exception:
+    def _xgboost_nthread() -> int:
+        return 0  # XGBoost default: all cores
+
 # ── NutriScore lookup tables ──────────────────────────────────────────────────
 _ENERGY_KJ = [(3350, 10), (3015, 9), (2680, 8), (2345, 7), (2010, 6),
               (1675, 5), (1340, 4), (1005, 3), (670, 2), (335, 1)]
@@ -135,6 +141,7 @@ class HealthScoreEnsemble:
             try:
                 self.model = xgb.Booster()
                 self.model.load_model(HEALTH_SCORE_MODEL_PATH)
+                self.model.set_param({"nthread": _xgboost_nthread()})
                 print(f"HealthScoreEnsemble: loaded model from {HEALTH_SCORE_MODEL_PATH}")
             except Exception as e:
                 print(f"HealthScoreEnsemble: model load failed ({e}), using heuristic.")
@@ -111,6 +111,9 @@ def init_db() -> None:
                 ingredients_text    TEXT,
                 healthy_alternative TEXT,
 
+                -- additives_db.json content hash that produced the verdict
+                rules_version       TEXT,
+
                 -- TTL anchor
                 scanned_at          TEXT NOT NULL DEFAULT (datetime('now')),
                 expires_at          TEXT NOT NULL  -- scanned_at + 90 days
@@ -136,7 +139,8 @@ def init_db() -> None:
                 vegan       INTEGER DEFAULT 0,
                 no_sugar    INTEGER DEFAULT 0,
                 low_sodium  INTEGER DEFAULT 0,
-                gluten_free INTEGER DEFAULT 0
+                gluten_free INTEGER DEFAULT 0,
+                extra_diets TEXT
             )
         """)
 
@@ -176,11 +180,17 @@ _SCANS_REQUIRED_COLUMNS: List[tuple] = [
 _SCAN_RESULTS_REQUIRED_COLUMNS: List[tuple] = [
     ("harmful_additives_json", "TEXT"),
     ("scan_mode",              "TEXT"),
+    ("rules_version",          "TEXT"),
+]
+
+# Diets beyond the four legacy toggles (dietary_rules.json) live in extra_diets
+_PREFERENCES_REQUIRED_COLUMNS: List[tuple] = [
+    ("extra_diets", "TEXT"),
 ]
 
 
 def _migrate_legacy_columns() -> None:
-    """Add missing columns to the legacy scans table and scan_results (non-destructive)."""
+    """Add missing columns to scans, scan_results and preferences (non-destructive)."""
     with _get_conn() as conn:
         existing_scans = {row[1] for row in conn.execute("PRAGMA table_info(scans)").fetchall()}
         for col_name, col_def in _SCANS_REQUIRED_COLUMNS:
@@ -194,6 +204,12 @@ def _migrate_legacy_columns() -> None:
                 conn.execute(f"ALTER TABLE scan_results ADD COLUMN {col_name} {col_def}")
                 logger.info("DB migration: added column scan_results.%s", col_name)
 
+        existing_prefs = {row[1] for row in conn.execute("PRAGMA table_info(preferences)").fetchall()}
+        for col_name, col_def in _PREFERENCES_REQUIRED_COLUMNS:
+            if col_name not in existing_prefs:
+                conn.execute(f"ALTER TABLE preferences ADD COLUMN {col_name} {col_def}")
+                logger.info("DB migration: added column preferences.%s", col_name)
+
         conn.commit()
 
 
@@ -265,6 +281,7 @@ def save_scan(
     source: Optional[str] = None,
     scan_mode: Optional[str] = "barcode",
     user_id: Optional[int] = None,
+    rules_version: Optional[str] = None,
 ) -> int:
     """
     Write to both tables:
@@ -326,7 +343,7 @@ def save_scan(
                     carbs_g, sugar_g, fiber_g, sodium_mg,
                     additive_count, harmful_additive_count,
                     additives_json, harmful_additives_json,
-                    ingredients_text, healthy_alternative,
+                    ingredients_text, healthy_alternative, rules_version,
                     scanned_at, expires_at
                 ) VALUES (
                     ?,?,?,?,?,
@@ -335,7 +352,7 @@ def save_scan(
                     ?,?,?,?,
                     ?,?,
                     ?,?,
-                    ?,?,
+                    ?,?,?,
                     ?,?
                 )""",
                 (
@@ -361,6 +378,7 @@ def save_scan(
                     json.dumps(harmful_additives),
                     ingredients_text,
                     healthy_alternative,
+                    rules_version,
                     now_str,
                     expires_str,
                 ),
@@ -460,6 +478,54 @@ def _fmt(val: Optional[float], unit: str = "g") -> str:
     return f"{round(val, 1)}{unit}"
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Preferences
+# ─────────────────────────────────────────────────────────────────────────────
+
+_LEGACY_PREFERENCE_COLUMNS = ("vegan", "no_sugar", "low_sodium", "gluten_free")
+
+
+def get_preferences(user_id: Optional[int] = None) -> Dict[str, bool]:
+    """
+    Dietary toggles for a user (0 = guests). Only diets that were ever saved
+    are returned; callers fill in defaults for the rest.
+    """
+    with _get_conn() as conn:
+        row = conn.execute(
+            "SELECT * FROM preferences WHERE user_id=?", (user_id or 0,)
+        ).fetchone()
+    if not row:
+        return {}
+    prefs = {col: bool(row[col]) for col in _LEGACY_PREFERENCE_COLUMNS}
+    if "extra_diets" in row.keys() and row["extra_diets"]:
+        try:
+            prefs.update({k: bool(v) for k, v in json.loads(row["extra_diets"]).items()})
+        except (ValueError, AttributeError):
+            logger.warning("Preferences: unreadable extra_diets for user %s", user_id)
+    return prefs
+
+
+def save_preferences(prefs: Dict[str, bool], user_id: Optional[int] = None) -> None:
+    """Upsert dietary toggles; diets without a column go to extra_diets."""
+    extra = {k: bool(v) for k, v in prefs.items() if k not in _LEGACY_PREFERENCE_COLUMNS}
+    with _get_conn() as conn:
+        conn.execute("""
+            INSERT INTO preferences (user_id, vegan, no_sugar, low_sodium, gluten_free, extra_diets)
+            VALUES (?,?,?,?,?,?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                vegan=excluded.vegan,
+                no_sugar=excluded.no_sugar,
+                low_sodium=excluded.low_sodium,
+                gluten_free=excluded.gluten_free,
+                extra_diets=excluded.extra_diets
+        """, (
+            user_id or 0,
+            *(1 if prefs.get(col) else 0 for col in _LEGACY_PREFERENCE_COLUMNS),
+            json.dumps(extra) if extra else None,
+        ))
+        conn.commit()
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Delete
 # ─────────────────────────────────────────────────────────────────────────────
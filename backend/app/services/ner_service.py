@@ -24,6 +24,11 @@ from __future__ import annotations
 import re
 from typing import Any, Dict, List, Optional
 
+from app.utils.ocr_confusions import CODE_PATTERN, canonical_code, real_digit_count
+from rag_pipeline.utils.nutrition_extractor import extract_nutrition
+
+_ADDITIVE_CODE_RE = re.compile(CODE_PATTERN, re.IGNORECASE)
+
 
 class NERService:
     """
@@ -87,109 +92,22 @@ class NERService:
 
     def _heuristic_extract(self, text: str) -> Dict[str, Any]:
         """
-        Multi-pattern regex extraction.
+        Single-pass regex extraction (rag_pipeline.utils.nutrition_extractor).
         Returns None for fields not found — avoids biasing scores with defaults.
         Covers English + Hindi/regional label patterns.
         """
-        t = text.lower()
-
-        def _first(patterns: List[str]) -> Optional[float]:
-            for pat in patterns:
-                m = re.search(pat, t)
-                if m:
-                    try:
-                        return float(m.group(1))
-                    except Exception:
-                        pass
-            return None
-
-        # ── Calories / Energy ────────────────────────────────────────────────
-        calories = _first([
-            r"energy[:\s]+(\d+\.?\d*)\s*kcal",
-            r"(\d+\.?\d*)\s*kcal",
-            r"calories?[:\s]+(\d+\.?\d*)",
-            r"(\d+\.?\d*)\s*cal(?:ories?)?\b",
-            r"ऊर्जा[:\s]+(\d+\.?\d*)",
-        ])
-        # kJ fallback — convert to kcal
-        if calories is None:
-            kj = _first([r"energy[:\s]+(\d+\.?\d*)\s*kj", r"(\d+\.?\d*)\s*kj"])
-            if kj is not None and kj > 400:
-                calories = round(kj / 4.184)
-
-        # ── Sugar ────────────────────────────────────────────────────────────
-        sugar_g = _first([
-            r"of which sugars?[:\s]+(\d+\.?\d*)",
-            r"(?:total\s*)?sugars?[:\s]+(\d+\.?\d*)\s*g",
-            r"sugars?[:\s]+(\d+\.?\d*)",
-            r"शर्करा[:\s]+(\d+\.?\d*)",
-            r"चीनी[:\s]+(\d+\.?\d*)",
-        ])
-
-        # ── Fat ──────────────────────────────────────────────────────────────
-        fat_g = _first([
-            r"(?:total\s*)?fat[:\s]+(\d+\.?\d*)\s*g",
-            r"fat[:\s]+(\d+\.?\d*)",
-            r"lipids?[:\s]+(\d+\.?\d*)",
-            r"वसा[:\s]+(\d+\.?\d*)",
-        ])
-
-        # ── Saturated fat ────────────────────────────────────────────────────
-        saturated_fat_g = _first([
-            r"saturated\s*fat[:\s]+(\d+\.?\d*)\s*g",
-            r"saturated[:\s]+(\d+\.?\d*)",
-            r"sat\.?\s*fat[:\s]+(\d+\.?\d*)",
-        ])
-
-        # ── Trans fat ────────────────────────────────────────────────────────
-        trans_fat_g = _first([
-            r"trans\s*fat[:\s]+(\d+\.?\d*)\s*g",
-            r"trans[:\s]+(\d+\.?\d*)",
-        ])
-
-        # ── Carbohydrates ────────────────────────────────────────────────────
-        carbs_g = _first([
-            r"(?:total\s*)?carbohydrates?[:\s]+(\d+\.?\d*)\s*g",
-            r"(?:total\s*)?carbohydrates?[:\s]+(\d+\.?\d*)",
-            r"carbs?[:\s]+(\d+\.?\d*)\s*g",
-            r"carbs?[:\s]+(\d+\.?\d*)",
-        ])
-
-        # ── Protein ──────────────────────────────────────────────────────────
-        protein_g = _first([
-            r"proteins?[:\s]+(\d+\.?\d*)\s*g",
-            r"proteins?[:\s]+(\d+\.?\d*)",
-            r"प्रोटीन[:\s]+(\d+\.?\d*)",
-        ])
-
-        # ── Dietary fiber ────────────────────────────────────────────────────
-        fiber_g = _first([
-            r"(?:dietary\s*)?fi(?:b|e)r(?:e)?[:\s]+(\d+\.?\d*)\s*g",
-            r"(?:dietary\s*)?fi(?:b|e)r(?:e)?[:\s]+(\d+\.?\d*)",
-        ])
-
-        # ── Sodium ───────────────────────────────────────────────────────────
-        sodium_mg = _first([
-            r"sodium[:\s]+(\d+\.?\d*)\s*mg",
-            r"sodium[:\s]+(\d+\.?\d*)",
-            r"सोडियम[:\s]+(\d+\.?\d*)",
-        ])
-        # Salt → sodium conversion (salt_g * 400 ≈ sodium_mg)
-        if sodium_mg is None:
-            salt_g = _first([r"salt[:\s]+(\d+\.?\d*)\s*g", r"salt[:\s]+(\d+\.?\d*)"])
-            if salt_g is not None:
-                sodium_mg = round(salt_g * 400)
-
+        n = extract_nutrition(text)
+        calories = n["calories"]
         return {
-            "calories":        int(calories) if calories is not None else None,
-            "sugar_g":         sugar_g,
-            "fat_g":           fat_g,
-            "saturated_fat_g": saturated_fat_g,
-            "trans_fat_g":     trans_fat_g,
-            "carbs_g":         carbs_g,
-            "protein_g":       protein_g,
-            "fiber_g":         fiber_g,
-            "sodium_mg":       sodium_mg,
+            "calories":        int(round(calories)) if calories is not None else None,
+            "sugar_g":         n["sugars_g"],
+            "fat_g":           n["fat_g"],
+            "saturated_fat_g": n["saturated_fat_g"],
+            "trans_fat_g":     n["trans_fat_g"],
+            "carbs_g":         n["carbohydrates_g"],
+            "protein_g":       n["protein_g"],
+            "fiber_g":         n["fiber_g"],
+            "sodium_mg":       n["sodium_mg"],
             "additives_found": self._extract_additives(text),
         }
 
@@ -198,11 +116,15 @@ class NERService:
     def _extract_additives(self, text: str) -> List[str]:
         """
         Extract INS / E-number codes from text.
-        Matches: INS 211, INS211, INS-211, E211, E102
+        Matches: INS 211, INS211, INS-211, E211, E102, and OCR look-alikes
+        such as "1NS 62l" or "E 6Z1" (normalised to INS621 / E621).
         """
         found = []
-        for m in re.finditer(r"\b(?:ins\.?\s*|e)(\d{3}[a-z]?)\b", text, re.IGNORECASE):
-            code = m.group(0).upper().replace(" ", "").replace(".", "").replace("-", "")
+        for m in _ADDITIVE_CODE_RE.finditer(text):
+            prefix, code = m.group("prefix"), m.group("code")
+            if not prefix or real_digit_count(code) == 0:
+                continue
+            code = ("E" if prefix[0] in "eE" else "INS") + canonical_code(code)
             if code not in found:
                 found.append(code)
         return found
@@ -12,6 +12,10 @@ Key changes from Phase 1:
     so "Fat" and "12g" are linked by spatial proximity, not text order
   - auto_perspective_correct + bilateral_denoise added to preprocessing chain
   - EasyOCR now returns bboxes + confidence for all downstream use
+  - Preprocessing resizes to OCR size before the expensive filters and
+    reports per-step timings (returned under "timings")
+  - OCR tokens are spell-corrected against the domain lexicon
+    (app.utils.ocr_correction) before region split and parsing
 """
 
 from __future__ import annotations
@@ -25,32 +29,43 @@ from typing import Any, Dict, List, Optional, Tuple
 import cv2
 import numpy as np
 
-from app.utils.preprocessing import apply_clahe, bilateral_denoise, auto_perspective_correct
+from app.utils.preprocessing import preprocess_label_image
 from app.config import OCR_MODELS_DIR
+from app.runtime import configure_torch
+from app.utils.model_lifecycle import lifecycle
+from app.utils.ocr_correction import OCRCorrector
 
 logger = logging.getLogger(__name__)
 
-# ── Lazy EasyOCR reader (module-level singleton) ──────────────────────────────
+# ── Lazy EasyOCR reader (module-level singleton, evictable when idle) ─────────
 _easyocr_reader = None
 
 
+def _unload_reader() -> None:
+    global _easyocr_reader
+    _easyocr_reader = None
+
+
 def _get_reader():
     global _easyocr_reader
     if _easyocr_reader is None:
-        import easyocr
-        import torch
-        gpu = torch.cuda.is_available()
-        model_dir = os.environ.get("EASYOCR_MODULE_PATH") or OCR_MODELS_DIR
-        if model_dir and os.path.isdir(model_dir):
-            _easyocr_reader = easyocr.Reader(
-                ["en", "hi"], gpu=gpu,
-                model_storage_directory=model_dir,
-                download_enabled=False,
-            )
-            logger.info("EasyOCR loaded from %s (gpu=%s)", model_dir, gpu)
-        else:
-            _easyocr_reader = easyocr.Reader(["en", "hi"], gpu=gpu, download_enabled=True)
-            logger.info("EasyOCR loaded (gpu=%s, download=True)", gpu)
+        with lifecycle.loading("easyocr", unload=_unload_reader):
+            import easyocr
+            import torch
+            configure_torch()
+            gpu = torch.cuda.is_available()
+            model_dir = os.environ.get("EASYOCR_MODULE_PATH") or OCR_MODELS_DIR
+            if model_dir and os.path.isdir(model_dir):
+                _easyocr_reader = easyocr.Reader(
+                    ["en", "hi"], gpu=gpu,
+                    model_storage_directory=model_dir,
+                    download_enabled=False,
+                )
+                logger.info("EasyOCR loaded from %s (gpu=%s)", model_dir, gpu)
+            else:
+                _easyocr_reader = easyocr.Reader(["en", "hi"], gpu=gpu, download_enabled=True)
+                logger.info("EasyOCR loaded (gpu=%s, download=True)", gpu)
+    lifecycle.touch("easyocr")
     return _easyocr_reader
 
 
@@ -75,6 +90,16 @@ _NUTRIENT_KEYWORDS = {
 
 _NUMBER_RE = re.compile(r"\d+\.?\d*")
 
+# ── Lazy OCR post-corrector (symmetric-delete index, persisted on disk) ───────
+_ocr_corrector: Optional[OCRCorrector] = None
+
+
+def _get_corrector() -> OCRCorrector:
+    global _ocr_corrector
+    if _ocr_corrector is None:
+        _ocr_corrector = OCRCorrector.load_or_build(extra_terms=_NUTRIENT_KEYWORDS)
+    return _ocr_corrector
+
 
 def _bbox_center(bbox) -> Tuple[float, float]:
     """Return (cx, cy) of an EasyOCR bbox [[x1,y1],[x2,y2],[x3,y3],[x4,y4]]."""
@@ -100,6 +125,7 @@ class AdvancedOCRPipeline:
             "raw_text":           str,          # flat joined OCR output
             "structured_nutrition": dict,       # {energy_kcal, fat_g, sugar_g, ...}
             "ingredients_text":   str,          # ingredient paragraph
+            "timings":            dict,         # per-step ms (preprocess, ocr, parse)
         }
     """
 
@@ -112,6 +138,7 @@ class AdvancedOCRPipeline:
     def process_label(self, image_path: str) -> Dict[str, Any]:
         """Full preprocessing → OCR → region split → structured parse."""
         t0 = time.time()
+        timings: Dict[str, float] = {}
 
         # 1. Load
         img = cv2.imread(image_path)
@@ -119,34 +146,43 @@ class AdvancedOCRPipeline:
             logger.error("process_label: cannot read %s", image_path)
             return {"raw_text": "", "structured_nutrition": {}, "ingredients_text": ""}
 
-        # 2. Preprocessing chain
-        img = auto_perspective_correct(img)
-        img = bilateral_denoise(img)
-        img = apply_clahe(img)
-
-        # 3. Resize — EasyOCR accuracy drops below ~800 px wide
-        h, w = img.shape[:2]
-        if w < 800:
-            scale = 800 / w
-            img = cv2.resize(img, (800, int(h * scale)), interpolation=cv2.INTER_CUBIC)
+        # 2-3. Preprocessing chain — perspective, resize to OCR size, then the
+        #      expensive filters (bilateral, CLAHE) at the final resolution
+        img = preprocess_label_image(img, timings)
 
         # 4. Save preprocessed image to a temp path for EasyOCR
         temp_path = image_path + "_preprocessed.jpg"
         cv2.imwrite(temp_path, img)
 
         try:
+            t_ocr = time.perf_counter()
             reader = _get_reader()
             ocr_results = reader.readtext(temp_path, detail=1)
+            timings["ocr_ms"] = round((time.perf_counter() - t_ocr) * 1000, 1)
         except Exception as exc:
             logger.error("EasyOCR failed: %s", exc)
-            return {"raw_text": "", "structured_nutrition": {}, "ingredients_text": ""}
+            return {"raw_text": "", "structured_nutrition": {}, "ingredients_text": "", "timings": timings}
         finally:
             if os.path.exists(temp_path):
                 os.remove(temp_path)
 
         if not ocr_results:
-            return {"raw_text": "", "structured_nutrition": {}, "ingredients_text": ""}
-
+            return {"raw_text": "", "structured_nutrition": {}, "ingredients_text": "", "timings": timings}
+
+        # 4b. Lexicon post-correction ("Malt0dextrin" → "Maltodextrin") so every
+        #     downstream matcher sees clean tokens
+        t_corr = time.perf_counter()
+        corrector = _get_corrector()
+        n_corrections = 0
+        corrected_results = []
+        for bbox, text, conf in ocr_results:
+            fixed, fixes = corrector.correct_text(text)
+            n_corrections += len(fixes)
+            corrected_results.append((bbox, fixed, conf))
+        ocr_results = corrected_results
+        timings["correct_ms"] = round((time.perf_counter() - t_corr) * 1000, 1)
+
+        t_parse = time.perf_counter()
         # 5. Region split
         nutrition_region, ingredients_region = self.spatial_region_split(ocr_results)
 
@@ -165,10 +201,12 @@ class AdvancedOCRPipeline:
         # Overall OCR confidence: mean of all token confidences
         all_confs = [item[2] for item in ocr_results if len(item) > 2]
         ocr_confidence = round(float(np.mean(all_confs)), 3) if all_confs else 0.0
+        timings["parse_ms"] = round((time.perf_counter() - t_parse) * 1000, 1)
 
         logger.info(
-            "process_label: %.2fs | %d tokens | nutrition keys=%s | ocr_conf=%.2f",
-            time.time() - t0, len(ocr_results), list(structured_nutrition.keys()), ocr_confidence
+            "process_label: %.2fs | %d tokens (%d corrected) | nutrition keys=%s | ocr_conf=%.2f | timings=%s",
+            time.time() - t0, len(ocr_results), n_corrections, list(structured_nutrition.keys()),
+            ocr_confidence, timings
         )
         return {
             "raw_text":            raw_text,
@@ -176,6 +214,7 @@ class AdvancedOCRPipeline:
             "ingredients_text":    ingredients_text,
             "ocr_confidence":      ocr_confidence,       # 0.0–1.0 overall
             "field_confidence":    field_confidence,     # per nutrition key
+            "timings":             timings,              # per-step ms
         }
 
     # ── Region split ──────────────────────────────────────────────────────────
@@ -8,6 +8,8 @@ from __future__ import annotations
 import logging
 from typing import Any, Dict, List, Optional
 
+from app.utils.model_lifecycle import lifecycle
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,6 +39,9 @@ class XAIService:
 
     # ── Real SHAP ─────────────────────────────────────────────────────────────
 
+    def _unload_explainer(self) -> None:
+        self._explainer = None
+
     def _shap_explain(
         self, model, features: Dict[str, Any], feature_names: List[str]
     ) -> Dict[str, float]:
@@ -45,7 +50,9 @@ class XAIService:
             import numpy as np
 
             if self._explainer is None:
-                self._explainer = shap.TreeExplainer(model)
+                with lifecycle.loading("shap_explainer", unload=self._unload_explainer):
+                    self._explainer = shap.TreeExplainer(model)
+            lifecycle.touch("shap_explainer")
 
             vec = np.array([[
                 float(features.get("sugar_g")   or 0.0),
@@ -0,0 +1,131 @@
+"""
+image_quality.py
+────────────────
+Fast pre-OCR quality gate for label photos.
+
+Runs on a downscaled grayscale copy (a few ms) and rejects images that
+EasyOCR cannot read anyway, so /api/scan-label can ask the user to retake
+the photo instead of spending seconds on OCR, lookup and RAG first.
+
+Checks (in order):
+  - exposure:     share of near-black / near-white pixels in the histogram;
+                  only a failure when the image is also unreadable (blurry
+                  or no text), since black-on-white and white-on-black
+                  labels are mostly clipped by design
+  - sharpness:    variance of the Laplacian (low = blurry / out of focus)
+  - text density: share of the frame covered by text-like connected regions
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict
+
+import cv2
+import numpy as np
+
+# Longest side of the analysis copy
+QUALITY_MAX_SIDE = 512
+
+# Thresholds — tuned to reject only clearly unreadable photos
+MIN_LAPLACIAN_VAR = 40.0     # below → blurry
+MAX_DARK_FRACTION = 0.65     # pixels < 30 → underexposed (if also unreadable)
+MAX_BRIGHT_FRACTION = 0.65   # pixels > 245 → overexposed / glare (if also unreadable)
+MIN_TEXT_DENSITY = 0.01      # text-like region area / frame area
+
+_HINTS = {
+    "blurry":      "The photo is blurry. Hold the camera steady and tap to focus on the label.",
+    "too_dark":    "The photo is too dark. Move to a brighter spot or turn on the flash.",
+    "overexposed": "The photo is washed out. Avoid direct light or glare on the packet.",
+    "no_text":     "No label text was found. Fill the frame with the ingredients or nutrition table.",
+}
+
+
+def _text_density(gray: np.ndarray) -> float:
+    """
+    Estimate the fraction of the frame covered by text-like regions.
+
+    Morphological gradient highlights glyph strokes; a horizontal closing
+    merges characters into word/line blobs; blobs that are wider than tall
+    and not absurdly large are counted as text.
+    """
+    h, w = gray.shape[:2]
+    grad = cv2.morphologyEx(
+        gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    )
+    _, bw = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    bw = cv2.morphologyEx(
+        bw, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1))
+    )
+    contours, _ = cv2.findContours(bw, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    text_area = 0
+    for cnt in contours:
+        _x, _y, cw, ch = cv2.boundingRect(cnt)
+        if ch < 4 or ch > 0.2 * h:
+            continue
+        if cw < ch or cw > 0.95 * w:
+            continue
+        text_area += cw * ch
+    return float(text_area) / float(h * w)
+
+
+def assess_image_quality(image: np.ndarray) -> Dict[str, Any]:
+    """
+    Score a BGR (or grayscale) label image before OCR.
+
+    Returns:
+        {
+            "ok":      bool,
+            "reason":  None | "too_dark" | "overexposed" | "blurry" | "no_text",
+            "hint":    user-facing retake message (None when ok),
+            "metrics": {laplacian_var, dark_fraction, bright_fraction,
+                        mean_brightness, text_density, elapsed_ms},
+        }
+    """
+    t0 = time.perf_counter()
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    h, w = gray.shape[:2]
+    scale = min(1.0, float(QUALITY_MAX_SIDE) / max(h, w))
+    if scale < 1.0:
+        gray = cv2.resize(
+            gray, (max(1, int(w * scale)), max(1, int(h * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+    total = float(hist.sum()) or 1.0
+    dark_fraction = float(hist[:30].sum()) / total
+    bright_fraction = float(hist[246:].sum()) / total
+    mean_brightness = float(np.dot(hist, np.arange(256))) / total
+
+    laplacian_var = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    text_density = _text_density(gray)
+
+    # Clipping names the cause of an unreadable photo; sharp text on a
+    # pure white / black background is fine
+    readable = laplacian_var >= MIN_LAPLACIAN_VAR and text_density >= MIN_TEXT_DENSITY
+    reason = None
+    if dark_fraction > MAX_DARK_FRACTION and not readable:
+        reason = "too_dark"
+    elif bright_fraction > MAX_BRIGHT_FRACTION and not readable:
+        reason = "overexposed"
+    elif laplacian_var < MIN_LAPLACIAN_VAR:
+        reason = "blurry"
+    elif text_density < MIN_TEXT_DENSITY:
+        reason = "no_text"
+
+    return {
+        "ok":     reason is None,
+        "reason": reason,
+        "hint":   _HINTS.get(reason) if reason else None,
+        "metrics": {
+            "laplacian_var":   round(laplacian_var, 1),
+            "dark_fraction":   round(dark_fraction, 3),
+            "bright_fraction": round(bright_fraction, 3),
+            "mean_brightness": round(mean_brightness, 1),
+            "text_density":    round(text_density, 4),
+            "elapsed_ms":      round((time.perf_counter() - t0) * 1000, 1),
+        },
+    }
@@ -0,0 +1,67 @@
+"""
+keyword_matcher.py
+──────────────────
+One compiled multi-keyword matcher for many literal keywords.
+
+The keywords are written into a single regex as a prefix-factored
+alternation (a trie as nested groups), wrapped in a lookahead so finditer
+reports a hit at every start position. One pass over the text finds every
+keyword, including keywords nested inside or overlapping others, and the
+cost no longer grows with the number of keywords.
+
+    matcher = KeywordMatcher(["wheat", "wheat flour", "oat"])
+    matcher.find("refined wheat flour, oats")
+    → {"wheat": [(8, 13)], "wheat flour": [(8, 19)], "oat": [(21, 24)]}
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+
+def trie_regex(literals: Iterable[str]) -> str:
+    """
+    Build one regex alternation from a set of literals, factored by common
+    prefix. The greedy optional groups return the longest literal at each
+    start position. Returns a never-matching pattern for an empty set.
+    """
+    trie: dict = {}
+    for literal in literals:
+        node = trie
+        for ch in literal:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie) if trie else "(?!)"
+
+
+class KeywordMatcher:
+    """Case-insensitive single-pass matcher for a fixed set of keywords."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = sorted({k.lower() for k in keywords if k})
+        known = set(self.keywords)
+        # A greedy match only reports the longest keyword at a start position,
+        # so each keyword also carries the keywords that are its prefixes.
+        self._with_prefixes: Dict[str, List[str]] = {
+            kw: [kw[:i] for i in range(1, len(kw)) if kw[:i] in known] + [kw]
+            for kw in self.keywords
+        }
+        self._regex = re.compile(f"(?=({trie_regex(self.keywords)}))", re.IGNORECASE)
+
+    def find(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """Every keyword found in `text` → list of (start, end) spans."""
+        found: Dict[str, List[Tuple[int, int]]] = {}
+        for m in self._regex.finditer(text or ""):
+            start = m.start(1)
+            for kw in self._with_prefixes[m.group(1).lower()]:
+                found.setdefault(kw, []).append((start, start + len(kw)))
+        return found
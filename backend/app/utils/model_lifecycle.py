@@ -0,0 +1,237 @@
+"""
+model_lifecycle.py
+──────────────────
+Idle eviction for heavy lazily-loaded models (EasyOCR reader,
+SentenceTransformer, FAISS index, SHAP explainer).
+
+Each model keeps its own module-level cache and lazy getter; this module
+only tracks them. The getter wraps the actual load in `lifecycle.loading()`
+(records approximate memory as the RSS delta) and calls `lifecycle.touch()`
+on every use. A daemon reaper thread unloads models that have been idle
+longer than MODEL_IDLE_TTL_S, and least-recently-used models first while
+process RSS is above MODEL_RSS_LIMIT_MB. The next getter call reloads them.
+
+Usage in a loader:
+
+    from app.utils.model_lifecycle import lifecycle
+
+    def _get_thing():
+        global _thing
+        if _thing is None:
+            with lifecycle.loading("thing", unload=_unload_thing):
+                _thing = load_thing()
+        lifecycle.touch("thing")
+        return _thing
+"""
+
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from app import config as _config
+except Exception:  # pragma: no cover — used standalone (rag_pipeline tests)
+    _config = None
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None if it cannot be read."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import psutil
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        return None
+
+
+def _release_memory() -> None:
+    """Collect garbage and ask glibc to hand freed arenas back to the OS."""
+    gc.collect()
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except Exception:
+        pass
+
+
+class _ModelEntry:
+    __slots__ = ("name", "unload", "loaded", "loaded_at", "last_used",
+                 "approx_bytes", "loads", "evictions")
+
+    def __init__(self, name: str, unload: Callable[[], None]):
+        self.name = name
+        self.unload = unload
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.last_used = 0.0
+        self.approx_bytes: Optional[int] = None
+        self.loads = 0
+        self.evictions = 0
+
+
+class ModelLifecycleManager:
+    """Tracks last use and approximate memory of heavy models and evicts them."""
+
+    def __init__(
+        self,
+        idle_ttl_s: float = 0,
+        rss_limit_bytes: Optional[int] = None,
+        check_interval_s: float = 60,
+    ):
+        self.idle_ttl_s = idle_ttl_s
+        self.rss_limit_bytes = rss_limit_bytes
+        self.check_interval_s = check_interval_s
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lock = threading.RLock()
+        self._reaper: Optional[threading.Thread] = None
+
+    # ── Registration / usage ─────────────────────────────────────────────────
+
+    def register(self, name: str, unload: Callable[[], None]) -> None:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                self._entries[name] = _ModelEntry(name, unload)
+            else:
+                entry.unload = unload
+
+    @contextmanager
+    def loading(self, name: str, unload: Callable[[], None]) -> Iterator[None]:
+        """Wrap a model load: registers it and records the RSS delta."""
+        self.register(name, unload)
+        rss_before = current_rss_bytes()
+        t0 = time.time()
+        yield
+        rss_after = current_rss_bytes()
+        with self._lock:
+            entry = self._entries[name]
+            entry.loaded = True
+            entry.loaded_at = entry.last_used = time.time()
+            entry.loads += 1
+            if rss_before is not None and rss_after is not None:
+                entry.approx_bytes = max(0, rss_after - rss_before)
+        logger.info(
+            "ModelLifecycle: loaded %s in %.2fs (~%s MB)",
+            name, time.time() - t0, _mb(self._entries[name].approx_bytes),
+        )
+
+    def touch(self, name: str) -> None:
+        entry = self._entries.get(name)
+        if entry is not None:
+            entry.last_used = time.time()
+
+    # ── Eviction ─────────────────────────────────────────────────────────────
+
+    def evict(self, name: str, reason: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or not entry.loaded:
+                return False
+            try:
+                entry.unload()
+            except Exception as exc:
+                logger.warning("ModelLifecycle: unloading %s failed: %s", name, exc)
+                return False
+            entry.loaded = False
+            entry.evictions += 1
+            idle_s = time.time() - entry.last_used
+        _release_memory()
+        logger.info(
+            "ModelLifecycle: evicted %s (%s, idle %.0fs, ~%s MB, rss now %s MB)",
+            name, reason, idle_s, _mb(entry.approx_bytes), _mb(current_rss_bytes()),
+        )
+        return True
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """Unload every model idle for longer than idle_ttl_s."""
+        if not self.idle_ttl_s:
+            return []
+        now = now if now is not None else time.time()
+        with self._lock:
+            idle = [e.name for e in self._entries.values()
+                    if e.loaded and now - e.last_used > self.idle_ttl_s]
+        return [name for name in idle if self.evict(name, "idle_ttl")]
+
+    def enforce_rss_limit(self) -> List[str]:
+        """Unload least-recently-used models while RSS is above the limit."""
+        if not self.rss_limit_bytes:
+            return []
+        evicted: List[str] = []
+        while True:
+            rss = current_rss_bytes()
+            if rss is None or rss <= self.rss_limit_bytes:
+                break
+            with self._lock:
+                loaded = sorted(
+                    (e for e in self._entries.values() if e.loaded),
+                    key=lambda e: e.last_used,
+                )
+            if not loaded or not self.evict(loaded[0].name, "rss_limit"):
+                break
+            evicted.append(loaded[0].name)
+        return evicted
+
+    def maybe_evict(self) -> List[str]:
+        return self.evict_idle() + self.enforce_rss_limit()
+
+    def start_reaper(self) -> None:
+        """Start the background eviction thread (once per process)."""
+        if self._reaper is not None or not (self.idle_ttl_s or self.rss_limit_bytes):
+            return
+
+        def _run() -> None:
+            while True:
+                time.sleep(self.check_interval_s)
+                try:
+                    self.maybe_evict()
+                except Exception as exc:
+                    logger.warning("ModelLifecycle: reaper error: %s", exc)
+
+        self._reaper = threading.Thread(target=_run, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    # ── Diagnostics ──────────────────────────────────────────────────────────
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            models = {
+                e.name: {
+                    "loaded":     e.loaded,
+                    "idle_s":     round(now - e.last_used, 1) if e.loaded else None,
+                    "approx_mb":  _mb(e.approx_bytes),
+                    "loads":      e.loads,
+                    "evictions":  e.evictions,
+                }
+                for e in self._entries.values()
+            }
+        return {
+            "idle_ttl_s":   self.idle_ttl_s,
+            "rss_limit_mb": _mb(self.rss_limit_bytes),
+            "rss_mb":       _mb(current_rss_bytes()),
+            "models":       models,
+        }
+
+
+def _mb(n: Optional[int]) -> Optional[float]:
+    return round(n / (1024 * 1024), 1) if n else None
+
+
+# ── Process-wide singleton ────────────────────────────────────────────────────
+lifecycle = ModelLifecycleManager(
+    idle_ttl_s=float(getattr(_config, "MODEL_IDLE_TTL_S", 0) or 0),
+    rss_limit_bytes=int(getattr(_config, "MODEL_RSS_LIMIT_MB", 0) or 0) * 1024 * 1024 or None,
+    check_interval_s=float(getattr(_config, "MODEL_REAPER_INTERVAL_S", 60) or 60),
+)
@@ -0,0 +1,116 @@
+"""
+ocr_confusions.py
+─────────────────
+OCR look-alike tables and precomputed variants for additive codes and names.
+
+EasyOCR regularly reads INS codes as "1NS 62l", "E 6Z1" or "lNS-319". Rather
+than fuzzy-matching every token at request time, the additive matchers
+expand each known code and name once, at build time, into its likely OCR
+variants and put them in an exact-match table:
+
+    code_variants("621")         → {"621", "62I", "62L", "6Z1", "G21", ...}
+    name_variants("TARTRAZINE")  → {"TARTRA2INE", "TARTRAZ1NE", "TARTRAZLNE", ...}
+
+CODE_PATTERN is the shared regex for an INS / E-number reference whose
+prefix and digits may contain look-alikes; the captured code is then looked
+up exactly (AdditivesExpert, rag_analyzer) or mapped back with
+canonical_code() (NERService, which has no additive table).
+"""
+
+from __future__ import annotations
+
+from itertools import product
+from typing import Dict, Set
+
+# Characters OCR returns in place of each digit (upper-case; matching is
+# case-insensitive, so "l" is covered by "L")
+DIGIT_CONFUSIONS: Dict[str, str] = {
+    "0": "OQD",
+    "1": "IL|",
+    "2": "Z",
+    "5": "S",
+    "6": "G",
+    "8": "B",
+}
+
+# Look-alikes for letters inside additive names
+LETTER_CONFUSIONS: Dict[str, str] = {
+    "O": "0",
+    "I": "1L|",
+    "L": "1I",
+    "S": "5",
+    "Z": "2",
+    "B": "8",
+    "G": "6",
+}
+
+_CONFUSABLE_DIGIT_CLASS = "0-9" + "".join(sorted({c for v in DIGIT_CONFUSIONS.values() for c in v}))
+
+# INS / E-number reference with OCR look-alikes in the prefix and digits:
+# "INS 621", "1NS-62l", "lNS319", "E 6Z1", or a bare "621". Use with
+# re.IGNORECASE; groups: prefix (may be None) and code.
+CODE_PATTERN = (
+    r"(?<![A-Z0-9|])"
+    r"(?P<prefix>[I1L|]N[S5]\.?[\s\-]*|E[\s\-]*)?"
+    rf"(?P<code>[{_CONFUSABLE_DIGIT_CLASS}]{{3,4}}[A-Z]?)"
+    r"(?![A-Z0-9|])"
+)
+
+_TO_DIGIT = str.maketrans(
+    {ch: digit for digit, chars in DIGIT_CONFUSIONS.items() for ch in chars}
+)
+_TO_DIGIT_KEYS = frozenset("".join(DIGIT_CONFUSIONS.values()))
+
+# Names shorter than this are not expanded ("MSG", "BHA" would collide with
+# ordinary abbreviations once letters are swapped)
+MIN_NAME_VARIANT_LENGTH = 5
+
+
+def real_digit_count(code: str) -> int:
+    return sum(ch.isdigit() for ch in code)
+
+
+def code_variants(code: str) -> Set[str]:
+    """
+    All OCR variants of an additive number ("621", "150A"), upper-case.
+
+    Every digit may be replaced by its look-alikes; a letter suffix is kept.
+    Variants with no real digit left ("ISO" for 150) are dropped — they are
+    indistinguishable from ordinary words.
+    """
+    code = code.upper()
+    head = code.rstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+    suffix = code[len(head):]
+    choices = [ch + DIGIT_CONFUSIONS.get(ch, "") for ch in head]
+    return {
+        "".join(combo) + suffix
+        for combo in product(*choices)
+        if real_digit_count("".join(combo)) >= 1
+    }
+
+
+def name_variants(name: str) -> Set[str]:
+    """
+    Single-substitution OCR variants of an additive name, upper-case.
+
+    Only one look-alike per variant, which covers the usual OCR slip while
+    keeping the table small (a handful of variants per name).
+    """
+    name = name.upper()
+    if len(name) < MIN_NAME_VARIANT_LENGTH:
+        return set()
+    variants: Set[str] = set()
+    for i, ch in enumerate(name):
+        for alt in LETTER_CONFUSIONS.get(ch, ""):
+            variants.add(name[:i] + alt + name[i + 1:])
+    return variants
+
+
+def canonical_code(code: str) -> str:
+    """Map look-alike characters in a captured code back to digits ("6Z1" → "621")."""
+    code = code.upper()
+    # The trailing letter of "150a" is part of the code, not a misread digit
+    if len(code) == 4 and code[-1].isalpha() and code[-1] not in _TO_DIGIT_KEYS:
+        return code[:3].translate(_TO_DIGIT) + code[3]
+    return code.translate(_TO_DIGIT)
+
@@ -0,0 +1,295 @@
+"""
+ocr_correction.py
+─────────────────
+SymSpell-style OCR post-correction against the domain lexicon.
+
+EasyOCR regularly returns tokens such as "Malt0dextrin", "Pa1m" or
+"Tartrazlne". Left alone, every downstream matcher (AdditivesExpert regexes,
+the RAG rapidfuzz fallback, nutrient keyword detection) either misses them
+or pays for an approximate match per token. This module fixes them once,
+right after OCR, using a symmetric-delete index:
+
+  - every lexicon word is stored with all its deletions up to distance 2
+  - a query token generates its own deletions and looks them up in a dict,
+    so a lookup costs O(len(token)^2) dict probes, independent of lexicon size
+
+Lexicon sources:
+  - app/data/additives_db.json                      (names)
+  - rag_pipeline/knowledge_base/fssai_additives.json (names + aliases)
+  - rag_pipeline/knowledge_base/harmful_flags.json   (allergens, UPF markers)
+  - nutrient keywords passed in by the caller (ocr_pipeline._NUTRIENT_KEYWORDS)
+  - a short built-in list of common label words
+
+The index is persisted to app/data/ocr_lexicon.pkl and rebuilt only when the
+source files or extra terms change (content hash stored in the pickle).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_BACKEND = Path(__file__).resolve().parents[2]
+_SOURCES = (
+    _BACKEND / "app" / "data" / "additives_db.json",
+    _BACKEND / "rag_pipeline" / "knowledge_base" / "fssai_additives.json",
+    _BACKEND / "rag_pipeline" / "knowledge_base" / "harmful_flags.json",
+)
+_INDEX_PATH = _BACKEND / "app" / "data" / "ocr_lexicon.pkl"
+_INDEX_VERSION = 1
+
+MAX_EDIT_DISTANCE = 2
+
+# Everyday label words that must never be "corrected" into an additive name
+_COMMON_LABEL_WORDS = (
+    "ingredients", "ingredient", "contains", "water", "sugar", "salt", "wheat",
+    "flour", "refined", "whole", "rice", "corn", "starch", "edible", "vegetable",
+    "oil", "oils", "milk", "solids", "powder", "cocoa", "butter", "cream",
+    "cheese", "spices", "condiments", "onion", "garlic", "chilli", "turmeric",
+    "cumin", "pepper", "ginger", "tomato", "potato", "dehydrated", "flavour",
+    "flavor", "flavours", "natural", "nature", "identical", "artificial",
+    "flavouring", "substances", "added", "colour", "color", "colours",
+    "preservative", "preservatives", "antioxidant", "antioxidants", "emulsifier",
+    "emulsifiers", "stabiliser", "stabilizer", "thickener", "raising", "agent",
+    "agents", "acidity", "regulator", "enhancer", "sweetener", "mineral",
+    "vitamin", "vitamins", "iodised", "iodized", "invert", "syrup", "glucose",
+    "dextrose", "fructose", "liquid", "yeast", "malt", "extract", "nutrition",
+    "information", "serving", "total", "dietary", "energy", "protein",
+    "carbohydrate", "carbohydrates", "fat", "fats", "saturated", "trans",
+    "sodium", "cholesterol", "calcium", "iron", "per", "approx", "values",
+)
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+")
+# Tokens that are numbers, quantities or additive codes — never corrected
+_KEEP_RE = re.compile(
+    r"^(?:\d+(?:[a-z%]{0,4})?|(?:ins|e)\d{2,4}[a-z]?|\d+[a-z]\d*)$",
+    re.IGNORECASE,
+)
+# Digit → letter confusions inside alphabetic words ("Pa1m", "Malt0dextrin")
+_DIGIT_TO_LETTER = str.maketrans({"0": "o", "1": "l", "3": "e", "4": "a",
+                                  "5": "s", "6": "g", "7": "t", "8": "b", "2": "z"})
+# Only digits with a letter on both sides are mapped: a digit run at either
+# end (optionally with a unit) is a value glued to its label ("Protein8g",
+# "Sugar5") and the token is left for the nutrition parser
+_EDGE_NUMBER_RE = re.compile(r"^\d|\d(?:g|mg|mcg|kg|kcal|cal|kj|ml)?$", re.IGNORECASE)
+# Letter shapes OCR confuses with each other ("Tartrazlne", "Sodlum", "Pa1rn").
+# A letters-only token is only corrected when it and the correction fold to
+# the same shape, so real words one edit from a lexicon word ("raisins" →
+# "raising") are left alone.
+_LETTER_SHAPES = (("rn", "m"), ("vv", "w"), ("cl", "d"))
+_LETTER_FOLD = str.maketrans({"l": "i", "j": "i", "v": "u", "c": "e"})
+
+
+def _ocr_shape(word: str) -> str:
+    for pair, letter in _LETTER_SHAPES:
+        word = word.replace(pair, letter)
+    return word.translate(_LETTER_FOLD)
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings reachable from `word` by up to max_distance deletions."""
+    out: Set[str] = set()
+    frontier = {word}
+    for _ in range(max_distance):
+        nxt: Set[str] = set()
+        for w in frontier:
+            if len(w) <= 1:
+                continue
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i + 1:])
+        out |= nxt
+        frontier = nxt
+    return out
+
+
+def _damerau_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Optimal-string-alignment distance, early-exit above max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = cur[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _is_inflection(word: str, words: Dict[str, int]) -> bool:
+    for suffix in ("s", "es", "d", "ed", "ing"):
+        if word.endswith(suffix) and word[: -len(suffix)] in words:
+            return True
+    return False
+
+
+def _lexicon_words(texts: Iterable[str]) -> Dict[str, int]:
+    """Split lexicon phrases into lowercase alphabetic words with counts."""
+    freq: Dict[str, int] = {}
+    for text in texts:
+        for word in re.findall(r"[a-z]+", (text or "").lower()):
+            if len(word) >= 3:
+                freq[word] = freq.get(word, 0) + 1
+    return freq
+
+
+def _source_phrases() -> List[str]:
+    phrases: List[str] = list(_COMMON_LABEL_WORDS)
+    for path in _SOURCES:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as exc:
+            logger.warning("OCR lexicon: cannot read %s: %s", path, exc)
+            continue
+        if isinstance(data, list):  # additive entries
+            for entry in data:
+                phrases.append(entry.get("name", ""))
+                phrases.extend(entry.get("aliases", []))
+        else:  # harmful_flags.json
+            phrases.extend(data.get("allergens", {}).get("list", []))
+            phrases.extend(data.get("ultra_processed_markers", []))
+    return phrases
+
+
+def _source_hash(extra_terms: Iterable[str]) -> str:
+    h = hashlib.sha1(f"v{_INDEX_VERSION}:d{MAX_EDIT_DISTANCE}".encode())
+    for path in _SOURCES:
+        try:
+            h.update(path.read_bytes())
+        except OSError:
+            h.update(b"missing")
+    for term in sorted(extra_terms):
+        h.update(term.encode("utf-8"))
+    return h.hexdigest()
+
+
+class OCRCorrector:
+    """Symmetric-delete spelling corrector over the food-label lexicon."""
+
+    def __init__(self, words: Dict[str, int], deletes: Dict[str, List[str]]):
+        self.words = words
+        self.deletes = deletes
+
+    # ── Build / persist ──────────────────────────────────────────────────────
+
+    @classmethod
+    def build(cls, words: Dict[str, int]) -> "OCRCorrector":
+        deletes: Dict[str, List[str]] = {}
+        for word in words:
+            for d in _deletes(word, MAX_EDIT_DISTANCE):
+                deletes.setdefault(d, []).append(word)
+        return cls(words, deletes)
+
+    @classmethod
+    def load_or_build(
+        cls,
+        extra_terms: Iterable[str] = (),
+        index_path: Path = _INDEX_PATH,
+    ) -> "OCRCorrector":
+        extra = [t for t in extra_terms if t.isascii()]
+        digest = _source_hash(extra)
+        try:
+            with open(index_path, "rb") as f:
+                payload = pickle.load(f)
+            if payload.get("source_hash") == digest:
+                return cls(payload["words"], payload["deletes"])
+        except FileNotFoundError:
+            pass
+        except Exception as exc:
+            logger.warning("OCR lexicon: cached index unreadable (%s) — rebuilding", exc)
+
+        corrector = cls.build(_lexicon_words(_source_phrases() + extra))
+        try:
+            tmp = f"{index_path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump({"source_hash": digest, "words": corrector.words,
+                             "deletes": corrector.deletes}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, index_path)
+        except OSError as exc:
+            logger.warning("OCR lexicon: could not persist index: %s", exc)
+        logger.info("OCR lexicon: built index (%d words, %d deletes)",
+                    len(corrector.words), len(corrector.deletes))
+        return corrector
+
+    # ── Lookup ───────────────────────────────────────────────────────────────
+
+    def lookup(self, word: str, max_distance: int) -> Optional[str]:
+        """Closest lexicon word within max_distance (ties → most frequent)."""
+        if word in self.words:
+            return word
+        best: Optional[str] = None
+        best_key: Tuple[int, int] = (max_distance + 1, 0)
+        for probe in {word} | _deletes(word, max_distance):
+            for candidate in self.deletes.get(probe, []) + ([probe] if probe in self.words else []):
+                dist = _damerau_levenshtein(word, candidate, max_distance)
+                key = (dist, -self.words[candidate])
+                if dist <= max_distance and key < best_key:
+                    best, best_key = candidate, key
+        return best
+
+    def correct_token(self, token: str) -> str:
+        """Return the corrected token (original case style kept) or the token itself."""
+        if len(token) < 4 or _KEEP_RE.match(token):
+            return token
+        lower = token.lower()
+        has_digit = any(c.isdigit() for c in lower)
+        if not has_digit and lower in self.words:
+            return token
+
+        if has_digit:
+            if _EDGE_NUMBER_RE.search(lower):
+                return token
+            # Digit/letter confusions are the common OCR failure — allow one
+            # more edit on top of the mapped form.
+            lower = lower.translate(_DIGIT_TO_LETTER)
+            max_distance = 1 if len(lower) < 8 else 2
+        else:
+            # Plain alphabetic words: only fix long, clearly-misread tokens,
+            # and leave inflections of known words ("sugars", "flavoured") alone
+            if len(lower) < 6 or _is_inflection(lower, self.words):
+                return token
+            max_distance = 1 if len(lower) < 12 else 2
+
+        fixed = self.lookup(lower, max_distance)
+        if fixed is None or fixed == token.lower():
+            return token
+        if not has_digit and _ocr_shape(fixed) != _ocr_shape(lower):
+            return token
+        if token.isupper():
+            return fixed.upper()
+        if token[:1].isupper():
+            return fixed.capitalize()
+        return fixed
+
+    def correct_text(self, text: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """
+        Correct every ASCII word token in `text`.
+
+        Returns (corrected_text, [(original, corrected), ...]).
+        """
+        corrections: List[Tuple[str, str]] = []
+
+        def _sub(m: "re.Match[str]") -> str:
+            original = m.group(0)
+            fixed = self.correct_token(original)
+            if fixed != original:
+                corrections.append((original, fixed))
+            return fixed
+
+        return _TOKEN_RE.sub(_sub, text or ""), corrections
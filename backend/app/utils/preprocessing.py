@@ -8,13 +8,33 @@ Phase 2 additions:
   - bilateral_denoise: edge-preserving denoising (better than Gaussian for text)
   - apply_clahe: unchanged, kept for contrast enhancement
   - correct_perspective: manual 4-point warp (kept for external callers)
+
+Phase 3 additions:
+  - auto_perspective_correct searches for the quad on a downscaled copy and
+    warps the full-resolution image once with the rescaled corners
+  - resize_for_ocr: brings the image to the OCR target width range
+  - preprocess_label_image: full chain (warp → resize → denoise → CLAHE)
+    with per-step timings, so the expensive filters run at OCR size only
 """
 
 from __future__ import annotations
 
+import time
+from typing import Dict, Optional
+
 import cv2
 import numpy as np
 
+# Longest side of the copy used for contour search. Corner positions only
+# need to be accurate to a few pixels, so there is no point in running
+# Canny/findContours over a 12 MP phone photo.
+GEOMETRY_MAX_SIDE = 640
+
+# OCR target width range. EasyOCR accuracy drops below ~800 px wide; above
+# ~2000 px it only costs time (the detector rescales internally anyway).
+OCR_MIN_WIDTH = 800
+OCR_MAX_WIDTH = 2000
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # CLAHE — contrast enhancement (original, unchanged)
@@ -61,7 +81,7 @@ def bilateral_denoise(image: np.ndarray) -> np.ndarray:
 # Automatic perspective correction (Phase 2 — 2a)
 # ─────────────────────────────────────────────────────────────────────────────
 
-def auto_perspective_correct(image: np.ndarray) -> np.ndarray:
+def auto_perspective_correct(image: np.ndarray, max_side: int = GEOMETRY_MAX_SIDE) -> np.ndarray:
     """
     Automatically detect the largest rectangular region in the image
     (assumed to be the food label) and warp it to a flat rectangle.
@@ -71,14 +91,27 @@ def auto_perspective_correct(image: np.ndarray) -> np.ndarray:
       - Curved packaging (slight warp on cylindrical products)
       - Tilted shots
 
+    The contour search runs on a copy whose longest side is at most
+    `max_side` px; the detected corners are scaled back to full resolution
+    for a single warp of the original image.
+
     Returns the warped image if a good quadrilateral is found,
     otherwise returns the original image unchanged.
     """
-    orig = image.copy()
     h, w = image.shape[:2]
 
+    # Downscale for geometry analysis only
+    scale = min(1.0, float(max_side) / max(h, w))
+    small = image
+    if scale < 1.0:
+        small = cv2.resize(
+            image, (max(1, int(w * scale)), max(1, int(h * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+    sh, sw = small.shape[:2]
+
     # Work on a grayscale copy for edge detection
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image.copy()
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if len(small.shape) == 3 else small
 
     # Denoise before edge detection to reduce false contours
     blurred = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -101,16 +134,17 @@ def auto_perspective_correct(image: np.ndarray) -> np.ndarray:
         if len(approx) == 4:
             area = cv2.contourArea(approx)
             # Must cover at least 15% of the image to be the label
-            if area > 0.15 * h * w:
+            if area > 0.15 * sh * sw:
                 quad = approx.reshape(4, 2).astype("float32")
                 break
 
     if quad is None:
         # No good quadrilateral found — return original
-        return orig
+        return image
 
-    # Order points: top-left, top-right, bottom-right, bottom-left
-    quad = _order_points(quad)
+    # Scale corners back to full resolution, then
+    # order points: top-left, top-right, bottom-right, bottom-left
+    quad = _order_points(quad / scale)
     warped = correct_perspective(image, quad)
     return warped
 
@@ -130,6 +164,71 @@ def _order_points(pts: np.ndarray) -> np.ndarray:
     return rect
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# OCR target sizing (Phase 3)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def resize_for_ocr(
+    image: np.ndarray,
+    min_width: int = OCR_MIN_WIDTH,
+    max_width: int = OCR_MAX_WIDTH,
+) -> np.ndarray:
+    """
+    Resize so the image width falls inside [min_width, max_width].
+
+    Small crops are upscaled (cubic) because EasyOCR misses tiny glyphs;
+    large photos are downscaled (area) so bilateral/CLAHE are not paid
+    for pixels the OCR detector would throw away.
+    """
+    h, w = image.shape[:2]
+    if w < min_width:
+        scale = min_width / w
+        return cv2.resize(image, (min_width, int(h * scale)), interpolation=cv2.INTER_CUBIC)
+    if w > max_width:
+        scale = max_width / w
+        return cv2.resize(image, (max_width, int(h * scale)), interpolation=cv2.INTER_AREA)
+    return image
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Full preprocessing chain with per-step timings (Phase 3)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def preprocess_label_image(
+    image: np.ndarray,
+    timings: Optional[Dict[str, float]] = None,
+) -> np.ndarray:
+    """
+    Run the label preprocessing chain in cost order:
+
+        perspective (downscaled search, one warp) → resize to OCR size
+        → bilateral denoise → CLAHE
+
+    If `timings` is given, the duration of each step in milliseconds is
+    written into it under: perspective_ms, resize_ms, denoise_ms, clahe_ms.
+    """
+    if timings is None:
+        timings = {}
+
+    t = time.perf_counter()
+    image = auto_perspective_correct(image)
+    timings["perspective_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    t = time.perf_counter()
+    image = resize_for_ocr(image)
+    timings["resize_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    t = time.perf_counter()
+    image = bilateral_denoise(image)
+    timings["denoise_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    t = time.perf_counter()
+    image = apply_clahe(image)
+    timings["clahe_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    return image
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Manual 4-point perspective warp (original, kept for external callers)
 # ─────────────────────────────────────────────────────────────────────────────
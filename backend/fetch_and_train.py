@@ -46,6 +46,9 @@ from app.services.nutrition_db import _normalise_off_product, _fetch_from_off
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "food_scanner.db")
 
+# Process-pool size for AdditivesExpert.analyze_many (0 = in-process)
+_ADDITIVE_WORKERS = int(os.getenv("ADDITIVE_WORKERS", "0"))
+
 # ── OFF India search config ───────────────────────────────────────────────────
 _OFF_SEARCH = "https://world.openfoodfacts.org/api/v2/search"
 _OFF_INDIA  = "https://in.openfoodfacts.org/api/v2/search"
@@ -211,16 +214,24 @@ def enrich_products(products: List[Dict]) -> List[Dict]:
     off_grade_used = 0
     our_grade_used = 0
 
-    for p in products:
-        n100     = p.get("nutrition_per_100g", {})
-        ing_text = ", ".join(p.get("ingredients", []))
-
-        # Additive analysis
-        detected, additive_impact = expert.analyze_text(ing_text)
-        risk_summary = expert.get_risk_summary(detected)
-        add_feats = getattr(expert, "last_additive_features", {
-            "additive_count": len(detected), "has_critical_additive": 0
-        })
+    # Additive analysis for the whole catalog in one batch
+    batch = expert.analyze_many(
+        (", ".join(p.get("ingredients", [])) for p in products),
+        workers=_ADDITIVE_WORKERS,
+    )
+    print(f"   Additives: {batch.aggregate['with_additives']} products with additives, "
+          f"{batch.aggregate['with_critical']} critical, "
+          f"{batch.aggregate['unique_texts']} unique ingredient lists")
+
+    for p, analysis in zip(products, batch.results):
+        n100            = p.get("nutrition_per_100g", {})
+        detected        = list(analysis.detected)
+        additive_impact = analysis.impact
+        risk_summary    = analysis.risk_summary
+        add_feats       = {
+            "additive_count":        analysis.additive_count,
+            "has_critical_additive": analysis.has_critical_additive,
+        }
 
         # ── Determine grade ───────────────────────────────────────────────
         off_grade = p.get("off_nutriscore_grade")
@@ -13,8 +13,11 @@ Usage from routes.py (or anywhere in the backend):
     )
     # result is a dict ready for JSON serialisation
 
-The function is always safe to call — it catches its own exceptions and
-returns a minimal error dict rather than crashing the parent endpoint.
+    results = analyze_label_texts([{"ingredients_text": t} for t in texts])
+    # one result dict per item, in order — batched matching and retrieval
+
+Both functions are always safe to call — they catch their own exceptions
+and return minimal error dicts rather than crashing the parent endpoint.
 """
 
 from __future__ import annotations
@@ -25,7 +28,7 @@ from typing import Any, Dict, List, Optional
 logger = logging.getLogger(__name__)
 
 __version__ = "1.0.0"
-__all__ = ["analyze_label_text"]
+__all__ = ["analyze_label_text", "analyze_label_texts"]
 
 
 def analyze_label_text(
@@ -34,6 +37,7 @@ def analyze_label_text(
     *,
     pre_parsed_nutrition: Optional[Dict[str, Any]] = None,
     pre_parsed_ingredients: Optional[List[str]] = None,
+    parsed_ingredients: Optional[Any] = None,
 ) -> Dict[str, Any]:
     """
     Analyse a food label and return structured RAG analysis.
@@ -46,6 +50,8 @@ def analyze_label_text(
         ingredients_text: Raw OCR text of the ingredients list.
         pre_parsed_nutrition: Pre-parsed nutrition dict (skips OCR parser).
         pre_parsed_ingredients: Pre-parsed ingredient list (skips OCR parser).
+        parsed_ingredients: ParsedIngredients built once by the caller
+            (rag_pipeline.utils.ocr_parser.parse_ingredients) and reused here.
 
     Returns:
         Dict with keys:
@@ -53,7 +59,7 @@ def analyze_label_text(
             compliance_message, warnings, warning_details, score,
             score_grade, ingredients_detected, ultra_processed_markers_found,
             allergens_detected, healthy_alternative, pipeline_version,
-            retrieval_backend, analysis_time_s
+            retrieval_backend, retrieval_diagnostics, analysis_time_s
     """
     try:
         from rag_pipeline.rag_analyzer import analyze_label_text as _analyze
@@ -62,24 +68,77 @@ def analyze_label_text(
             ingredients_text=ingredients_text,
             pre_parsed_nutrition=pre_parsed_nutrition,
             pre_parsed_ingredients=pre_parsed_ingredients,
+            parsed_ingredients=parsed_ingredients,
         )
     except Exception as exc:
         logger.error("RAG pipeline error: %s", exc, exc_info=True)
-        return {
-            "error": str(exc),
-            "nutrition_summary": {},
-            "additive_flags": [],
-            "fssai_compliance": True,
-            "compliance_message": "RAG pipeline encountered an error.",
-            "warnings": [],
-            "warning_details": [],
-            "score": 5.0,
-            "score_grade": "YELLOW",
-            "ingredients_detected": [],
-            "ultra_processed_markers_found": [],
-            "allergens_detected": [],
-            "healthy_alternative": None,
-            "pipeline_version": __version__,
-            "retrieval_backend": "none",
-            "analysis_time_s": 0.0,
-        }
+        return _error_result(exc)
+
+
+def analyze_label_texts(
+    items: List[Dict[str, Any]],
+    *,
+    workers: int = 0,
+    chunk_size: int = 500,
+) -> List[Dict[str, Any]]:
+    """
+    Analyse many food labels in one call (history re-analysis, catalogs).
+
+    Args:
+        items: One dict per label with analyze_label_text() keyword
+            arguments (nutrition_text, ingredients_text, pre_parsed_*, ...).
+        workers: > 1 runs chunks of chunk_size items in a process pool.
+        chunk_size: Items per worker chunk.
+
+    Returns:
+        One analyze_label_text()-shaped dict per item, in input order.
+        Items are validated up front: one that is not a dict or has a key
+        analyze_label_text() does not take gets its own error dict and the
+        rest are analysed as usual. If the batch fails, the valid items are
+        retried one by one, so a bad label only yields its own error dict.
+    """
+    items = list(items)
+    try:
+        from rag_pipeline.rag_analyzer import analyze_label_texts as _analyze_many, batch_item_error
+    except Exception as exc:
+        logger.error("RAG pipeline error: %s", exc, exc_info=True)
+        return [_error_result(exc) for _ in items]
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    valid: List[int] = []
+    for i, item in enumerate(items):
+        problem = batch_item_error(item)
+        if problem:
+            results[i] = _error_result(TypeError(problem))
+        else:
+            valid.append(i)
+    try:
+        analysed = _analyze_many([items[i] for i in valid], workers=workers, chunk_size=chunk_size)
+    except Exception as exc:
+        logger.error("RAG batch pipeline error: %s — analysing items one by one", exc, exc_info=True)
+        analysed = [analyze_label_text(**items[i]) for i in valid]
+    for i, result in zip(valid, analysed):
+        results[i] = result
+    return results  # type: ignore[return-value]
+
+
+def _error_result(exc: Exception) -> Dict[str, Any]:
+    return {
+        "error": str(exc),
+        "nutrition_summary": {},
+        "additive_flags": [],
+        "fssai_compliance": True,
+        "compliance_message": "RAG pipeline encountered an error.",
+        "warnings": [],
+        "warning_details": [],
+        "score": 5.0,
+        "score_grade": "YELLOW",
+        "ingredients_detected": [],
+        "ultra_processed_markers_found": [],
+        "allergens_detected": [],
+        "healthy_alternative": None,
+        "pipeline_version": __version__,
+        "retrieval_backend": "none",
+        "retrieval_diagnostics": {},
+        "analysis_time_s": 0.0,
+    }
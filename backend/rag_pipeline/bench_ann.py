@@ -0,0 +1,127 @@
+"""
+bench_ann.py
+─────────────
+Recall@k and latency of the approximate vector-store indexes against the
+exact flat index (utils/ann_index.py):
+
+  flat   exact inner product — the ground truth
+  ivf    nprobe sweep (faiss IndexIVFFlat, or the NumPy IvfFlatIP)
+  hnsw   efSearch sweep (faiss only; skipped without it)
+
+Vectors come from the built vector store (vector_store/embeddings.npy) or,
+with --synthetic N, from N clustered random unit vectors — the FSSAI store
+alone is too small for approximate search to matter. Queries are stored
+vectors plus Gaussian noise, so each has a near-duplicate but not an exact
+match. Latency is per single-query search call (p50 / p95).
+
+Run from the backend directory:
+    python rag_pipeline/bench_ann.py                     # built vector store
+    python rag_pipeline/bench_ann.py --synthetic 50000   # taxonomy-sized
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rag_pipeline.utils import ann_index  # noqa: E402
+
+NPROBE_SWEEP = (1, 2, 4, 8, 16, 32, 64)
+EF_SEARCH_SWEEP = (16, 32, 64, 128, 256)
+
+
+def _normalise(x: np.ndarray) -> np.ndarray:
+    return (x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)).astype(np.float32)
+
+
+def synthetic_vectors(n: int, dim: int = 384, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    """Unit vectors around `clusters` random centres (embeddings are clustered, not uniform)."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    points = centres[rng.integers(0, clusters, n)] + 0.8 * rng.standard_normal((n, dim)).astype(np.float32)
+    return _normalise(points)
+
+
+def noisy_queries(embeddings: np.ndarray, n: int, noise: float = 0.05, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    rows = np.asarray(embeddings[rng.choice(len(embeddings), n, replace=False)], dtype=np.float32)
+    return _normalise(rows + noise * rng.standard_normal(rows.shape).astype(np.float32))
+
+
+def measure(index, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    latencies, found = [], []
+    for q in queries:
+        t = time.perf_counter()
+        _, ids = index.search(q[None, :], k)
+        latencies.append((time.perf_counter() - t) * 1000)
+        found.append(ids[0])
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return {
+        "recall": float(recall),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def _row(label: str, r: dict) -> None:
+    print(f"  {label:<28}{r['recall']:>10.3f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--synthetic", type=int, metavar="N", help="benchmark N synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, help="IVF cells (default 4·√n)")
+    parser.add_argument("--hnsw-m", type=int, default=ann_index.DEFAULT_HNSW_M)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        embeddings, source = synthetic_vectors(args.synthetic), f"synthetic ({args.synthetic})"
+    else:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vector_store", "embeddings.npy")
+        if not os.path.exists(path):
+            sys.exit(f"{path} not found — build the vector store or pass --synthetic N")
+        embeddings, source = np.load(path, mmap_mode="r"), path
+    n, dim = embeddings.shape
+    k = min(args.k, n)
+    queries = noisy_queries(embeddings, min(args.queries, n))
+
+    flat, _ = ann_index.build_index(np.ascontiguousarray(embeddings, dtype=np.float32), "flat")
+    _, truth = flat.search(queries, k)
+
+    print("\n" + "=" * 66)
+    print(f"  ANN benchmark — {source}: {n} × {dim}, {len(queries)} queries, recall@{k}")
+    print("=" * 66)
+    print(f"  {'index':<28}{'recall':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    _row("flat (exact)", measure(flat, queries, truth, k))
+
+    t0 = time.perf_counter()
+    ivf, info = ann_index.build_index(embeddings, "ivf", {"nlist": args.nlist})
+    print(f"\n  ivf: nlist={info['nlist']} ({info['backend']}), built in {time.perf_counter() - t0:.2f}s")
+    for nprobe in NPROBE_SWEEP:
+        if nprobe > info["nlist"]:
+            break
+        ann_index.set_search_params(ivf, nprobe=nprobe)
+        _row(f"ivf nprobe={nprobe}", measure(ivf, queries, truth, k))
+
+    if ann_index.faiss is None:
+        print("\n  hnsw: skipped (faiss not installed)")
+        return
+    t0 = time.perf_counter()
+    hnsw, info = ann_index.build_index(
+        np.ascontiguousarray(embeddings, dtype=np.float32), "hnsw", {"m": args.hnsw_m}
+    )
+    print(f"\n  hnsw: M={info['m']} efConstruction={info['ef_construction']}, "
+          f"built in {time.perf_counter() - t0:.2f}s")
+    for ef in EF_SEARCH_SWEEP:
+        ann_index.set_search_params(hnsw, ef_search=ef)
+        _row(f"hnsw efSearch={ef}", measure(hnsw, queries, truth, k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+bench_embedder.py
+──────────────────
+Benchmark the RAG embedding runtimes on the test_rag.py fixtures:
+
+  sentence-transformers   all-MiniLM-L6-v2 in torch (float32)
+  onnx-int8               the same model as an int8 ONNX export (onnxruntime)
+
+Each backend runs in a fresh subprocess, so import and load costs are
+measured cold:
+  - load time      imports + model load
+  - RSS            resident memory added by imports + model load
+  - latency        single-query encode, p50 / p95 over the fixture queries
+  - retrieval      top-3 KB entries per fixture query (cosine)
+
+The report then compares the backends' retrieval: top-1 agreement and
+top-3 overlap per query, plus the cosine between their query vectors.
+Backends that are not installed (or not exported) are skipped.
+
+Run from the backend directory:
+    python rag_pipeline/bench_embedder.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+BACKENDS = ("sentence-transformers", "onnx-int8")
+TOP_K = 3
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm", encoding="ascii") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _fixture_queries() -> list:
+    """Ingredient tokens and additive queries _detect_additives would send."""
+    from rag_pipeline import test_rag
+    from rag_pipeline.rag_analyzer import _load_additives_db, _match_ingredients
+    from rag_pipeline.utils.ocr_parser import parse_ingredients
+
+    _, alias_index = _load_additives_db()
+    queries = []
+    for text in (test_rag.MAGGI_INGREDIENTS_TEXT, test_rag.PARLEG_INGREDIENTS_TEXT,
+                 test_rag.AMUL_BUTTER_INGREDIENTS_TEXT):
+        tokens = list(parse_ingredients(text).tokens)
+        queries += tokens
+        queries += [f"{e['code']} {e.get('name', '')}" for e in _match_ingredients(tokens, alias_index) if e]
+    return list(dict.fromkeys(q for q in queries if q.strip()))
+
+
+def run_worker(backend: str) -> dict:
+    """Measure one backend in this (fresh) process."""
+    import numpy as np
+
+    queries = _fixture_queries()
+    from rag_pipeline.utils.additive_index import open_index
+    from rag_pipeline.utils.embedder import _entry_to_text
+    entries = open_index().fssai_entries()
+
+    rss_before, t0 = _rss_mb(), time.perf_counter()
+    if backend == "onnx-int8":
+        from rag_pipeline.utils.onnx_encoder import OnnxSentenceEncoder, is_available
+        if not is_available():
+            return {"backend": backend, "skipped": "model not exported or onnxruntime/tokenizers missing"}
+        model = OnnxSentenceEncoder()
+    else:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            return {"backend": backend, "skipped": "sentence-transformers not installed"}
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+    model.encode(["warmup"], convert_to_numpy=True)
+    load_s = time.perf_counter() - t0
+    rss_mb = _rss_mb() - rss_before
+
+    def embed(texts):
+        vecs = np.asarray(model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+        return vecs / np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+
+    kb = embed([_entry_to_text(e) for e in entries])
+    latencies, vectors = [], []
+    for q in queries:
+        t = time.perf_counter()
+        vectors.append(embed([q.lower()])[0])
+        latencies.append((time.perf_counter() - t) * 1000)
+    vectors = np.stack(vectors)
+    top = np.argsort(-(vectors @ kb.T), axis=1, kind="stable")[:, :TOP_K]
+
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 3),
+        "rss_mb": round(rss_mb, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "queries": queries,
+        "topk": [[entries[i]["code"] for i in row] for row in top],
+        "vectors": vectors.round(5).tolist(),
+    }
+
+
+def main():
+    results = {}
+    for backend in BACKENDS:
+        out = subprocess.run(
+            [sys.executable, __file__, "--worker", backend],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+        if out.returncode != 0 or not lines:
+            results[backend] = {"backend": backend, "skipped": (out.stderr.strip().splitlines() or ["failed"])[-1]}
+        else:
+            results[backend] = json.loads(lines[-1])
+
+    print("\n" + "=" * 64)
+    print("  RAG embedding backends")
+    print("=" * 64)
+    print(f"  {'backend':<24}{'load s':>8}{'RSS MB':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for backend, r in results.items():
+        if "skipped" in r:
+            print(f"  {backend:<24}skipped: {r['skipped']}")
+        else:
+            print(f"  {backend:<24}{r['load_s']:>8}{r['rss_mb']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}")
+
+    measured = [r for r in results.values() if "skipped" not in r]
+    if len(measured) < 2:
+        print("\n  Retrieval comparison needs both backends.")
+        return
+    import numpy as np
+
+    a, b = measured
+    top1 = sum(x[0] == y[0] for x, y in zip(a["topk"], b["topk"]))
+    overlap = np.mean([len(set(x) & set(y)) / TOP_K for x, y in zip(a["topk"], b["topk"])])
+    cosine = np.sum(np.array(a["vectors"]) * np.array(b["vectors"]), axis=1)
+    n = len(a["queries"])
+    print(f"\n  Retrieval on {n} fixture queries ({a['backend']} vs {b['backend']}):")
+    print(f"    top-1 identical   {top1}/{n}")
+    print(f"    top-{TOP_K} overlap     {overlap:.1%}")
+    print(f"    query cosine      min {cosine.min():.4f}  mean {cosine.mean():.4f}")
+    for q, x, y in zip(a["queries"], a["topk"], b["topk"]):
+        if x[0] != y[0]:
+            print(f"    differs: {q!r}: {x[0]} vs {y[0]}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--worker":
+        print(json.dumps(run_worker(sys.argv[2])))
+    else:
+        main()
@@ -133,7 +133,11 @@ class RAGAnalysisResult(BaseModel):
 
     # Pipeline info
     pipeline_version: str = "1.0.0"
-    retrieval_backend: Literal["faiss", "keyword", "none"] = "none"
+    retrieval_backend: Literal["faiss", "ngram", "keyword", "none"] = "none"
+    retrieval_diagnostics: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Result cache tier (memory/disk/miss/off) and cache hit rates",
+    )
 
     def to_dict(self) -> Dict[str, Any]:
         """Plain dict for JSON serialisation (works with or without pydantic)."""
@@ -14,8 +14,10 @@ Usage:
 
 Pipeline:
     1. OCR text → structured nutrition dict + ingredients list   (ocr_parser)
+       → cached result if the same parsed label was seen under the same KB
+         version                                                  (result_cache)
     2. Ingredient tokens → fuzzy-matched against fssai_additives.json  (rapidfuzz / exact)
-    3. FAISS context retrieval for top matches                   (embedder)
+    3. FAISS context retrieval for all matches, one batch        (embedder)
     4. Rule engine evaluates nutrition against FSSAI limits      (harmful_flags + nutrition_guidelines)
     5. Score computed, warnings and explanations formatted       (llm_prompts)
     6. Pydantic RAGAnalysisResult validated and returned as dict (output_schemas)
@@ -23,12 +25,22 @@ Pipeline:
 
 from __future__ import annotations
 
+import copy
+import hashlib
 import json
 import logging
+import os
 import re
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from rag_pipeline.utils.additive_index import open_index
+from rag_pipeline.utils.result_cache import ResultCache, result_key
+
+if TYPE_CHECKING:
+    from rag_pipeline.utils.ocr_parser import ParsedIngredients
 
 logger = logging.getLogger(__name__)
 
@@ -36,50 +48,221 @@ logger = logging.getLogger(__name__)
 _HERE = Path(__file__).resolve().parent
 _KB = _HERE / "knowledge_base"
 
+_PIPELINE_VERSION = "1.0.0"
+
+# Modules whose code shapes a result once the label is parsed. Their content
+# hash is part of the result cache's KB version, so a deploy that changes
+# scoring, additive flags or prompt text never serves results of the old code.
+_RESULT_SOURCES = (
+    _HERE / "rag_analyzer.py",
+    _HERE / "utils" / "llm_prompts.py",
+    _HERE / "utils" / "embedder.py",
+    _HERE / "utils" / "ngram_index.py",
+    _HERE / "utils" / "bm25_index.py",
+)
+
+
+def _code_version() -> str:
+    """Short content hash of _RESULT_SOURCES (falls back to _PIPELINE_VERSION)."""
+    h = hashlib.sha1()
+    try:
+        for path in _RESULT_SOURCES:
+            h.update(path.read_bytes())
+    except OSError as exc:
+        logger.warning("RAG pipeline: cannot hash analyzer sources (%s) — result cache keyed on %s",
+                       exc, _PIPELINE_VERSION)
+        return _PIPELINE_VERSION
+    return h.hexdigest()[:12]
+
+
+_CODE_VERSION = _code_version()
+
+# Whole-analysis cache (memory LRU + optional SQLite tier); size 0 disables it
+try:
+    from app.config import RAG_RESULT_CACHE_SIZE as _RESULT_CACHE_SIZE
+    from app.config import RAG_RESULT_CACHE_PERSIST as _RESULT_CACHE_PERSIST
+    from app.config import RAG_RESULT_CACHE_MAX_ROWS as _RESULT_CACHE_MAX_ROWS
+    from app.config import RAG_RESULT_CACHE_TTL_DAYS as _RESULT_CACHE_TTL_DAYS
+except Exception:
+    _RESULT_CACHE_SIZE = int(os.getenv("RAG_RESULT_CACHE_SIZE", "1024"))
+    _RESULT_CACHE_PERSIST = os.getenv("RAG_RESULT_CACHE_PERSIST", "true").lower() == "true"
+    _RESULT_CACHE_MAX_ROWS = int(os.getenv("RAG_RESULT_CACHE_MAX_ROWS", "50000"))
+    _RESULT_CACHE_TTL_DAYS = float(os.getenv("RAG_RESULT_CACHE_TTL_DAYS", "30"))
+_result_cache: Optional[ResultCache] = (
+    ResultCache(_HERE / "vector_store" / "result_cache.db" if _RESULT_CACHE_PERSIST else None,
+                capacity=_RESULT_CACHE_SIZE, max_rows=_RESULT_CACHE_MAX_ROWS,
+                ttl_s=_RESULT_CACHE_TTL_DAYS * 86400)
+    if _RESULT_CACHE_SIZE > 0 else None
+)
+
 # Lazy-loaded knowledge base caches
 _additives_db: Optional[List[Dict[str, Any]]] = None
-_harmful_flags: Optional[Dict[str, Any]] = None
-_nutrition_guidelines: Optional[Dict[str, Any]] = None
 
 # Build alias → entry lookup on first load
 _alias_index: Optional[Dict[str, Dict[str, Any]]] = None
+# OCR look-alike code variants ("6Z1", "62L") → entry, built with the alias index
+_code_variant_index: Dict[str, Dict[str, Any]] = {}
+
+# Optional OCR-confusion tables (only available inside the Flask backend)
+try:
+    from app.utils.ocr_confusions import CODE_PATTERN, code_variants, real_digit_count
+    _CODE_RE = re.compile(CODE_PATTERN, re.IGNORECASE)
+except Exception:
+    _CODE_RE = None
+
+try:
+    from app.utils.keyword_matcher import KeywordMatcher
+except Exception:
+    KeywordMatcher = None
+
+# Per-worker CPU budget for the fuzzy score matrix (Flask backend only)
+try:
+    from app.runtime import thread_budget
+except Exception:
+    thread_budget = None
 
 
 # ── Knowledge base loaders ─────────────────────────────────────────────────────
 
 def _load_additives_db() -> Tuple[List[Dict], Dict[str, Dict]]:
-    global _additives_db, _alias_index
+    global _additives_db, _alias_index, _alias_choices
     if _additives_db is not None:
         return _additives_db, _alias_index  # type: ignore[return-value]
-    with open(_KB / "fssai_additives.json", encoding="utf-8") as f:
-        _additives_db = json.load(f)
+    _additives_db = open_index().fssai_entries()
     # Build alias index: every alias and the code itself → entry
     _alias_index = {}
+    _code_variant_index.clear()
     for entry in _additives_db:
         code_lower = entry.get("code", "").lower().strip()
         if code_lower:
             _alias_index[code_lower] = entry
+            if _CODE_RE is not None and code_lower.startswith("ins "):
+                for variant in code_variants(code_lower[4:]):
+                    _code_variant_index.setdefault(variant, entry)
         for alias in entry.get("aliases", []):
             alias_lower = alias.lower().strip()
             if alias_lower:
                 _alias_index[alias_lower] = entry
+    _alias_choices = _AliasChoices(_alias_index)
     return _additives_db, _alias_index
 
 
-def _load_harmful_flags() -> Dict[str, Any]:
-    global _harmful_flags
-    if _harmful_flags is None:
-        with open(_KB / "harmful_flags.json", encoding="utf-8") as f:
-            _harmful_flags = json.load(f)
-    return _harmful_flags
+# ── Compiled label rules ───────────────────────────────────────────────────────
+
+# Tokens that mark refined wheat flour (special case for Indian products)
+_MAIDA_TOKENS = ("maida", "refined flour", "refined wheat flour", "all purpose flour", "bleached flour")
+
+
+class _RuleSet:
+    """
+    harmful_flags.json + nutrition_guidelines.json compiled for one-pass use.
+
+    - markers, allergens and maida tokens share one keyword matcher, so the
+      joined ingredients are scanned once per label
+    - nutrient rules are a flat table of (nutrient, tiers) where the first
+      matching tier applies: (op, limit, score_delta, warning, detail)
+    """
+
+    __slots__ = ("kb_hash", "harmful_flags", "guidelines", "markers", "allergens",
+                 "keywords", "matcher", "nutrient_rules")
+
+    def __init__(self, kb_hash: str, harmful_flags: Dict[str, Any], guidelines: Dict[str, Any]):
+        from rag_pipeline.utils.llm_prompts import format_nutrient_warning
+
+        self.kb_hash = kb_hash
+        self.harmful_flags = harmful_flags
+        self.guidelines = guidelines
+        self.markers = [(m, m.lower()) for m in harmful_flags.get("ultra_processed_markers", [])]
+        self.allergens = list(dict.fromkeys(harmful_flags.get("allergens", {}).get("list", [])))
+        self.keywords = {kw for _, kw in self.markers} | {a.lower() for a in self.allergens} | set(_MAIDA_TOKENS)
+        self.keywords.discard("")
+        self.matcher = KeywordMatcher(self.keywords) if KeywordMatcher is not None else None
+
+        thresholds = guidelines.get("fssai_traffic_light_thresholds_per_100g", {})
+        deductions = guidelines.get("score_deductions", {})
+        additions = guidelines.get("score_additions", {})
+
+        def warn(label: str, key: str, **kwargs: Any) -> Tuple[str, Dict[str, str]]:
+            return label, format_nutrient_warning(key, **kwargs)
+
+        sugar_high = thresholds.get("total_sugars_g", {}).get("high", 22.5)
+        sugar_med = thresholds.get("total_sugars_g", {}).get("medium", 12.5)
+        sodium_high = thresholds.get("sodium_mg", {}).get("high", 600)
+        sodium_med = thresholds.get("sodium_mg", {}).get("medium", 400)
+        sat_high = thresholds.get("saturated_fat_g", {}).get("high", 5.0)
+        cal_high = thresholds.get("energy_kcal", {}).get("high", 400)
+        trans_warning = warn("Contains Trans Fat", "trans_fat_present")
+
+        self.nutrient_rules = (
+            ("sugars_g", (
+                (">=", sugar_high, -deductions.get("sugar_above_22g", 3.0),
+                 warn("High Sugar", "sugar_high", threshold=sugar_high)),
+                (">=", sugar_med, -deductions.get("sugar_above_12g", 1.5), None),
+                ("<", 5.0, additions.get("low_sugar_below_5g", 0.5), None),
+            )),
+            ("sodium_mg", (
+                (">=", sodium_high, -deductions.get("sodium_above_600mg", 2.5),
+                 warn("High Sodium", "sodium_high", threshold=sodium_high)),
+                (">=", sodium_med, -deductions.get("sodium_above_400mg", 1.0), None),
+                ("<", 120, additions.get("low_sodium_below_120mg", 0.5), None),
+            )),
+            ("trans_fat_g", (
+                (">=", 1.0, -deductions.get("trans_fat_above_1g", 4.0), trans_warning),
+                (">", 0.1, -deductions.get("trans_fat_above_0.2g", 2.0), trans_warning),
+            )),
+            ("saturated_fat_g", (
+                (">=", sat_high, -deductions.get("saturated_fat_above_5g", 2.0),
+                 warn("High Saturated Fat", "saturated_fat_high", threshold=sat_high)),
+            )),
+            ("calories", (
+                (">=", cal_high, -deductions.get("calories_above_400kcal", 1.5),
+                 warn("High Calorie Density", "calories_high", threshold=cal_high)),
+            )),
+            ("protein_g", (
+                (">=", 10, additions.get("protein_above_10g", 1.0), None),
+            )),
+            ("fiber_g", (
+                (">=", 6, additions.get("fiber_above_6g", 2.0), None),
+                (">=", 3, additions.get("fiber_above_3g", 1.0), None),
+            )),
+        )
+
+    def scan_ingredients(self, ingredients_str: str) -> Tuple[List[str], List[str], bool]:
+        """(ultra-processed markers, allergens, contains maida) in one pass."""
+        if self.matcher is not None:
+            found = self.matcher.find(ingredients_str)
+        else:
+            found = {kw for kw in self.keywords if kw in ingredients_str}
+        return (
+            [marker for marker, kw in self.markers if kw in found],
+            [allergen for allergen in self.allergens if allergen.lower() in found],
+            any(t in found for t in _MAIDA_TOKENS),
+        )
+
+
+_rule_set: Optional[_RuleSet] = None
+_rule_set_stamp: Optional[Tuple[Tuple[int, int], ...]] = None
+_RULE_FILES = ("harmful_flags.json", "nutrition_guidelines.json")
+
 
+def _load_rule_set() -> _RuleSet:
+    """
+    Compiled rules for the current KB files. A stat per call detects edits;
+    the rules are only recompiled when the files' content hash changes.
+    """
+    global _rule_set, _rule_set_stamp
+    paths = [_KB / name for name in _RULE_FILES]
+    stamp = tuple((st.st_mtime_ns, st.st_size) for st in map(os.stat, paths))
+    if _rule_set is not None and stamp == _rule_set_stamp:
+        return _rule_set
 
-def _load_nutrition_guidelines() -> Dict[str, Any]:
-    global _nutrition_guidelines
-    if _nutrition_guidelines is None:
-        with open(_KB / "nutrition_guidelines.json", encoding="utf-8") as f:
-            _nutrition_guidelines = json.load(f)
-    return _nutrition_guidelines
+    raw = [path.read_bytes() for path in paths]
+    kb_hash = hashlib.sha1(b"\0".join(raw)).hexdigest()[:12]
+    if _rule_set is None or _rule_set.kb_hash != kb_hash:
+        _rule_set = _RuleSet(kb_hash, json.loads(raw[0]), json.loads(raw[1]))
+        logger.info("RAG rules compiled (kb %s): %d keywords", kb_hash, len(_rule_set.keywords))
+    _rule_set_stamp = stamp
+    return _rule_set
 
 
 # ── Additive matching ──────────────────────────────────────────────────────────
@@ -93,54 +276,127 @@ except ImportError:
     logger.info("rapidfuzz not installed — additive matching uses exact/substring only.")
 
 
-def _fuzzy_match_ingredient(
-    token: str,
+class _AliasChoices:
+    """
+    Alias index precomputed for batch matching.
+
+    - choices: the alias list handed to rapidfuzz, built once
+    - rank: alias → position in the index, so the first alias in index order
+      still wins when several are contained in a token
+    - matcher: one automaton over the aliases (≥ 3 chars) that answers
+      substring containment in a single pass per token
+    """
+
+    __slots__ = ("index", "choices", "rank", "matcher")
+
+    def __init__(self, alias_index: Dict[str, Dict]):
+        self.index = alias_index
+        self.choices = list(alias_index.keys())
+        self.rank = {alias: i for i, alias in enumerate(self.choices)}
+        substrings = [alias for alias in self.choices if len(alias) >= 3]
+        self.matcher = KeywordMatcher(substrings) if KeywordMatcher is not None else None
+
+    def contained(self, token_lower: str) -> Optional[Dict[str, Any]]:
+        """Entry of the first alias (in index order) that appears inside the token."""
+        if self.matcher is None:
+            for alias, entry in self.index.items():
+                if len(alias) >= 3 and alias in token_lower:
+                    return entry
+            return None
+        found = self.matcher.find(token_lower)
+        if not found:
+            return None
+        return self.index[min(found, key=self.rank.__getitem__)]
+
+
+_alias_choices: Optional[_AliasChoices] = None
+
+
+def _choices_for(alias_index: Dict[str, Dict]) -> _AliasChoices:
+    if _alias_choices is not None and _alias_choices.index is alias_index:
+        return _alias_choices
+    return _AliasChoices(alias_index)
+
+
+def _match_ingredients(
+    tokens: List[str],
     alias_index: Dict[str, Dict],
     threshold: int = 80,
-) -> Optional[Dict[str, Any]]:
+) -> List[Optional[Dict[str, Any]]]:
     """
-    Match a single ingredient token against the alias index.
+    Match every ingredient token of a label against the alias index.
 
-    Strategy (in order):
+    Strategy per token (in order):
     1. Exact alias match (O(1), case-insensitive)
+    1b. INS/E code with OCR look-alikes ("1NS 62l", "E 6Z1") → exact lookup
+        in the precomputed variant index
     2. Substring containment (catches "contains INS 621" type strings)
-    3. rapidfuzz WRatio ≥ threshold (handles OCR typos: "E62l" → "E621")
-    4. Return None if no match
+    3. rapidfuzz WRatio ≥ threshold (handles OCR typos: "E62l" → "E621");
+       all tokens left over from 1–2 are scored in one cdist matrix
+    4. INS/E code pattern heuristic: "ins621" → "INS 621"
 
-    Returns matched entry dict or None.
+    Returns the matched entry dict (or None) for each token, in order.
     """
-    token_lower = token.lower().strip()
-
-    # 1. Exact match
-    if token_lower in alias_index:
-        return alias_index[token_lower]
-
-    # 2. Substring: check if any alias appears inside the token string
-    for alias, entry in alias_index.items():
-        if len(alias) >= 3 and alias in token_lower:
-            return entry
-
-    # 3. Fuzzy match via rapidfuzz
-    if _RAPIDFUZZ_AVAILABLE and len(token_lower) >= 4:
-        match_result = _rp_process.extractOne(
-            token_lower,
-            list(alias_index.keys()),
+    table = _choices_for(alias_index)
+    matches: List[Optional[Dict[str, Any]]] = [None] * len(tokens)
+    lowered = [token.lower().strip() for token in tokens]
+    pending: List[int] = []
+
+    for i, token_lower in enumerate(lowered):
+        # 1. Exact match
+        entry = alias_index.get(token_lower)
+
+        # 1b. OCR-confused code → exact variant lookup
+        if entry is None and _CODE_RE is not None and _code_variant_index:
+            for m in _CODE_RE.finditer(token_lower):
+                code = m.group("code")
+                if m.group("prefix") or real_digit_count(code) >= 2:
+                    entry = _code_variant_index.get(code.upper())
+                    if entry is not None:
+                        break
+
+        # 2. Substring: any alias inside the token string
+        if entry is None:
+            entry = table.contained(token_lower)
+
+        matches[i] = entry
+        if entry is None:
+            pending.append(i)
+
+    # 3. Fuzzy match via rapidfuzz, one score matrix for the whole label
+    fuzzy = [i for i in pending if len(lowered[i]) >= 4]
+    if _RAPIDFUZZ_AVAILABLE and fuzzy and table.choices:
+        scores = _rp_process.cdist(
+            [lowered[i] for i in fuzzy],
+            table.choices,
             scorer=_rp_fuzz.WRatio,
             score_cutoff=threshold,
+            workers=thread_budget() if thread_budget is not None else 1,
         )
-        if match_result:
-            matched_alias = match_result[0]
-            return alias_index.get(matched_alias)
+        # argmax keeps the first best choice, as extractOne does
+        best = scores.argmax(axis=1)
+        for row, i in enumerate(fuzzy):
+            col = int(best[row])
+            if scores[row, col] >= threshold:
+                matches[i] = alias_index.get(table.choices[col])
 
     # 4. INS/E code pattern heuristic: "ins621" → "INS 621"
-    ins_pattern = re.match(r"(?:ins|e)\s*(\d{2,4}[a-z]?)", token_lower)
-    if ins_pattern:
-        normalised = f"INS {ins_pattern.group(1).upper()}"
-        normalised_lower = normalised.lower()
-        if normalised_lower in alias_index:
-            return alias_index[normalised_lower]
+    for i in pending:
+        if matches[i] is None:
+            ins_pattern = re.match(r"(?:ins|e)\s*(\d{2,4}[a-z]?)", lowered[i])
+            if ins_pattern:
+                matches[i] = alias_index.get(f"ins {ins_pattern.group(1).lower()}")
 
-    return None
+    return matches
+
+
+def _fuzzy_match_ingredient(
+    token: str,
+    alias_index: Dict[str, Dict],
+    threshold: int = 80,
+) -> Optional[Dict[str, Any]]:
+    """Match a single ingredient token; see _match_ingredients."""
+    return _match_ingredients([token], alias_index, threshold)[0]
 
 
 def _detect_additives(
@@ -153,24 +409,66 @@ def _detect_additives(
 
     Returns list of AdditiveFlag-shaped dicts.
     """
-    from rag_pipeline.utils.embedder import retrieve_context
-    from rag_pipeline.utils.llm_prompts import format_additive_explanation
+    return _detect_additives_batch([ingredients], alias_index, harmful_flags)[0]
 
-    high_risk_codes = set(c.lower() for c in harmful_flags.get("risk_tiers", {}).get("high_risk", []))
-    moderate_risk_codes = set(c.lower() for c in harmful_flags.get("risk_tiers", {}).get("moderate_risk", []))
-    banned_codes = set(c.lower() for c in harmful_flags.get("risk_tiers", {}).get("banned_in_india", []))
 
-    found: Dict[str, Dict] = {}  # code → flag dict (deduplicate)
+def _detect_additives_batch(
+    ingredient_lists: List[List[str]],
+    alias_index: Dict[str, Dict],
+    harmful_flags: Dict[str, Any],
+) -> List[List[Dict[str, Any]]]:
+    """
+    _detect_additives() for several labels at once.
+
+    Every distinct token of the batch is matched once (one fuzzy score
+    matrix), and every distinct additive found is enriched by one
+    retrieval call. Returns one list of AdditiveFlag-shaped dicts per label.
+    """
+    from rag_pipeline.utils.embedder import retrieve_context_batch
+
+    tokens = list(dict.fromkeys(t for ingredients in ingredient_lists for t in ingredients))
+    token_matches = dict(zip(tokens, _match_ingredients(tokens, alias_index)))
+
+    per_label: List[Dict[str, Dict]] = []   # code → entry (deduplicate, first match wins)
+    for ingredients in ingredient_lists:
+        matched: Dict[str, Dict] = {}
+        for token in ingredients:
+            entry = token_matches[token]
+            if entry is not None:
+                matched.setdefault(entry.get("code", "UNKNOWN"), entry)
+        per_label.append(matched)
+
+    # Use FAISS to enrich with KB context (gets health_risks, etc.):
+    # one encode + one search for every additive in the batch. A store built
+    # with taxonomy entries can rank those first, so keep the best FSSAI hit.
+    queries = list(dict.fromkeys(
+        f"{code} {entry.get('name', '')}" for matched in per_label for code, entry in matched.items()
+    ))
+    contexts = retrieve_context_batch(queries, top_k=3)
+    context_by_query = {
+        q: [c for c in hits if "source" not in c][:1] for q, hits in zip(queries, contexts)
+    }
+
+    tiers = harmful_flags.get("risk_tiers", {})
+    risk_codes = tuple(
+        set(c.lower() for c in tiers.get(tier, [])) for tier in ("high_risk", "moderate_risk", "banned_in_india")
+    )
+    return [_additive_flags(matched, context_by_query, risk_codes) for matched in per_label]
 
-    for token in ingredients:
-        entry = _fuzzy_match_ingredient(token, alias_index)
-        if entry is None:
-            continue
 
-        code = entry.get("code", "UNKNOWN")
-        if code in found:
-            continue  # already recorded
+def _additive_flags(
+    matched: Dict[str, Dict],
+    context_by_query: Dict[str, List[Dict[str, Any]]],
+    risk_codes: Tuple[set, set, set],
+) -> List[Dict[str, Any]]:
+    """AdditiveFlag-shaped dicts for one label's matched entries."""
+    from rag_pipeline.utils.llm_prompts import format_additive_explanation
+
+    high_risk_codes, moderate_risk_codes, banned_codes = risk_codes
 
+    found: Dict[str, Dict] = {}  # code → flag dict
+    for code, entry in matched.items():
+        context_entries = context_by_query[f"{code} {entry.get('name', '')}"]
         code_lower = code.lower()
         if code_lower in high_risk_codes:
             risk = "high"
@@ -179,12 +477,10 @@ def _detect_additives(
         else:
             risk = "low" if entry.get("safety") == "green" else "moderate"
 
-        # Use FAISS to enrich with KB context (gets health_risks, etc.)
-        context_entries = retrieve_context(f"{code} {entry.get('name', '')}", top_k=1)
         enriched = context_entries[0] if context_entries else entry
 
         explanation = format_additive_explanation(enriched)
-        retrieval_backend = "faiss" if context_entries and "_similarity_score" in context_entries[0] else "keyword"
+        retrieval_backend = context_entries[0].get("_retrieval_backend", "keyword") if context_entries else "keyword"
 
         found[code] = {
             "code": code,
@@ -207,8 +503,7 @@ def _detect_additives(
 
 def _evaluate_nutrition(
     nutrition: Dict[str, Optional[float]],
-    guidelines: Dict[str, Any],
-    harmful_flags: Dict[str, Any],
+    rules: _RuleSet,
 ) -> Tuple[List[str], List[Dict[str, str]], float]:
     """
     Compare extracted nutrition values against FSSAI thresholds.
@@ -216,124 +511,25 @@ def _evaluate_nutrition(
     Returns:
         (warnings_list, warning_details_list, score_deduction)
     """
-    from rag_pipeline.utils.llm_prompts import format_nutrient_warning
-
-    thresholds = guidelines.get("fssai_traffic_light_thresholds_per_100g", {})
-    deductions = guidelines.get("score_deductions", {})
-    additions = guidelines.get("score_additions", {})
-
     warnings: List[str] = []
     warning_details: List[Dict[str, str]] = []
     score = 10.0  # start at perfect score
 
-    # ── Sugar ─────────────────────────────────────────────────────────────────
-    sugar = nutrition.get("sugars_g")
-    if sugar is not None:
-        sugar_high_thresh = thresholds.get("total_sugars_g", {}).get("high", 22.5)
-        sugar_med_thresh = thresholds.get("total_sugars_g", {}).get("medium", 12.5)
-        if sugar >= sugar_high_thresh:
-            warnings.append("High Sugar")
-            warning_details.append(format_nutrient_warning("sugar_high", threshold=sugar_high_thresh))
-            score -= deductions.get("sugar_above_22g", 3.0)
-        elif sugar >= sugar_med_thresh:
-            score -= deductions.get("sugar_above_12g", 1.5)
-        elif sugar < 5.0:
-            score += additions.get("low_sugar_below_5g", 0.5)
-
-    # ── Sodium ────────────────────────────────────────────────────────────────
-    sodium = nutrition.get("sodium_mg")
-    if sodium is not None:
-        sodium_high = thresholds.get("sodium_mg", {}).get("high", 600)
-        sodium_med = thresholds.get("sodium_mg", {}).get("medium", 400)
-        if sodium >= sodium_high:
-            warnings.append("High Sodium")
-            warning_details.append(format_nutrient_warning("sodium_high", threshold=sodium_high))
-            score -= deductions.get("sodium_above_600mg", 2.5)
-        elif sodium >= sodium_med:
-            score -= deductions.get("sodium_above_400mg", 1.0)
-        elif sodium < 120:
-            score += additions.get("low_sodium_below_120mg", 0.5)
-
-    # ── Trans fat ─────────────────────────────────────────────────────────────
-    trans_fat = nutrition.get("trans_fat_g")
-    if trans_fat is not None and trans_fat > 0.1:
-        warnings.append("Contains Trans Fat")
-        warning_details.append(format_nutrient_warning("trans_fat_present"))
-        score -= deductions.get("trans_fat_above_1g", 4.0) if trans_fat >= 1.0 else deductions.get("trans_fat_above_0.2g", 2.0)
-
-    # ── Saturated fat ─────────────────────────────────────────────────────────
-    sat_fat = nutrition.get("saturated_fat_g")
-    if sat_fat is not None:
-        sat_high = thresholds.get("saturated_fat_g", {}).get("high", 5.0)
-        if sat_fat >= sat_high:
-            warnings.append("High Saturated Fat")
-            warning_details.append(format_nutrient_warning("saturated_fat_high", threshold=sat_high))
-            score -= deductions.get("saturated_fat_above_5g", 2.0)
-
-    # ── Calories ──────────────────────────────────────────────────────────────
-    calories = nutrition.get("calories")
-    if calories is not None:
-        cal_high = thresholds.get("energy_kcal", {}).get("high", 400)
-        if calories >= cal_high:
-            warnings.append("High Calorie Density")
-            warning_details.append(format_nutrient_warning("calories_high", threshold=cal_high))
-            score -= deductions.get("calories_above_400kcal", 1.5)
-
-    # ── Protein bonus ─────────────────────────────────────────────────────────
-    protein = nutrition.get("protein_g")
-    if protein is not None and protein >= 10:
-        score += additions.get("protein_above_10g", 1.0)
-
-    # ── Fibre bonus ───────────────────────────────────────────────────────────
-    fiber = nutrition.get("fiber_g")
-    if fiber is not None:
-        if fiber >= 6:
-            score += additions.get("fiber_above_6g", 2.0)
-        elif fiber >= 3:
-            score += additions.get("fiber_above_3g", 1.0)
+    for nutrient, tiers in rules.nutrient_rules:
+        value = nutrition.get(nutrient)
+        if value is None:
+            continue
+        for op, limit, delta, warning in tiers:
+            if value >= limit if op == ">=" else value > limit if op == ">" else value < limit:
+                score += delta
+                if warning is not None:
+                    warnings.append(warning[0])
+                    warning_details.append(dict(warning[1]))
+                break
 
     return warnings, warning_details, max(0.0, min(10.0, score))
 
 
-# ── Ultra-processed marker detection ──────────────────────────────────────────
-
-def _detect_ultra_processed(
-    ingredients: List[str],
-    harmful_flags: Dict[str, Any],
-) -> List[str]:
-    """Return list of ultra-processed marker strings found in ingredients."""
-    markers = harmful_flags.get("ultra_processed_markers", [])
-    found = []
-    ingredients_str = " ".join(ingredients).lower()
-    for marker in markers:
-        if marker.lower() in ingredients_str:
-            found.append(marker)
-    return found
-
-
-# ── Allergen detection ─────────────────────────────────────────────────────────
-
-def _detect_allergens(
-    ingredients: List[str],
-    harmful_flags: Dict[str, Any],
-) -> List[str]:
-    """Return list of allergens found in the ingredients text."""
-    allergen_list = harmful_flags.get("allergens", {}).get("list", [])
-    ingredients_str = " ".join(ingredients).lower()
-    found = []
-    for allergen in allergen_list:
-        if allergen.lower() in ingredients_str:
-            found.append(allergen)
-    # Deduplicate while preserving order
-    seen = set()
-    deduped = []
-    for a in found:
-        if a not in seen:
-            seen.add(a)
-            deduped.append(a)
-    return deduped
-
-
 # ── Public entrypoint ──────────────────────────────────────────────────────────
 
 def analyze_label_text(
@@ -342,6 +538,7 @@ def analyze_label_text(
     *,
     pre_parsed_nutrition: Optional[Dict[str, Any]] = None,
     pre_parsed_ingredients: Optional[List[str]] = None,
+    parsed_ingredients: Optional["ParsedIngredients"] = None,
 ) -> Dict[str, Any]:
     """
     Analyse food label text and return a structured RAG analysis result.
@@ -351,45 +548,238 @@ def analyze_label_text(
         ingredients_text: Raw OCR text of the ingredients list (can be empty string).
         pre_parsed_nutrition: Optional already-parsed nutrition dict (skips ocr_parser).
         pre_parsed_ingredients: Optional already-parsed ingredients list (skips ocr_parser).
+        parsed_ingredients: Optional ParsedIngredients shared with the caller's
+            request (skips ocr_parser; its tokens and joined text are reused).
 
     Returns:
         Plain dict matching the RAGAnalysisResult schema. Always safe to JSON-serialise.
         Keys: nutrition_summary, additive_flags, fssai_compliance, compliance_message,
               warnings, warning_details, score, score_grade, ingredients_detected,
               ultra_processed_markers_found, allergens_detected, healthy_alternative,
-              pipeline_version, retrieval_backend.
+              pipeline_version, retrieval_backend, retrieval_diagnostics
+              (result cache tier + hit rates), analysis_time_s.
     """
     t0 = time.time()
 
-    from rag_pipeline.utils.ocr_parser import parse_nutrition_text, parse_ingredients_text
-    from rag_pipeline.utils.llm_prompts import (
-        build_compliance_message,
-        build_healthy_alternative_tip,
-        format_nutrient_warning,
-    )
-    from rag_pipeline.output_schemas import RAGAnalysisResult, AdditiveFlag
-
     # ── Step 1: Parse OCR text ─────────────────────────────────────────────────
-    nutrition = pre_parsed_nutrition or parse_nutrition_text(
-        " ".join([nutrition_text, ingredients_text])
+    nutrition, ingredients, ingredients_str = _parse_label(
+        nutrition_text, ingredients_text, pre_parsed_nutrition, pre_parsed_ingredients, parsed_ingredients,
     )
-    ingredients = pre_parsed_ingredients or parse_ingredients_text(ingredients_text or nutrition_text)
 
     # ── Step 2: Load knowledge bases ──────────────────────────────────────────
     _, alias_index = _load_additives_db()
-    harmful_flags = _load_harmful_flags()
-    guidelines = _load_nutrition_guidelines()
+    rules = _load_rule_set()
+
+    # Same parsed label + same KB version → same analysis
+    kb_version = _result_kb_version(rules)
+    key = result_key(nutrition, ingredients, ingredients_str, kb_version)
+    result, tier = _cache_lookup(key)
+    if result is not None:
+        _finish_result(result, ingredients, tier, time.time() - t0)
+        logger.info("RAG pipeline: %s cache hit — score=%.1f (%s)",
+                    tier, result["score"], result["score_grade"])
+        return result
 
     # ── Step 3: Detect additives ───────────────────────────────────────────────
-    additive_flag_dicts = _detect_additives(ingredients, alias_index, harmful_flags)
+    additive_flag_dicts = _detect_additives(ingredients, alias_index, rules.harmful_flags)
 
-    # ── Step 4: Nutrition rule engine ─────────────────────────────────────────
-    warnings, warning_details, nutrition_score = _evaluate_nutrition(
-        nutrition, guidelines, harmful_flags
+    result = _score_label(nutrition, ingredients, ingredients_str, additive_flag_dicts, rules)
+    if _result_cache is not None:
+        _result_cache.put(key, kb_version, result)
+    _finish_result(result, ingredients, tier, time.time() - t0)
+    logger.info(
+        "RAG pipeline complete in %.3fs — score=%.1f (%s), additives=%d, warnings=%d",
+        result["analysis_time_s"], result["score"], result["score_grade"],
+        len(result["additive_flags"]), len(result["warnings"]),
+    )
+    return result
+
+
+# analyze_label_text() keyword arguments a batch item may carry
+_BATCH_ITEM_KEYS = frozenset({
+    "nutrition_text", "ingredients_text", "pre_parsed_nutrition",
+    "pre_parsed_ingredients", "parsed_ingredients",
+})
+
+
+def batch_item_error(item: Any) -> Optional[str]:
+    """Why `item` is not a valid analyze_label_texts() item, or None if it is."""
+    if not isinstance(item, dict):
+        return f"expected a dict, got {type(item).__name__}"
+    unknown = [str(k) for k in item if k not in _BATCH_ITEM_KEYS]
+    if unknown:
+        return f"unexpected key(s) {', '.join(sorted(unknown))}"
+    return None
+
+
+def analyze_label_texts(
+    items: List[Dict[str, Any]],
+    workers: int = 0,
+    chunk_size: int = 500,
+) -> List[Dict[str, Any]]:
+    """
+    analyze_label_text() for many labels (history re-analysis, catalogs).
+
+    Each item is a dict of analyze_label_text() keyword arguments. All items
+    are parsed first; then every distinct ingredient token in the batch goes
+    through one fuzzy-match pass and every distinct additive through one
+    retrieval call, before the rule engine scores each label. Labels already
+    in the result cache (or repeated within the batch) are not re-analysed.
+    Results come back in input order, with analysis_time_s amortised over
+    the batch.
+
+    workers > 1 fans chunks of chunk_size items out over a process pool
+    (each chunk batched as above) for large offline runs.
+
+    Raises TypeError for an item batch_item_error() rejects.
+    """
+    items = list(items)
+    if not items:
+        return []
+    for i, item in enumerate(items):
+        problem = batch_item_error(item)
+        if problem:
+            raise TypeError(f"batch item {i}: {problem}")
+    if workers and workers > 1 and len(items) > chunk_size:
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return [r for chunk in pool.map(_analyze_chunk, chunks) for r in chunk]
+
+    t0 = time.time()
+    parsed = [
+        _parse_label(
+            item.get("nutrition_text", ""),
+            item.get("ingredients_text", ""),
+            item.get("pre_parsed_nutrition"),
+            item.get("pre_parsed_ingredients"),
+            item.get("parsed_ingredients"),
+        )
+        for item in items
+    ]
+    _, alias_index = _load_additives_db()
+    rules = _load_rule_set()
+
+    kb_version = _result_kb_version(rules)
+    keys = [result_key(nutrition, ingredients, text, kb_version) for nutrition, ingredients, text in parsed]
+    by_key: Dict[str, Tuple[Dict[str, Any], str]] = {}
+    missing: Dict[str, int] = {}   # key → first item with it
+    for i, key in enumerate(keys):
+        if key not in by_key and key not in missing:
+            result, tier = _cache_lookup(key)
+            if result is None:
+                missing[key] = i
+            else:
+                by_key[key] = (result, tier)
+
+    todo = list(missing.values())
+    flags = _detect_additives_batch([parsed[i][1] for i in todo], alias_index, rules.harmful_flags)
+    for i, additive_flag_dicts in zip(todo, flags):
+        result = _score_label(*parsed[i], additive_flag_dicts, rules)
+        if _result_cache is not None:
+            _result_cache.put(keys[i], kb_version, result)
+        by_key[keys[i]] = (result, "off" if _result_cache is None else "miss")
+
+    elapsed = time.time() - t0
+    results, used = [], set()
+    for (_, ingredients, _), key in zip(parsed, keys):
+        result, tier = by_key[key]
+        result = copy.deepcopy(result) if key in used else result
+        used.add(key)
+        results.append(_finish_result(result, ingredients, tier, elapsed / len(items)))
+    logger.info("RAG pipeline: %d labels (%d analysed, %d cached) in %.3fs",
+                len(results), len(todo), len(by_key) - len(todo), elapsed)
+    return results
+
+
+def _analyze_chunk(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return analyze_label_texts(items)
+
+
+def _result_kb_version(rules: _RuleSet) -> str:
+    """Rules hash + retrieval identity (additive KB, vector store) + analyzer code hash."""
+    from rag_pipeline.utils.embedder import retrieval_version
+
+    return f"{rules.kb_hash}:{retrieval_version()}:{_CODE_VERSION}"
+
+
+def _cache_lookup(key: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """(cached result or None, tier: "memory" | "disk" | "miss" | "off")."""
+    if _result_cache is None:
+        return None, "off"
+    result, tier = _result_cache.get(key)
+    return result, tier or "miss"
+
+
+def _finish_result(
+    result: Dict[str, Any],
+    ingredients: List[str],
+    cache_tier: str,
+    elapsed: float,
+) -> Dict[str, Any]:
+    """Per-request fields on a fresh or cached result (the cache key lower-cases tokens)."""
+    from rag_pipeline.utils.embedder import embedding_cache_stats
+
+    result["ingredients_detected"] = list(ingredients)
+    result["analysis_time_s"] = round(elapsed, 3)
+    result["retrieval_diagnostics"] = {
+        "result_cache": cache_tier,
+        "result_cache_hit_rate": _result_cache.stats()["hit_rate"] if _result_cache else 0.0,
+        "embedding_cache_hit_rate": embedding_cache_stats()["hit_rate"],
+    }
+    return result
+
+
+def result_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the analysis result cache (this process); see /api/diagnostics/caches."""
+    return _result_cache.stats() if _result_cache is not None else {"enabled": False}
+
+
+def _parse_label(
+    nutrition_text: str,
+    ingredients_text: str,
+    pre_parsed_nutrition: Optional[Dict[str, Any]],
+    pre_parsed_ingredients: Optional[List[str]],
+    parsed_ingredients: Optional["ParsedIngredients"],
+) -> Tuple[Dict[str, Any], List[str], str]:
+    """(nutrition dict, ingredient tokens, joined lower-case ingredients)."""
+    from rag_pipeline.utils.ocr_parser import parse_nutrition_text, parse_ingredients
+
+    nutrition = pre_parsed_nutrition or parse_nutrition_text(
+        " ".join([nutrition_text, ingredients_text])
     )
+    if pre_parsed_ingredients:
+        ingredients = pre_parsed_ingredients
+        ingredients_str = " ".join(ingredients).lower()
+    else:
+        if parsed_ingredients is None or not parsed_ingredients.tokens:
+            parsed_ingredients = parse_ingredients(ingredients_text or nutrition_text)
+        ingredients = list(parsed_ingredients.tokens)
+        ingredients_str = parsed_ingredients.joined
+    return nutrition, ingredients, ingredients_str
+
+
+def _score_label(
+    nutrition: Dict[str, Any],
+    ingredients: List[str],
+    ingredients_str: str,
+    additive_flag_dicts: List[Dict[str, Any]],
+    rules: _RuleSet,
+) -> Dict[str, Any]:
+    """Rule engine, score, grade and output dict for one parsed label (steps 4–11)."""
+    from rag_pipeline.utils.llm_prompts import (
+        build_compliance_message,
+        build_healthy_alternative_tip,
+        format_nutrient_warning,
+    )
+
+    guidelines = rules.guidelines
+
+    # ── Step 4: Nutrition rule engine ─────────────────────────────────────────
+    warnings, warning_details, nutrition_score = _evaluate_nutrition(nutrition, rules)
 
     # ── Step 5: Ultra-processed markers ───────────────────────────────────────
-    ultra_processed = _detect_ultra_processed(ingredients, harmful_flags)
+    # One pass over the ingredients finds markers, allergens and maida together
+    ultra_processed, allergens, has_maida = rules.scan_ingredients(ingredients_str)
     deductions = guidelines.get("score_deductions", {})
     up_deduction = min(
         len(ultra_processed) * deductions.get("ultra_processed_marker_each", 0.25),
@@ -404,7 +794,6 @@ def analyze_label_text(
         )
 
     # ── Step 6: Allergens ─────────────────────────────────────────────────────
-    allergens = _detect_allergens(ingredients, harmful_flags)
     for allergen in allergens[:3]:  # show top 3 allergen warnings
         warnings.append(f"Allergen: {allergen.title()}")
         warning_details.append(
@@ -445,8 +834,7 @@ def analyze_label_text(
     compliance_message = build_compliance_message(banned_in_product)
 
     # ── Step 9: Maida detection (special case for Indian products) ────────────
-    maida_tokens = {"maida", "refined flour", "refined wheat flour", "all purpose flour", "bleached flour"}
-    if any(t in " ".join(ingredients) for t in maida_tokens):
+    if has_maida:
         warnings.append("Contains Refined Wheat Flour (Maida)")
         warning_details.append(format_nutrient_warning("maida_detected"))
 
@@ -457,6 +845,8 @@ def analyze_label_text(
     retrieval_backends = {f.get("_retrieval_backend", "keyword") for f in additive_flag_dicts}
     if "faiss" in retrieval_backends:
         retrieval_backend = "faiss"
+    elif "ngram" in retrieval_backends:
+        retrieval_backend = "ngram"
     elif additive_flag_dicts:
         retrieval_backend = "keyword"
     else:
@@ -468,12 +858,6 @@ def analyze_label_text(
         clean_flag = {k: v for k, v in flag.items() if not k.startswith("_")}
         clean_flags.append(clean_flag)
 
-    elapsed = round(time.time() - t0, 3)
-    logger.info(
-        "RAG pipeline complete in %.3fs — score=%.1f (%s), additives=%d, warnings=%d",
-        elapsed, score, score_grade, len(clean_flags), len(warnings),
-    )
-
     return {
         "nutrition_summary": nutrition,
         "additive_flags": clean_flags,
@@ -487,7 +871,6 @@ def analyze_label_text(
         "ultra_processed_markers_found": ultra_processed,
         "allergens_detected": allergens,
         "healthy_alternative": healthy_alternative,
-        "pipeline_version": "1.0.0",
+        "pipeline_version": _PIPELINE_VERSION,
         "retrieval_backend": retrieval_backend,
-        "analysis_time_s": elapsed,
     }
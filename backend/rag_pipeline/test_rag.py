@@ -24,7 +24,8 @@ import os
 # Add backend root to sys.path so rag_pipeline can be imported directly
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from rag_pipeline import analyze_label_text
+from rag_pipeline import analyze_label_text, analyze_label_texts
+from rag_pipeline.utils.ocr_parser import parse_nutrition_text
 
 
 # ─── Test Cases ───────────────────────────────────────────────────────────────
@@ -192,6 +193,38 @@ def main():
     check(not any(f.get("banned_in_india") for f in amul["additive_flags"]),
           "Amul Butter: no banned additives")
 
+    # Two-column tables ("per serving / per 100g"): each label keeps its own
+    # first-column value; the second column never spills into the next label
+    maggi_nutrition = parse_nutrition_text(MAGGI_NUTRITION_TEXT)
+    expected = {"calories": 310.0, "saturated_fat_g": 6.0, "trans_fat_g": 0.0,
+                "carbohydrates_g": 38.0, "sugars_g": 1.5, "fiber_g": 1.4, "sodium_mg": 820.0}
+    check(all(maggi_nutrition.get(k) == v for k, v in expected.items()),
+          f"Maggi: two-column nutrition parsed per label {expected}")
+    check("High Sugar" not in maggi["warnings"] and "Contains Trans Fat" not in maggi["warnings"],
+          "Maggi: no High Sugar / Trans Fat warning from the second column")
+    check(parse_nutrition_text("10 g protein\nSodium 200mg")["protein_g"] == 10.0,
+          "Row-leading \"10 g protein\" still linked to its label")
+
+    # Token order matters to the result cache: "corn syrup" only appears
+    # when the two tokens are adjacent, so the reordered label is not a hit
+    nutrition = {"sugars_g": 10.0}
+    adjacent = analyze_label_text(pre_parsed_nutrition=nutrition,
+                                  pre_parsed_ingredients=["waterX", "corn", "syrup", "salt"])
+    apart = analyze_label_text(pre_parsed_nutrition=nutrition,
+                               pre_parsed_ingredients=["corn", "waterX", "salt", "syrup"])
+    check("corn syrup" in adjacent["ultra_processed_markers_found"]
+          and "corn syrup" not in apart["ultra_processed_markers_found"],
+          "Result cache: reordered tokens are a different label")
+
+    # Malformed items (unknown key, not a dict) get their own error result,
+    # whatever else is in the batch; the valid items are still analysed
+    labelled = {"ingredients_text": AMUL_BUTTER_INGREDIENTS_TEXT, "id": 7}
+    batch = analyze_label_texts([{"ingredients_text": PARLEG_INGREDIENTS_TEXT}, labelled, None])
+    alone = analyze_label_texts([labelled])
+    check(len(batch) == 3 and "error" not in batch[0] and all("error" in r for r in batch[1:])
+          and "error" in alone[0] and alone[0]["error"] == batch[1]["error"],
+          "Batch: invalid items get the same error result alone or in a batch")
+
     print(f"\n  Results: {passed} passed, {failed} failed out of {passed + failed} assertions")
 
     if failed > 0:
@@ -0,0 +1,443 @@
+"""
+utils/additive_index.py
+───────────────────────
+One memory-mapped binary index for both additive knowledge files:
+
+  - app/data/additives_db.json                    (AdditivesExpert)
+  - rag_pipeline/knowledge_base/fssai_additives.json (RAG analyzer, embedder)
+
+Entries are merged on their normalised code ("INS 150d" == "INS150D").
+Fields the two files disagree on (name, category) keep one column per
+source, so each subsystem sees exactly the data it used to. Fields without
+a column of their own (or whose value a column can't hold exactly) are kept
+per source as a JSON string, and per-source presence bits keep missing
+fields missing, so expert_entries() / fssai_entries() give back the source
+files' entries. Layout (all little-endian):
+
+    header     magic, version, counts, per-source sha1 + (mtime_ns, size)
+    entries    fixed-size records: string refs + risk columns
+               (risk_level, safety, impact, max_limit_ppm, flags) +
+               per-source presence bits
+    orders     entry ids in additives_db.json order / fssai_additives.json order
+    aliases    per-entry alias string refs (original order and case)
+    codes      sorted (normalised code → entry) table, binary-searched
+    alias keys sorted (lower-case alias → entry) table, binary-searched
+    strings    one UTF-8 blob; every string is an (offset, length) ref
+
+The file is built once (python -m rag_pipeline.utils.additive_index, or
+automatically on first use) and mmap'd read-only, so every worker shares
+the same pages and nothing is JSON-parsed per process. It is rebuilt when
+either source file changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_BACKEND = Path(__file__).resolve().parents[2]
+EXPERT_DB_PATH = _BACKEND / "app" / "data" / "additives_db.json"
+FSSAI_DB_PATH = _BACKEND / "rag_pipeline" / "knowledge_base" / "fssai_additives.json"
+INDEX_PATH = _BACKEND / "rag_pipeline" / "knowledge_base" / "additive_index.bin"
+
+_MAGIC = b"ADIX"
+_VERSION = 2
+
+# magic, version, n_entries, n_expert, n_fssai, n_alias_refs, n_codes,
+# n_alias_keys, expert sha1, fssai sha1, expert (mtime_ns, size),
+# fssai (mtime_ns, size), section offsets (entries, expert order,
+# fssai order, alias refs, codes, alias keys, strings)
+_HEADER = struct.Struct("<4sH6I20s20s4q7I")
+
+# 14 string refs (offset, length), alias_start, alias_count, risk_level,
+# safety, flags, expert presence bits, fssai presence bits, impact,
+# max_limit_ppm
+_STRING_FIELDS = (
+    "expert_id", "fssai_code", "expert_name", "fssai_name", "expert_category",
+    "fssai_category", "description", "health_risks", "fssai_status",
+    "fssai_limit", "tags", "interaction_warnings", "expert_extra", "fssai_extra",
+)
+_ENTRY = struct.Struct("<28IIHBBBHHdd")
+
+# Source fields with a column; presence bit j is set when field j was in the entry
+_EXPERT_FIELDS = (
+    "id", "name", "risk_level", "category", "description", "impact", "tags",
+    "fssai_status", "max_limit_ppm", "interaction_warnings",
+)
+_FSSAI_FIELDS = (
+    "code", "name", "aliases", "category", "safety", "fssai_limit",
+    "health_risks", "banned_in_india",
+)
+_REF = struct.Struct("<II")
+_KEY = struct.Struct("<III")  # string ref + entry id
+
+_RISK_LEVELS = ("", "GREEN", "YELLOW", "ORANGE", "RED")
+_SAFETY = ("", "green", "yellow", "red")
+_IN_EXPERT, _IN_FSSAI, _BANNED, _IMPACT_INT, _PPM_INT = 1, 2, 4, 8, 16
+_LIST_SEP = "\x1f"
+
+_CODE_KEY_RE = re.compile(r"[\s\-]+")
+
+
+def code_key(code: str) -> str:
+    """Normalised lookup key for an additive code ("INS 150d" → "ins150d")."""
+    return _CODE_KEY_RE.sub("", code or "").lower()
+
+
+def _fits_column(field: str, value: Any) -> bool:
+    """True if the column for `field` gives `value` back unchanged."""
+    if field in ("impact", "max_limit_ppm"):
+        return value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+    if field in ("tags", "interaction_warnings"):
+        return isinstance(value, list) and all(
+            isinstance(t, str) and t and _LIST_SEP not in t for t in value)
+    if field == "aliases":
+        return isinstance(value, list) and all(isinstance(a, str) for a in value)
+    if field == "risk_level":
+        return value in _RISK_LEVELS
+    if field == "safety":
+        return value in _SAFETY
+    if field == "banned_in_india":
+        return isinstance(value, bool)
+    return isinstance(value, str)
+
+
+def _split_entry(entry: Dict[str, Any], fields: Tuple[str, ...]) -> Tuple[Dict[str, Any], int, str]:
+    """(column values, presence bits, JSON of everything else) for one source entry."""
+    columns = {k: v for k, v in entry.items() if k in fields and _fits_column(k, v)}
+    extra = {k: v for k, v in entry.items() if k not in columns}
+    present = sum(1 << j for j, k in enumerate(fields) if k in columns)
+    return columns, present, json.dumps(extra, ensure_ascii=False) if extra else ""
+
+
+def _stamp(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+# ── Build ─────────────────────────────────────────────────────────────────────
+
+def build_index(expert_raw: bytes, fssai_raw: bytes,
+                stamps: Tuple[Tuple[int, int], Tuple[int, int]] = ((0, 0), (0, 0))) -> bytes:
+    """Merge the two JSON sources into the binary index layout."""
+    expert: List[Dict[str, Any]] = json.loads(expert_raw) if expert_raw else []
+    fssai: List[Dict[str, Any]] = json.loads(fssai_raw) if fssai_raw else []
+
+    merged: List[Dict[str, Any]] = []
+    by_key: Dict[str, int] = {}
+    expert_order: List[int] = []
+    fssai_order: List[int] = []
+
+    def slot(code: str, source: str) -> int:
+        key = code_key(code)
+        i = by_key.get(key)
+        if i is None or source in merged[i]:  # new code, or a duplicate within one file
+            i = len(merged)
+            merged.append({})
+            by_key.setdefault(key, i)
+        return i
+
+    for entry in expert:
+        i = slot(entry.get("id", ""), "expert")
+        merged[i]["expert"] = entry
+        expert_order.append(i)
+    for entry in fssai:
+        i = slot(entry.get("code", ""), "fssai")
+        merged[i]["fssai"] = entry
+        fssai_order.append(i)
+
+    strings = bytearray()
+    string_refs: Dict[str, Tuple[int, int]] = {}
+
+    def ref(text: Optional[str]) -> Tuple[int, int]:
+        text = text or ""
+        if text not in string_refs:
+            data = text.encode("utf-8")
+            string_refs[text] = (len(strings), len(data))
+            strings.extend(data)
+        return string_refs[text]
+
+    entries = bytearray()
+    alias_refs = bytearray()
+    n_alias_refs = 0
+    codes: List[Tuple[str, int]] = []
+    alias_keys: Dict[str, int] = {}
+    for i, record in enumerate(merged):
+        e, e_present, e_extra = _split_entry(record.get("expert") or {}, _EXPERT_FIELDS)
+        f, f_present, f_extra = _split_entry(record.get("fssai") or {}, _FSSAI_FIELDS)
+        fields = {
+            "expert_id": e.get("id"), "fssai_code": f.get("code"),
+            "expert_name": e.get("name"), "fssai_name": f.get("name"),
+            "expert_category": e.get("category"), "fssai_category": f.get("category"),
+            "description": e.get("description"), "health_risks": f.get("health_risks"),
+            "fssai_status": e.get("fssai_status"), "fssai_limit": f.get("fssai_limit"),
+            "tags": _LIST_SEP.join(e.get("tags", [])),
+            "interaction_warnings": _LIST_SEP.join(e.get("interaction_warnings", [])),
+            "expert_extra": e_extra, "fssai_extra": f_extra,
+        }
+        refs = [n for name in _STRING_FIELDS for n in ref(fields[name])]
+        aliases = f.get("aliases", [])
+        impact = e.get("impact")
+        ppm = e.get("max_limit_ppm")
+        flags = ((_IN_EXPERT if "expert" in record else 0) | (_IN_FSSAI if "fssai" in record else 0)
+                 | (_BANNED if f.get("banned_in_india") else 0)
+                 | (_IMPACT_INT if isinstance(impact, int) else 0)
+                 | (_PPM_INT if isinstance(ppm, int) else 0))
+        entries.extend(_ENTRY.pack(
+            *refs, n_alias_refs, len(aliases),
+            _RISK_LEVELS.index(e["risk_level"]) if e.get("risk_level") in _RISK_LEVELS else 0,
+            _SAFETY.index(f["safety"]) if f.get("safety") in _SAFETY else 0,
+            flags, e_present, f_present,
+            float(impact) if impact is not None else math.nan,
+            float(ppm) if ppm is not None else math.nan,
+        ))
+        for alias in aliases:
+            alias_refs.extend(_REF.pack(*ref(alias)))
+            n_alias_refs += 1
+            alias_keys.setdefault(alias.lower().strip(), i)
+        for code in {e.get("id"), f.get("code")} - {None, ""}:
+            codes.append((code_key(code), i))
+
+    def key_table(pairs: List[Tuple[str, int]]) -> bytes:
+        out = bytearray()
+        for key, i in sorted(pairs, key=lambda p: p[0].encode("utf-8")):
+            out.extend(_KEY.pack(*ref(key), i))
+        return bytes(out)
+
+    codes_blob = key_table(list(dict(codes).items()))
+    alias_blob = key_table(list(alias_keys.items()))
+    sections = [
+        bytes(entries),
+        struct.pack(f"<{len(expert_order)}I", *expert_order),
+        struct.pack(f"<{len(fssai_order)}I", *fssai_order),
+        bytes(alias_refs),
+        codes_blob,
+        alias_blob,
+        bytes(strings),
+    ]
+    offsets = []
+    pos = _HEADER.size
+    for blob in sections:
+        offsets.append(pos)
+        pos += len(blob)
+
+    header = _HEADER.pack(
+        _MAGIC, _VERSION, len(merged), len(expert_order), len(fssai_order),
+        n_alias_refs, len(codes_blob) // _KEY.size, len(alias_blob) // _KEY.size,
+        hashlib.sha1(expert_raw).digest(), hashlib.sha1(fssai_raw).digest(),
+        *stamps[0], *stamps[1], *offsets,
+    )
+    return header + b"".join(sections)
+
+
+# ── Reader ────────────────────────────────────────────────────────────────────
+
+class AdditiveIndex:
+    """Read-only view over an index buffer (usually an mmap of the file)."""
+
+    def __init__(self, buf, source: str = "<memory>"):
+        self._buf = buf
+        self._mv = memoryview(buf)
+        self.source = source
+        (magic, version, self.n_entries, self.n_expert, self.n_fssai, _, self.n_codes,
+         self.n_alias_keys, expert_sha1, fssai_sha1, em, es, fm, fs,
+         self._entries_off, self._expert_off, self._fssai_off, self._alias_off,
+         self._codes_off, self._alias_keys_off, self._strings_off) = _HEADER.unpack_from(self._mv, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"not an additive index (v{_VERSION}): {source}")
+        self.expert_sha1 = expert_sha1.hex()
+        self.fssai_sha1 = fssai_sha1.hex()
+        self.stamps = ((em, es), (fm, fs))
+
+    # ── Low-level access ─────────────────────────────────────────────────────
+
+    def _str(self, offset: int, length: int) -> str:
+        start = self._strings_off + offset
+        return str(self._mv[start:start + length], "utf-8")
+
+    def _record(self, i: int) -> tuple:
+        return _ENTRY.unpack_from(self._mv, self._entries_off + i * _ENTRY.size)
+
+    def _strings(self, rec: tuple) -> List[str]:
+        return [self._str(rec[k], rec[k + 1]) for k in range(0, 2 * len(_STRING_FIELDS), 2)]
+
+    @staticmethod
+    def _source_dict(values: Dict[str, Any], fields: Tuple[str, ...], present: int,
+                     extra: str) -> Dict[str, Any]:
+        entry = {k: values[k] for j, k in enumerate(fields) if present >> j & 1}
+        if extra:
+            entry.update(json.loads(extra))
+        return entry
+
+    def _search(self, table_off: int, count: int, key: str) -> Optional[int]:
+        target = key.encode("utf-8")
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off, length, entry = _KEY.unpack_from(self._mv, table_off + mid * _KEY.size)
+            start = self._strings_off + off
+            probe = bytes(self._mv[start:start + length])
+            if probe == target:
+                return entry
+            if probe < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def find(self, text: str) -> Optional[int]:
+        """Entry id for an additive code ("INS 621", "e621") or alias, else None."""
+        hit = self._search(self._codes_off, self.n_codes, code_key(text))
+        if hit is None:
+            hit = self._search(self._alias_keys_off, self.n_alias_keys, (text or "").lower().strip())
+        return hit
+
+    # ── Source-shaped dicts ──────────────────────────────────────────────────
+
+    def _order(self, offset: int, count: int) -> Tuple[int, ...]:
+        return struct.unpack_from(f"<{count}I", self._mv, offset)
+
+    def expert_entry(self, i: int) -> Dict[str, Any]:
+        """Entry i in the additives_db.json shape."""
+        rec = self._record(i)
+        s = self._strings(rec)
+        flags, impact, ppm = rec[32], rec[35], rec[36]
+        values = {
+            "id": s[0], "name": s[2], "risk_level": _RISK_LEVELS[rec[30]],
+            "category": s[4], "description": s[6],
+            "impact": None if math.isnan(impact) else (int(impact) if flags & _IMPACT_INT else impact),
+            "tags": s[10].split(_LIST_SEP) if s[10] else [],
+            "fssai_status": s[8],
+            "max_limit_ppm": None if math.isnan(ppm) else (int(ppm) if flags & _PPM_INT else ppm),
+            "interaction_warnings": s[11].split(_LIST_SEP) if s[11] else [],
+        }
+        return self._source_dict(values, _EXPERT_FIELDS, rec[33], s[12])
+
+    def fssai_entry(self, i: int) -> Dict[str, Any]:
+        """Entry i in the fssai_additives.json shape."""
+        rec = self._record(i)
+        s = self._strings(rec)
+        alias_start, alias_count = rec[28], rec[29]
+        aliases = [
+            self._str(*_REF.unpack_from(self._mv, self._alias_off + j * _REF.size))
+            for j in range(alias_start, alias_start + alias_count)
+        ]
+        values = {
+            "code": s[1], "name": s[3], "aliases": aliases, "category": s[5],
+            "safety": _SAFETY[rec[31]], "fssai_limit": s[9], "health_risks": s[7],
+            "banned_in_india": bool(rec[32] & _BANNED),
+        }
+        return self._source_dict(values, _FSSAI_FIELDS, rec[34], s[13])
+
+    def expert_entries(self) -> List[Dict[str, Any]]:
+        return [self.expert_entry(i) for i in self._order(self._expert_off, self.n_expert)]
+
+    def fssai_entries(self) -> List[Dict[str, Any]]:
+        return [self.fssai_entry(i) for i in self._order(self._fssai_off, self.n_fssai)]
+
+
+# ── Open / build on demand ────────────────────────────────────────────────────
+
+_open_indexes: Dict[Tuple[str, str, str], AdditiveIndex] = {}
+
+
+def _map_file(path: Path) -> AdditiveIndex:
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return AdditiveIndex(buf, str(path))
+
+
+def _write_index(data: bytes, index_path: Path) -> None:
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, index_path)
+
+
+def _source_stamps(expert_path: Path, fssai_path: Path) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    return tuple(_stamp(p) if p.exists() else (0, 0) for p in (expert_path, fssai_path))  # type: ignore[return-value]
+
+
+def rebuild_index(
+    expert_path: Path = EXPERT_DB_PATH,
+    fssai_path: Path = FSSAI_DB_PATH,
+    index_path: Optional[Path] = INDEX_PATH,
+) -> AdditiveIndex:
+    """Merge the sources into a new index; persisted atomically if index_path is set."""
+    expert_path, fssai_path = Path(expert_path), Path(fssai_path)
+    stamps = _source_stamps(expert_path, fssai_path)
+    raw = [p.read_bytes() if p.exists() else b"" for p in (expert_path, fssai_path)]
+    data = build_index(raw[0], raw[1], stamps)
+    index = None
+    if index_path is not None:
+        try:
+            _write_index(data, Path(index_path))
+            index = _map_file(Path(index_path))
+        except OSError as exc:
+            logger.warning("Additive index: could not persist %s: %s", index_path, exc)
+    if index is None:
+        index = AdditiveIndex(data)
+    logger.info("Additive index: built %d entries (%d expert, %d fssai) from %s + %s",
+                index.n_entries, index.n_expert, index.n_fssai, expert_path.name, fssai_path.name)
+    return index
+
+
+def open_index(
+    expert_path: Path = EXPERT_DB_PATH,
+    fssai_path: Path = FSSAI_DB_PATH,
+    index_path: Optional[Path] = None,
+) -> AdditiveIndex:
+    """
+    The index for these source files, mmap'd from disk.
+
+    A stat of both sources decides whether the mapped (or on-disk) index is
+    still current; only on a change is it rebuilt, written atomically so
+    other workers keep their current mapping until they reopen. Sources
+    other than the defaults get an in-memory index unless index_path is
+    given.
+    """
+    expert_path, fssai_path = Path(expert_path).resolve(), Path(fssai_path).resolve()
+    if index_path is None and expert_path == EXPERT_DB_PATH and fssai_path == FSSAI_DB_PATH:
+        index_path = INDEX_PATH
+    cache_key = (str(expert_path), str(fssai_path), str(index_path))
+
+    stamps = _source_stamps(expert_path, fssai_path)
+    current = _open_indexes.get(cache_key)
+    if current is not None and current.stamps == stamps:
+        return current
+    if index_path is not None and Path(index_path).exists():
+        try:
+            current = _map_file(Path(index_path))
+        except (OSError, ValueError) as exc:
+            logger.warning("Additive index: %s unreadable (%s) — rebuilding", index_path, exc)
+            current = None
+    if current is None or current.stamps != stamps:
+        current = rebuild_index(expert_path, fssai_path, index_path)
+    _open_indexes[cache_key] = current
+    return current
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if len(sys.argv) > 2 and sys.argv[1] == "lookup":
+        idx = open_index()
+        for query in sys.argv[2:]:
+            hit = idx.find(query)
+            print(f"{query!r}: " + ("not found" if hit is None else json.dumps(
+                {"expert": idx.expert_entry(hit), "fssai": idx.fssai_entry(hit)}, ensure_ascii=False)))
+    else:
+        idx = rebuild_index()
+        print(f"{INDEX_PATH}: {os.path.getsize(INDEX_PATH)} bytes, {idx.n_entries} entries, "
+              f"{idx.n_codes} codes, {idx.n_alias_keys} aliases")
@@ -0,0 +1,213 @@
+"""
+utils/ann_index.py
+───────────────────
+Inner-product indexes for the RAG vector store, from exact to approximate:
+
+  flat   exact scan of every vector (IndexFlatIP, or NumPy over the
+         memory-mapped embeddings). Right for the ~100 FSSAI entries.
+  hnsw   faiss IndexHNSWFlat graph. Build knobs: M (links per node) and
+         efConstruction. Search knob: efSearch (higher → better recall,
+         slower). Needs faiss.
+  ivf    inverted file: k-means into `nlist` cells, a query scans only its
+         `nprobe` closest cells. faiss IndexIVFFlat when installed, else the
+         NumPy IvfFlatIP below (same algorithm, saved as ivf.npz).
+
+All indexes expose faiss's interface: `ntotal` and
+`search(queries, k) -> (scores, ids)` with ids of -1 for empty slots.
+Vectors are L2-normalised, so scores are cosine similarities.
+
+Build parameters are recorded in the vector store manifest; search
+parameters are applied at load time (RAG_ANN_EF_SEARCH, RAG_ANN_NPROBE)
+so recall / latency can be tuned without rebuilding.
+rag_pipeline/bench_ann.py measures recall@k and latency against flat.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+
+DEFAULT_HNSW_M = 32
+DEFAULT_HNSW_EF_CONSTRUCTION = 200
+DEFAULT_HNSW_EF_SEARCH = 64
+DEFAULT_IVF_NPROBE = 8
+_KMEANS_ITERATIONS = 10
+# k-means trains on at most this many points per cell (faiss uses 256)
+_KMEANS_POINTS_PER_CELL = 64
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+def default_nlist(n: int) -> int:
+    """IVF cell count for n vectors: 4·√n, the usual starting point."""
+    return max(1, min(n, int(4 * math.sqrt(n))))
+
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Best k of one query's candidate (scores, ids), padded with -1."""
+    out_scores = np.zeros(k, dtype=np.float32)
+    out_ids = np.full(k, -1, dtype=np.int64)
+    if not len(ids):
+        return out_scores, out_ids
+    n = min(k, len(ids))
+    top = np.argpartition(-scores, n - 1)[:n] if n < len(ids) else np.arange(len(ids))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    out_scores[:n] = scores[top]
+    out_ids[:n] = ids[top]
+    return out_scores, out_ids
+
+
+class FlatIP:
+    """IndexFlatIP-compatible exact search over (memory-mapped) embeddings."""
+
+    def __init__(self, embeddings: np.ndarray):
+        self.embeddings = embeddings
+        self.ntotal = int(embeddings.shape[0])
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = queries @ self.embeddings.T
+        k = min(k, self.ntotal)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+
+class IvfFlatIP:
+    """
+    IndexIVFFlat-compatible inverted file in NumPy.
+
+    `centroids` are unit-norm k-means centres; `list_ids` holds the entry
+    ids grouped by cell, cell c being list_ids[offsets[c]:offsets[c + 1]].
+    Vectors stay in the shared embeddings array and are gathered per query.
+    """
+
+    def __init__(self, embeddings: np.ndarray, centroids: np.ndarray,
+                 list_ids: np.ndarray, offsets: np.ndarray, nprobe: int = DEFAULT_IVF_NPROBE):
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.list_ids = list_ids
+        self.offsets = offsets
+        self.ntotal = int(embeddings.shape[0])
+        self.nlist = int(centroids.shape[0])
+        self.nprobe = nprobe
+
+    @classmethod
+    def train(cls, embeddings: np.ndarray, nlist: int, seed: int = 0) -> "IvfFlatIP":
+        """Spherical k-means over (a sample of) the vectors, then assign all."""
+        rng = np.random.default_rng(seed)
+        n = embeddings.shape[0]
+        nlist = max(1, min(nlist, n))
+        sample_size = min(n, nlist * _KMEANS_POINTS_PER_CELL)
+        sample = np.asarray(embeddings[np.sort(rng.choice(n, sample_size, replace=False))], dtype=np.float32)
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(_KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            if empty.any():   # reseed empty cells with random points
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+        assign = np.concatenate([
+            np.argmax(np.asarray(embeddings[start:start + 8192], dtype=np.float32) @ centroids.T, axis=1)
+            for start in range(0, n, 8192)
+        ])
+        list_ids = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(assign[list_ids], np.arange(nlist + 1)).astype(np.int64)
+        return cls(embeddings, centroids.astype(np.float32), list_ids, offsets)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        nprobe = max(1, min(self.nprobe, self.nlist))
+        cell_scores = queries @ self.centroids.T
+        cells = np.argpartition(-cell_scores, nprobe - 1, axis=1)[:, :nprobe]
+        scores = np.zeros((len(queries), k), dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, probe) in enumerate(zip(queries, cells)):
+            candidates = np.concatenate([self.list_ids[self.offsets[c]:self.offsets[c + 1]] for c in probe])
+            candidates.sort()   # sequential reads from the memory map
+            scores[row], ids[row] = _top_k(self.embeddings[candidates] @ query, candidates, k)
+        return scores, ids
+
+    def save(self, path: Path) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, centroids=self.centroids, list_ids=self.list_ids, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, path: Path, embeddings: np.ndarray) -> "IvfFlatIP":
+        with np.load(path) as data:
+            return cls(embeddings, data["centroids"], data["list_ids"], data["offsets"])
+
+
+def build_index(embeddings: np.ndarray, index_type: str = "flat",
+                params: Optional[Dict[str, int]] = None) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Build an index over normalised float32 `embeddings`.
+
+    Returns (index, manifest info). The index is a faiss index when faiss
+    is installed, else FlatIP / IvfFlatIP. Raises RuntimeError for "hnsw"
+    without faiss and ValueError for an unknown type.
+    """
+    params = dict(params or {})
+    n, dim = embeddings.shape
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"unknown index type {index_type!r} (expected one of {', '.join(INDEX_TYPES)})")
+    info: Dict[str, Any] = {"type": index_type, "backend": "faiss" if faiss is not None else "numpy"}
+
+    if index_type == "flat":
+        if faiss is None:
+            return FlatIP(embeddings), info
+        index = faiss.IndexFlatIP(dim)
+        index.add(embeddings)
+        return index, info
+
+    if index_type == "hnsw":
+        if faiss is None:
+            raise RuntimeError("an HNSW index needs faiss (pip install faiss-cpu)")
+        info["m"] = int(params.get("m") or DEFAULT_HNSW_M)
+        info["ef_construction"] = int(params.get("ef_construction") or DEFAULT_HNSW_EF_CONSTRUCTION)
+        index = faiss.IndexHNSWFlat(dim, info["m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = info["ef_construction"]
+        index.add(embeddings)
+        return index, info
+
+    info["nlist"] = int(params.get("nlist") or default_nlist(n))
+    if faiss is None:
+        return IvfFlatIP.train(embeddings, info["nlist"]), info
+    quantizer = faiss.IndexFlatIP(dim)
+    index = faiss.IndexIVFFlat(quantizer, dim, info["nlist"], faiss.METRIC_INNER_PRODUCT)
+    index.train(embeddings)
+    index.add(embeddings)
+    return index, info
+
+
+def set_search_params(index: Any, ef_search: Optional[int] = None, nprobe: Optional[int] = None) -> None:
+    """Apply the recall / speed knobs that `index` has (efSearch, nprobe)."""
+    hnsw = getattr(index, "hnsw", None)
+    if hnsw is not None:
+        hnsw.efSearch = int(ef_search or DEFAULT_HNSW_EF_SEARCH)
+    if hasattr(index, "nprobe"):
+        index.nprobe = int(nprobe or DEFAULT_IVF_NPROBE)
+
+
+def read_faiss_index(path: Path) -> Any:
+    """Read index.faiss memory-mapped where faiss supports it, else into memory."""
+    try:
+        return faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(str(path))
+
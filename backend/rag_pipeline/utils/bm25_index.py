@@ -0,0 +1,77 @@
+"""
+utils/bm25_index.py
+────────────────────
+Token inverted index with BM25 ranking for keyword retrieval.
+
+Built once per KB version: every entry text is split into lower-case word
+tokens and each token keeps a posting list of (entry id, BM25 term weight).
+The weights already include IDF and length normalisation, so a query only
+walks the postings of its own tokens and sums — cost grows with the number
+of matching entries, not with the size of the KB — and the results come
+back ranked.
+
+    index = BM25Index([_entry_to_text(e) for e in entries])
+    scores, ids = index.search(["sodium benzoate"], k=3)   # faiss-style, -1 = no hit
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Standard BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class BM25Index:
+    """Inverted index: token → [(entry id, BM25 weight)], ranked OR queries."""
+
+    def __init__(self, texts: Sequence[str]):
+        docs = [Counter(tokenize(t)) for t in texts]
+        self.ntotal = len(docs)
+        lengths = [sum(tf.values()) for tf in docs]
+        avg_len = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+        df: Counter = Counter()
+        for tf in docs:
+            df.update(tf.keys())
+
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc_id, (tf, length) in enumerate(zip(docs, lengths)):
+            norm = _K1 * (1 - _B + _B * length / avg_len) if avg_len else _K1
+            for token, count in tf.items():
+                idf = math.log(1 + (self.ntotal - df[token] + 0.5) / (df[token] + 0.5))
+                self._postings.setdefault(token, []).append(
+                    (doc_id, idf * count * (_K1 + 1) / (count + norm))
+                )
+
+    def _top(self, query: str, k: int) -> List[Tuple[float, int]]:
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            for doc_id, weight in self._postings.get(token, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        # Best score first, ties in KB order
+        return heapq.nsmallest(k, ((-s, d) for d, s in scores.items()))
+
+    def search(self, queries: Sequence[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, ids) per query, best first; ids are -1 where nothing matched."""
+        k = max(1, k)
+        scores = np.zeros((len(queries), k), dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, query in enumerate(queries):
+            for col, (neg_score, doc_id) in enumerate(self._top(query, k)):
+                scores[row, col] = -neg_score
+                ids[row, col] = doc_id
+        return scores, ids
@@ -1,44 +1,148 @@
 """
 utils/embedder.py
 ──────────────────
-FAISS-based vector store for FSSAI additive knowledge base.
+Vector store for the FSSAI additive knowledge base.
 
 Behaviour:
-  - On first call, builds a flat FAISS index from fssai_additives.json and
-    persists it to vector_store/index.faiss + vector_store/id_map.json.
-  - On subsequent calls, loads the cached index (fast).
+  - `python -m rag_pipeline.utils.embedder` builds a versioned artifact in
+    vector_store/ from fssai_additives.json (read through
+    utils/additive_index.py):
+        embeddings.npy   L2-normalised float32 entry embeddings
+        index.faiss      faiss index over the same vectors (if faiss is installed)
+        ivf.npz          NumPy IVF cells (--index ivf without faiss)
+        id_map.json      entry dicts in vector order
+        manifest.json    format version, model, KB hash, index, count, dim
+    The manifest is written last, so a half-written build is never loaded.
+  - The index defaults to exact flat search. `--index hnsw|ivf` builds an
+    approximate one (utils/ann_index.py) and `--taxonomy FILE...` adds Open
+    Food Facts taxonomy entries (utils/off_taxonomy.py) to the FSSAI KB, for
+    stores of tens of thousands of vectors. RAG_ANN_EF_SEARCH / RAG_ANN_NPROBE
+    trade recall for speed at load time; rag_pipeline/bench_ann.py measures
+    recall@k and latency against the exact index.
+  - Workers load the artifact read-only: embeddings.npy is memory-mapped
+    (shared through the page cache) and searched by inner product, through
+    faiss when installed or NumPy otherwise. Requests never build or
+    re-embed; a missing artifact means n-gram retrieval, and an artifact
+    whose KB hash no longer matches fssai_additives.json (or the taxonomy
+    files it was built from, re-hashed when they are still on disk) is
+    served with a "rebuild" warning. A new build is picked up on the next request.
+  - Similarity is cosine (inner product of normalised vectors).
+  - Without a usable vector store or model, retrieval uses the hashed char
+    n-gram TF-IDF index in utils/ngram_index.py (pure NumPy, built from the
+    KB in milliseconds). RAG_RETRIEVAL_BACKEND selects "auto" (default),
+    "ngram" (lean deployments: never imports torch or faiss) or "keyword"
+    (BM25 over a token inverted index, utils/bm25_index.py). Both indexes
+    are built from the KB on first use and rebuilt when its content changes.
   - Provides retrieve_context() to find the top-k most similar additive
-    entries for a given ingredient or query string.
+    entries for a given ingredient or query string, and
+    retrieve_context_batch() to answer every query of a label with one
+    encode and one search.
+  - The model is all-MiniLM-L6-v2, run either by sentence-transformers
+    (torch) or as the int8 ONNX export in utils/onnx_encoder.py
+    (onnxruntime, no torch; faster cold start, far less RSS). RAG_EMBEDDER
+    picks "auto" (sentence-transformers until ONNX retrieval is shown to
+    match it), "onnx" or "sentence-transformers"; rag_pipeline/bench_embedder.py
+    compares the two and tests/test_onnx_equivalence.py checks top-1 agreement.
+  - Query embeddings go through utils/embedding_cache.py (in-memory LRU +
+    vector_store/embedding_cache.db), so repeated additive queries skip the
+    transformer, and a fully cached label does not even load it.
 
 Design note:
-  For 100-200 additive entries, FAISS is used for extensibility (future
-  upload of full FSSAI regulation PDFs). For the current knowledge base,
-  a linear scan would also be fast enough. The FAISS index is rebuilt
-  when the knowledge base JSON is newer than the cached index file.
+  When running inside the Flask backend, the model and the index register
+  with app.utils.model_lifecycle so idle workers can unload them; the lazy
+  loaders below reload them on the next call.
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import os
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag_pipeline.utils import ann_index
+from rag_pipeline.utils.additive_index import open_index
+from rag_pipeline.utils.bm25_index import BM25Index
+from rag_pipeline.utils.embedding_cache import EmbeddingCache
+from rag_pipeline.utils.ngram_index import NgramIndex
+from rag_pipeline.utils import onnx_encoder
+from rag_pipeline.utils.off_taxonomy import e_number_key, file_sha1, taxonomy_entries
 
 logger = logging.getLogger(__name__)
 
+# Retrieval backend: "auto" (vector store, else char n-grams), "ngram"
+# (pure NumPy, never touches torch/faiss) or "keyword" (substring scan)
+try:
+    from app.config import RAG_RETRIEVAL_BACKEND as _RETRIEVAL_BACKEND
+except Exception:
+    _RETRIEVAL_BACKEND = os.getenv("RAG_RETRIEVAL_BACKEND", "auto").lower()
+
+# Embedding model runtime: "auto" (currently sentence-transformers; the
+# int8 ONNX export is opt-in), "onnx" or "sentence-transformers"
+try:
+    from app.config import RAG_EMBEDDER as _EMBEDDER_SETTING
+except Exception:
+    _EMBEDDER_SETTING = os.getenv("RAG_EMBEDDER", "auto").lower()
+
+# Search-time knobs of approximate indexes: HNSW efSearch and IVF nprobe
+# (higher → better recall, slower); ignored by the exact flat index
+try:
+    from app.config import RAG_ANN_EF_SEARCH as _ANN_EF_SEARCH, RAG_ANN_NPROBE as _ANN_NPROBE
+except Exception:
+    _ANN_EF_SEARCH = int(os.getenv("RAG_ANN_EF_SEARCH", str(ann_index.DEFAULT_HNSW_EF_SEARCH)))
+    _ANN_NPROBE = int(os.getenv("RAG_ANN_NPROBE", str(ann_index.DEFAULT_IVF_NPROBE)))
+
+# Optional model-lifecycle tracking (only available inside the Flask backend)
+try:
+    from app.utils.model_lifecycle import lifecycle as _lifecycle
+except Exception:
+    _lifecycle = None
+
+
+def _track_loading(name: str, unload):
+    return _lifecycle.loading(name, unload=unload) if _lifecycle else nullcontext()
+
+
+def _track_use(name: str) -> None:
+    if _lifecycle:
+        _lifecycle.touch(name)
+
 # ── Paths ─────────────────────────────────────────────────────────────────────
 _HERE = Path(__file__).resolve().parent.parent          # rag_pipeline/
-_KB_PATH = _HERE / "knowledge_base" / "fssai_additives.json"
 _VS_DIR = _HERE / "vector_store"
 _INDEX_PATH = _VS_DIR / "index.faiss"
+_IVF_PATH = _VS_DIR / "ivf.npz"
 _ID_MAP_PATH = _VS_DIR / "id_map.json"
+_EMBEDDINGS_PATH = _VS_DIR / "embeddings.npy"
+_MANIFEST_PATH = _VS_DIR / "manifest.json"
+_EMBED_CACHE_PATH = _VS_DIR / "embedding_cache.db"
+
+_MODEL_NAME = "all-MiniLM-L6-v2"
+if _EMBEDDER_SETTING == "onnx":
+    _ENCODER = "onnx-int8"
+else:
+    _ENCODER = "sentence-transformers"
+# Bump when the artifact layout or _entry_to_text changes
+_ARTIFACT_VERSION = 2
 
 # ── Module-level cache ────────────────────────────────────────────────────────
 _faiss_index = None
 _id_map: Optional[List[Dict[str, Any]]] = None
+_artifact_stamp: Optional[Tuple[int, int]] = None
+# Current KB entries and the n-gram / BM25 indexes over them; cleared when
+# the content hash of fssai_additives.json changes
+_kb_state: Dict[str, Any] = {}
+# Cosine below this is noise for n-gram matches ("xyzzy" → Xylitol at 0.06)
+_NGRAM_MIN_SCORE = 0.1
 _model = None
+# Query embeddings (LRU + SQLite); a fully cached batch never loads the model
+_query_cache = EmbeddingCache(f"{_MODEL_NAME}/{_ENCODER}", _EMBED_CACHE_PATH)
 
 # ── Text representation for an additive entry ─────────────────────────────────
 
@@ -54,96 +158,306 @@ def _entry_to_text(entry: Dict[str, Any]) -> str:
     return " | ".join(p for p in parts if p).strip()
 
 
+def _entry_to_key_text(entry: Dict[str, Any]) -> str:
+    """
+    Identifying fields only (code, name, aliases, category) for n-gram
+    matching; the health-risk prose would dilute the char n-gram vectors.
+    """
+    parts = [
+        entry.get("code", ""),
+        entry.get("name", ""),
+        " ".join(entry.get("aliases", [])),
+        entry.get("category", ""),
+    ]
+    return " ".join(p for p in parts if p)
+
+
 # ── Model loader (lazy) ────────────────────────────────────────────────────────
 
+def _unload_model() -> None:
+    global _model
+    _model = None
+
+
+def _load_sentence_transformer():
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning(
+            "sentence-transformers not installed. "
+            "RAG retrieval will fall back to n-gram / BM25 matching."
+        )
+        return None
+    logger.info("RAG Embedder: loading sentence-transformers model…")
+    with _track_loading("sentence_transformer", _unload_model):
+        model = SentenceTransformer(_MODEL_NAME)
+    logger.info("RAG Embedder: model loaded.")
+    return model
+
+
+def _load_onnx_encoder():
+    try:
+        logger.info("RAG Embedder: loading int8 ONNX %s…", _MODEL_NAME)
+        with _track_loading("onnx_encoder", _unload_model):
+            model = onnx_encoder.OnnxSentenceEncoder()
+    except Exception as exc:
+        logger.warning("ONNX encoder unavailable (%s). RAG retrieval will fall back to "
+                       "n-gram matching; export it with `python -m rag_pipeline.utils.onnx_encoder`.", exc)
+        return None
+    logger.info("RAG Embedder: ONNX model loaded.")
+    return model
+
+
 def _get_model():
-    """Load SentenceTransformer model (cached in module scope)."""
+    """Load the embedding model for _ENCODER (cached in module scope)."""
     global _model
     if _model is None:
-        try:
-            from sentence_transformers import SentenceTransformer
-            logger.info("RAG Embedder: loading sentence-transformers model…")
-            _model = SentenceTransformer("all-MiniLM-L6-v2")
-            logger.info("RAG Embedder: model loaded.")
-        except ImportError:
-            logger.warning(
-                "sentence-transformers not installed. "
-                "RAG retrieval will fall back to keyword matching."
-            )
-            _model = None
+        _model = _load_onnx_encoder() if _ENCODER == "onnx-int8" else _load_sentence_transformer()
+    if _model is not None:
+        _track_use("onnx_encoder" if _ENCODER == "onnx-int8" else "sentence_transformer")
     return _model
 
 
-# ── FAISS index builder ────────────────────────────────────────────────────────
+# ── Artifact builder ──────────────────────────────────────────────────────────
 
-def _build_index(entries: List[Dict[str, Any]]):
-    """Build and persist a FAISS Flat L2 index from the additive entries."""
-    try:
-        import faiss
-        import numpy as np
-    except ImportError as e:
-        logger.warning("FAISS not available: %s. Vector retrieval disabled.", e)
-        return None, entries
+def _artifact_hash(fssai_sha1: str, taxonomy: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Hash of the KB content (+ taxonomy files), the embedding model and the artifact format."""
+    key = f"{fssai_sha1}:{_MODEL_NAME}:{_ARTIFACT_VERSION}"
+    if taxonomy:
+        key += ":" + ":".join(t["sha1"] for t in taxonomy)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _current_taxonomy(taxonomy: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Manifest taxonomy records with the sha1 of each file as it is now (when it still exists)."""
+    current = []
+    for record in taxonomy or []:
+        path = Path(record["path"]) if record.get("path") else None
+        current.append({**record, "sha1": file_sha1(path)} if path and path.is_file() else record)
+    return current
+
+
+def _replace(path: Path, write) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def build_vector_store(
+    index_type: str = "flat",
+    params: Optional[Dict[str, int]] = None,
+    taxonomy_paths: Sequence[Path] = (),
+) -> Dict[str, Any]:
+    """
+    Embed every KB entry and write the artifact to vector_store/.
+
+    Args:
+        index_type:     "flat" (exact), "hnsw" or "ivf" — see utils/ann_index.py.
+        params:         build knobs: m, ef_construction (hnsw), nlist (ivf).
+        taxonomy_paths: Open Food Facts taxonomy files appended to the FSSAI
+                        entries (additives the KB already has are skipped).
 
+    Returns the manifest. Raises RuntimeError if the embedding model
+    (see RAG_EMBEDDER) cannot be loaded, or for "hnsw" without faiss.
+    """
+    if index_type not in ann_index.INDEX_TYPES:
+        raise ValueError(f"unknown index type {index_type!r}")
     model = _get_model()
     if model is None:
-        return None, entries
-
+        raise RuntimeError(f"the {_ENCODER} embedding model is required to build the vector store")
+
+    index = open_index()
+    entries = index.fssai_entries()
+    taxonomy = []
+    if taxonomy_paths:
+        known = {e_number_key(c) for e in entries for c in (e.get("code", ""), *e.get("aliases", []))}
+        for path in taxonomy_paths:
+            extra = taxonomy_entries([path], known - {""})
+            known |= {e_number_key(str(e["code"])) for e in extra}
+            taxonomy.append({"file": Path(path).name, "path": str(Path(path).resolve()),
+                             "sha1": file_sha1(path), "entries": len(extra)})
+            entries = entries + extra
     texts = [_entry_to_text(e) for e in entries]
-    logger.info("RAG Embedder: encoding %d additive entries…", len(texts))
+    logger.info("RAG Embedder: encoding %d entries…", len(texts))
     t0 = time.time()
-    embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-    embeddings = embeddings.astype("float32")
+    embeddings = np.asarray(
+        model.encode(texts, convert_to_numpy=True, show_progress_bar=False), dtype=np.float32
+    )
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
     logger.info("RAG Embedder: encoded in %.2fs", time.time() - t0)
 
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(embeddings)
+    t0 = time.time()
+    search_index, index_info = ann_index.build_index(embeddings, index_type, params)
+    logger.info("RAG Embedder: %s index (%s) built in %.2fs",
+                index_type, index_info["backend"], time.time() - t0)
+    is_faiss = index_info["backend"] == "faiss"
+
+    def save_embeddings(tmp: Path) -> None:
+        with open(tmp, "wb") as f:
+            np.save(f, embeddings)
 
-    # Persist
     _VS_DIR.mkdir(parents=True, exist_ok=True)
-    faiss.write_index(index, str(_INDEX_PATH))
-    with open(_ID_MAP_PATH, "w", encoding="utf-8") as f:
-        json.dump(entries, f, indent=2, ensure_ascii=False)
+    _replace(_EMBEDDINGS_PATH, save_embeddings)
+    _replace(_ID_MAP_PATH, lambda tmp: tmp.write_text(
+        json.dumps(entries, indent=2, ensure_ascii=False), encoding="utf-8"))
+    if is_faiss:
+        _replace(_INDEX_PATH, lambda tmp: ann_index.faiss.write_index(search_index, str(tmp)))
+    elif index_type == "ivf":
+        _replace(_IVF_PATH, search_index.save)
+
+    manifest = {
+        "version": _ARTIFACT_VERSION,
+        "model": _MODEL_NAME,
+        "encoder": _ENCODER,
+        "kb_hash": _artifact_hash(index.fssai_sha1, taxonomy),
+        "taxonomy": taxonomy,
+        "count": int(embeddings.shape[0]),
+        "dim": int(embeddings.shape[1]),
+        "metric": "inner_product",
+        "index": index_info,
+        "faiss": is_faiss,
+        "built_at": int(time.time()),
+    }
+    _replace(_MANIFEST_PATH, lambda tmp: tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8"))
+    logger.info("RAG Embedder: vector store written (%d vectors, dim=%d, %s index, kb %s)",
+                manifest["count"], manifest["dim"], index_type, manifest["kb_hash"])
+    return manifest
+
+
+# ── Artifact loader ───────────────────────────────────────────────────────────
+
+def _unload_index() -> None:
+    global _faiss_index, _id_map, _artifact_stamp
+    _faiss_index = None
+    _id_map = None
+    _artifact_stamp = None
+
+
+def _manifest_stamp() -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(_MANIFEST_PATH)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _open_artifact() -> Tuple[Any, List[Dict[str, Any]]]:
+    """Map the artifact described by manifest.json; raises ValueError if unusable."""
+    manifest = json.loads(_MANIFEST_PATH.read_text(encoding="utf-8"))
+    if manifest.get("version") != _ARTIFACT_VERSION or manifest.get("model") != _MODEL_NAME:
+        raise ValueError(f"built for v{manifest.get('version')} / {manifest.get('model')}")
+    embeddings = np.load(_EMBEDDINGS_PATH, mmap_mode="r")
+    with open(_ID_MAP_PATH, encoding="utf-8") as f:
+        id_map = json.load(f)
+    if embeddings.shape != (manifest["count"], manifest["dim"]) or len(id_map) != manifest["count"]:
+        raise ValueError("embeddings / id_map do not match the manifest")
+
+    if manifest.get("encoder", _ENCODER) != _ENCODER:
+        logger.info("RAG Embedder: vector store built with %s, queries use %s (same model)",
+                    manifest.get("encoder"), _ENCODER)
+    current = _artifact_hash(open_index().fssai_sha1, _current_taxonomy(manifest.get("taxonomy")))
+    if manifest["kb_hash"] != current:
+        logger.warning("RAG Embedder: vector store is stale (kb %s, current %s) — "
+                       "rebuild with `python -m rag_pipeline.utils.embedder`",
+                       manifest["kb_hash"], current)
+
+    index_type = manifest.get("index", {}).get("type", "flat")
+    index = None
+    if manifest.get("faiss") and _INDEX_PATH.exists():
+        try:
+            index = ann_index.read_faiss_index(_INDEX_PATH)
+        except Exception as exc:
+            logger.debug("faiss index not used (%s); searching embeddings.npy", exc)
+    elif index_type == "ivf" and _IVF_PATH.exists():
+        index = ann_index.IvfFlatIP.load(_IVF_PATH, embeddings)
+    if index is None:
+        if index_type != "flat":
+            logger.warning("RAG Embedder: %s index unavailable — exact search over embeddings.npy", index_type)
+        return ann_index.FlatIP(embeddings), id_map
+    ann_index.set_search_params(index, ef_search=_ANN_EF_SEARCH, nprobe=_ANN_NPROBE)
+    return index, id_map
+
+
+def _load_index() -> Tuple[Any, List[Dict[str, Any]]]:
+    """
+    Return (index, id_map) from the prebuilt artifact, or (None, KB entries)
+    for the n-gram fallback when there is no usable artifact. Never builds.
+    """
+    global _faiss_index, _id_map, _artifact_stamp
 
-    logger.info("RAG Embedder: FAISS index saved (%d vectors, dim=%d)", len(texts), dim)
-    return index, entries
+    stamp = _manifest_stamp()
+    if _id_map is not None and stamp == _artifact_stamp:
+        if _faiss_index is not None:
+            _track_use("faiss_index")
+        return _faiss_index, _id_map
 
+    _faiss_index, _id_map, _artifact_stamp = None, None, stamp
+    if stamp is not None:
+        try:
+            with _track_loading("faiss_index", _unload_index):
+                _faiss_index, _id_map = _open_artifact()
+            logger.info("RAG Embedder: vector store loaded (%d vectors).", _faiss_index.ntotal)
+            return _faiss_index, _id_map
+        except Exception as exc:
+            logger.warning("RAG Embedder: vector store unusable (%s) — n-gram retrieval only.", exc)
+    else:
+        logger.warning("RAG Embedder: no vector store at %s — n-gram retrieval only. "
+                       "Build it with `python -m rag_pipeline.utils.embedder`.", _VS_DIR)
+    _faiss_index, _id_map = None, open_index().fssai_entries()
+    return _faiss_index, _id_map
 
-# ── Index loader ───────────────────────────────────────────────────────────────
 
-def _load_or_build_index() -> Tuple[Any, List[Dict[str, Any]]]:
-    """Return (faiss_index, id_map). Build from JSON if cache is stale."""
-    global _faiss_index, _id_map
+# ── Dependency-free backends ──────────────────────────────────────────────────
 
-    if _faiss_index is not None and _id_map is not None:
-        return _faiss_index, _id_map
+def _kb_entries() -> List[Dict[str, Any]]:
+    """Entries of the current KB; resets the derived indexes on a KB change."""
+    index = open_index()
+    if _kb_state.get("hash") != index.fssai_sha1:
+        _kb_state.clear()
+        _kb_state.update(hash=index.fssai_sha1, entries=index.fssai_entries())
+    return _kb_state["entries"]
 
-    with open(_KB_PATH, encoding="utf-8") as f:
-        entries: List[Dict[str, Any]] = json.load(f)
 
-    # Check if cached index is up-to-date
-    kb_mtime = os.path.getmtime(_KB_PATH)
-    index_mtime = os.path.getmtime(_INDEX_PATH) if _INDEX_PATH.exists() else 0
+def _kb_derived(name: str, build) -> Tuple[Any, List[Dict[str, Any]]]:
+    """(index built by `build(entries)`, entries), cached per KB version."""
+    entries = _kb_entries()
+    if name not in _kb_state:
+        t0 = time.time()
+        _kb_state[name] = build(entries)
+        logger.info("RAG Embedder: %s index built (%d entries) in %.1f ms",
+                    name, len(entries), (time.time() - t0) * 1000)
+    return _kb_state[name], entries
 
-    if _INDEX_PATH.exists() and _ID_MAP_PATH.exists() and index_mtime >= kb_mtime:
-        try:
-            import faiss
-            logger.info("RAG Embedder: loading cached FAISS index…")
-            _faiss_index = faiss.read_index(str(_INDEX_PATH))
-            with open(_ID_MAP_PATH, encoding="utf-8") as f:
-                _id_map = json.load(f)
-            logger.info("RAG Embedder: cached index loaded (%d vectors).", _faiss_index.ntotal)
-            return _faiss_index, _id_map
-        except Exception as exc:
-            logger.warning("Failed to load cached index: %s — rebuilding.", exc)
 
-    # Build fresh
-    _faiss_index, _id_map = _build_index(entries)
-    if _faiss_index is None:
-        # Fall back: id_map only (keyword retrieval still works)
-        _id_map = entries
-    return _faiss_index, _id_map
+def _ngram_index() -> Tuple[NgramIndex, List[Dict[str, Any]]]:
+    return _kb_derived("ngram", lambda entries: NgramIndex([_entry_to_key_text(e) for e in entries]))
+
+
+def _keyword_index() -> Tuple[BM25Index, List[Dict[str, Any]]]:
+    # Identifying fields count twice, so a name outranks a mention in health_risks
+    return _kb_derived("bm25", lambda entries: BM25Index(
+        [f"{_entry_to_key_text(e)} {_entry_to_text(e)}" for e in entries]
+    ))
+
+
+def _collect(
+    results: List[List[Dict[str, Any]]],
+    pending: List[int],
+    scores: np.ndarray,
+    indices: np.ndarray,
+    entries: List[Dict[str, Any]],
+    backend: str,
+    min_score: float = 0.0,
+) -> List[List[Dict[str, Any]]]:
+    """Copy the hits of a (scores, ids) search into results[i] for each pending query."""
+    for i, row_scores, row_idx in zip(pending, scores, indices):
+        for score, idx in zip(row_scores, row_idx):
+            if 0 <= idx < len(entries) and score >= min_score:
+                entry = dict(entries[idx])
+                entry["_similarity_score"] = round(float(score), 4)
+                entry["_retrieval_backend"] = backend
+                results[i].append(entry)
+    return results
 
 
 # ── Public retrieval API ───────────────────────────────────────────────────────
@@ -156,8 +470,8 @@ def retrieve_context(
     Retrieve the top-k most semantically similar FSSAI additive entries
     for a given query string (ingredient name, code, etc.).
 
-    Falls back to simple substring/keyword matching if FAISS/SentenceTransformers
-    are not installed.
+    Falls back to typo-tolerant char n-gram matching if the vector store or
+    SentenceTransformers are not available.
 
     Args:
         query: Ingredient name or additive code to search for.
@@ -166,35 +480,105 @@ def retrieve_context(
     Returns:
         List of up to top_k additive dicts from fssai_additives.json.
     """
-    if not query or not query.strip():
-        return []
+    return retrieve_context_batch([query], top_k=top_k)[0]
 
-    index, id_map = _load_or_build_index()
-    model = _get_model()
+
+def retrieve_context_batch(
+    queries: List[str],
+    top_k: int = 3,
+) -> List[List[Dict[str, Any]]]:
+    """
+    retrieve_context() for every query of a label at once.
+
+    All queries are embedded in one pass and looked up with a single
+    multi-query FAISS search; results come back in query order. Empty
+    queries get an empty list. Embeddings come from the query cache where
+    possible; only the misses go through one model.encode call.
+
+    Without a usable vector store or model (or with RAG_RETRIEVAL_BACKEND
+    set to "ngram") the char n-gram index answers instead; "keyword" uses
+    BM25 ranking. Each hit carries _similarity_score and _retrieval_backend.
+    """
+    results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+    pending = [i for i, q in enumerate(queries) if q and q.strip()]
+    if not pending:
+        return results
+
+    backend = _RETRIEVAL_BACKEND
+    texts = [queries[i] for i in pending]
 
     # ── Vector retrieval path ──────────────────────────────────────────────────
-    if index is not None and model is not None:
-        try:
-            import numpy as np
-            q_vec = model.encode([query.lower()], convert_to_numpy=True).astype("float32")
-            distances, indices = index.search(q_vec, min(top_k, index.ntotal))
-            results = []
-            for dist, idx in zip(distances[0], indices[0]):
-                if idx >= 0 and idx < len(id_map):
-                    entry = dict(id_map[idx])
-                    entry["_similarity_score"] = round(float(1 / (1 + dist)), 4)
-                    results.append(entry)
-            return results
-        except Exception as exc:
-            logger.warning("FAISS retrieval failed: %s — falling back to keyword match.", exc)
-
-    # ── Keyword fallback ───────────────────────────────────────────────────────
-    query_lower = query.lower().strip()
-    hits = []
-    for entry in (id_map or []):
-        searchable = _entry_to_text(entry).lower()
-        if query_lower in searchable:
-            hits.append(entry)
-        if len(hits) >= top_k:
-            break
-    return hits
+    if backend not in ("ngram", "keyword"):
+        index, id_map = _load_index()
+        if index is not None:
+            try:
+                q_vecs = _query_cache.encode(texts, _get_model)
+                if q_vecs is not None:
+                    q_vecs = q_vecs / np.maximum(np.linalg.norm(q_vecs, axis=1, keepdims=True), 1e-12)
+                    scores, indices = index.search(q_vecs, min(top_k, index.ntotal))
+                    return _collect(results, pending, scores, indices, id_map, "faiss")
+            except Exception as exc:
+                logger.warning("FAISS retrieval failed: %s — falling back to n-gram match.", exc)
+                results = [[] for _ in queries]
+
+    # ── Char n-gram TF-IDF path ────────────────────────────────────────────────
+    if backend != "keyword":
+        ngram, entries = _ngram_index()
+        scores, indices = ngram.search(texts, top_k)
+        return _collect(results, pending, scores, indices, entries, "ngram", _NGRAM_MIN_SCORE)
+
+    # ── BM25 keyword path ──────────────────────────────────────────────────────
+    bm25, entries = _keyword_index()
+    scores, indices = bm25.search(texts, top_k)
+    return _collect(results, pending, scores, indices, entries, "keyword")
+
+
+def retrieval_version() -> str:
+    """
+    Identity of what retrieval currently serves: backend setting, encoder,
+    vector store build (manifest stat) and KB hash. Changes whenever a
+    rebuild or KB edit could change retrieve_context() results.
+    """
+    stamp = _manifest_stamp() if _RETRIEVAL_BACKEND not in ("ngram", "keyword") else None
+    return f"{_RETRIEVAL_BACKEND}:{_ENCODER}:{stamp}:{open_index().fssai_sha1}"
+
+
+def embedding_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the query embedding cache (this process)."""
+    return _query_cache.stats()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(prog="python -m rag_pipeline.utils.embedder",
+                                     description="Build (default) or check the RAG vector store.")
+    parser.add_argument("command", nargs="?", choices=("build", "check"), default="build")
+    parser.add_argument("--index", choices=ann_index.INDEX_TYPES, default="flat",
+                        help="exact flat search, or approximate HNSW / IVF")
+    parser.add_argument("--taxonomy", nargs="+", type=Path, default=[], metavar="FILE",
+                        help="Open Food Facts taxonomy files to add (ingredients.txt, additives.txt)")
+    parser.add_argument("--hnsw-m", type=int, help=f"HNSW links per node (default {ann_index.DEFAULT_HNSW_M})")
+    parser.add_argument("--ef-construction", type=int,
+                        help=f"HNSW build beam (default {ann_index.DEFAULT_HNSW_EF_CONSTRUCTION})")
+    parser.add_argument("--nlist", type=int, help="IVF cells (default 4·√n)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "check":
+        if not _MANIFEST_PATH.exists():
+            sys.exit(f"{_MANIFEST_PATH}: missing")
+        built = json.loads(_MANIFEST_PATH.read_text(encoding="utf-8"))
+        current = _artifact_hash(open_index().fssai_sha1, _current_taxonomy(built.get("taxonomy")))
+        print(json.dumps(built, indent=2))
+        print("up to date" if built.get("kb_hash") == current else f"stale (current kb {current})")
+        sys.exit(0 if built.get("kb_hash") == current else 1)
+    try:
+        print(json.dumps(build_vector_store(
+            args.index,
+            {"m": args.hnsw_m, "ef_construction": args.ef_construction, "nlist": args.nlist},
+            args.taxonomy,
+        ), indent=2))
+    except RuntimeError as exc:
+        sys.exit(str(exc))
@@ -0,0 +1,180 @@
+"""
+utils/embedding_cache.py
+─────────────────────────
+Two-tier cache for query embeddings in front of SentenceTransformer.encode.
+
+RAG queries come from a small fixed vocabulary (additive codes and names),
+so the same strings are encoded over and over across users. Each query is
+keyed by (model name, normalised text):
+
+  1. in-memory LRU      — per process, bounded by `capacity`
+  2. SQLite on disk     — vector_store/embedding_cache.db, float32 blobs;
+                          survives restarts and is shared by gunicorn workers
+
+Only the texts missing from both tiers reach the model, in one encode call,
+and the model loader is not even called when every text is cached.
+
+    cache = EmbeddingCache("all-MiniLM-L6-v2", path)
+    vecs = cache.encode(["ins 621 monosodium glutamate"], _get_model)
+    # → float32 array (n, dim), or None if a miss needs a model that is absent
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalise_query(text: str) -> str:
+    """Cache key text: lower-case, whitespace collapsed."""
+    return " ".join((text or "").lower().split())
+
+
+class EmbeddingCache:
+    """LRU + SQLite cache of float32 query embeddings for one model."""
+
+    def __init__(self, model_name: str, path: Optional[Path], capacity: int = 4096):
+        self.model_name = model_name
+        self.path = Path(path) if path else None
+        self.capacity = capacity
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_ready = False
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    # ── Disk tier ─────────────────────────────────────────────────────────────
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        try:
+            if not self._disk_ready:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with sqlite3.connect(self.path) as conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS embeddings (
+                            model TEXT NOT NULL,
+                            text  TEXT NOT NULL,
+                            dim   INTEGER NOT NULL,
+                            vec   BLOB NOT NULL,
+                            PRIMARY KEY (model, text)
+                        )
+                    """)
+                self._disk_ready = True
+            return sqlite3.connect(self.path, timeout=5)
+        except sqlite3.Error as exc:
+            logger.warning("Embedding cache disabled on disk (%s): %s", self.path, exc)
+            self.path = None
+            return None
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        conn = self._connect() if keys else None
+        if conn is None:
+            return {}
+        found: Dict[str, np.ndarray] = {}
+        try:
+            with conn:
+                for start in range(0, len(keys), 500):   # SQLite variable limit
+                    chunk = keys[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT text, dim, vec FROM embeddings WHERE model = ? "
+                        f"AND text IN ({','.join('?' * len(chunk))})",
+                        [self.model_name, *chunk],
+                    ).fetchall()
+                    for text, dim, blob in rows:
+                        vec = np.frombuffer(blob, dtype=np.float32)
+                        if vec.size == dim:
+                            found[text] = vec
+        except sqlite3.Error as exc:
+            logger.warning("Embedding cache read failed: %s", exc)
+        finally:
+            conn.close()
+        return found
+
+    def _write_disk(self, items: Dict[str, np.ndarray]) -> None:
+        conn = self._connect() if items else None
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text, dim, vec) VALUES (?, ?, ?, ?)",
+                    [(self.model_name, text, vec.size, vec.tobytes()) for text, vec in items.items()],
+                )
+        except sqlite3.Error as exc:
+            logger.warning("Embedding cache write failed: %s", exc)
+        finally:
+            conn.close()
+
+    # ── Memory tier ───────────────────────────────────────────────────────────
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def encode(self, texts: Sequence[str], get_model: Callable[[], Any]) -> Optional[np.ndarray]:
+        """
+        Embeddings for `texts` as a float32 (n, dim) array, in input order.
+
+        Misses are encoded together with the model returned by `get_model`;
+        returns None if there are misses and no model is available.
+        """
+        keys = [normalise_query(t) for t in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vec = self._lru.get(key)
+                if vec is not None:
+                    self._lru.move_to_end(key)
+                    vectors[key] = vec
+            self.hits["memory"] += sum(1 for k in keys if k in vectors)
+
+        missing = [k for k in dict.fromkeys(keys) if k not in vectors]
+        from_disk = self._read_disk(missing)
+        vectors.update(from_disk)
+        missing = [k for k in missing if k not in from_disk]
+
+        encoded: Dict[str, np.ndarray] = {}
+        if missing:
+            model = get_model()
+            if model is None:
+                return None
+            out = model.encode(missing, convert_to_numpy=True, show_progress_bar=False)
+            encoded = {k: np.asarray(v, dtype=np.float32) for k, v in zip(missing, out)}
+            vectors.update(encoded)
+            self._write_disk(encoded)
+
+        with self._lock:
+            for key in (*from_disk, *encoded):
+                self._remember(key, vectors[key])
+            self.hits["disk"] += sum(1 for k in keys if k in from_disk)
+            self.misses += sum(1 for k in keys if k in encoded)
+        return np.stack([vectors[k] for k in keys]) if keys else np.zeros((0, 0), np.float32)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits["memory"] + self.hits["disk"] + self.misses
+        return {
+            "model": self.model_name,
+            "memory_entries": len(self._lru),
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "hit_rate": round((total - self.misses) / total, 4) if total else 0.0,
+        }
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
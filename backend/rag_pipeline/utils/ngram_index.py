@@ -0,0 +1,120 @@
+"""
+utils/ngram_index.py
+─────────────────────
+Dependency-free retrieval over hashed character n-gram TF-IDF vectors.
+
+Every word is padded with spaces and cut into 3- and 4-grams, which are
+hashed into a fixed 2^20-dimensional space (crc32, stable across
+processes). Entries become sublinear-TF × IDF sparse vectors, L2-normalised
+at build time, and are stored column-wise (n-gram → entries, weights). A
+query only touches the columns of its own n-grams, so scoring is one
+gather + bincount and cosine needs no per-query entry norms.
+
+Shared n-grams make it typo-tolerant ("tartrazne" still hits "tartrazine",
+"e62l" still hits "e621"), it needs nothing beyond NumPy (no torch import),
+and building it over the ~100 KB entries takes milliseconds.
+
+    index = NgramIndex([_entry_to_text(e) for e in entries])
+    scores, ids = index.search(["ins 621 msg"], k=3)   # faiss-style arrays, -1 = no hit
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_NGRAM_SIZES = (3, 4)
+_DIM_MASK = (1 << 20) - 1
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def ngram_features(text: str) -> Dict[int, int]:
+    """Hashed n-gram id → count for one text."""
+    counts: Counter = Counter()
+    for word in _WORD_RE.findall((text or "").lower()):
+        padded = f" {word} "
+        for n in _NGRAM_SIZES:
+            if len(padded) < n:
+                counts[padded] += 1
+                continue
+            for i in range(len(padded) - n + 1):
+                counts[padded[i:i + n]] += 1
+    features: Counter = Counter()
+    for gram, count in counts.items():
+        features[zlib.crc32(gram.encode("utf-8")) & _DIM_MASK] += count
+    return features
+
+
+class NgramIndex:
+    """Cosine search over hashed char n-gram TF-IDF vectors (column-major sparse)."""
+
+    def __init__(self, texts: Sequence[str]):
+        docs = [ngram_features(t) for t in texts]
+        self.ntotal = len(docs)
+
+        df: Counter = Counter()
+        for features in docs:
+            df.update(features.keys())
+        self._features = np.array(sorted(df), dtype=np.uint32)
+        dfs = np.array([df[f] for f in self._features], dtype=np.float32)
+        self._idf = np.log((1.0 + self.ntotal) / (1.0 + dfs)) + 1.0
+        self._unseen_idf = float(np.log(1.0 + self.ntotal) + 1.0)
+
+        # (column, doc, weight) triples, weights L2-normalised per doc
+        cols: List[np.ndarray] = []
+        rows: List[np.ndarray] = []
+        weights: List[np.ndarray] = []
+        for doc_id, features in enumerate(docs):
+            if not features:
+                continue
+            col = np.searchsorted(self._features, np.fromiter(features.keys(), np.uint32, len(features)))
+            w = (1.0 + np.log(np.fromiter(features.values(), np.float32, len(features)))) * self._idf[col]
+            cols.append(col)
+            rows.append(np.full(len(col), doc_id, dtype=np.int32))
+            weights.append((w / np.linalg.norm(w)).astype(np.float32))
+        col = np.concatenate(cols) if cols else np.zeros(0, np.int64)
+        order = np.argsort(col, kind="stable")
+        self._docs = np.concatenate(rows)[order] if rows else np.zeros(0, np.int32)
+        self._weights = np.concatenate(weights)[order] if weights else np.zeros(0, np.float32)
+        self._ptr = np.searchsorted(col[order], np.arange(len(self._features) + 1)).astype(np.int64)
+
+    def _scores(self, query: str) -> np.ndarray:
+        features = ngram_features(query)
+        if not features or not len(self._features):
+            return np.zeros(self.ntotal, dtype=np.float32)
+        ids = np.fromiter(features.keys(), np.uint32, len(features))
+        tf = 1.0 + np.log(np.fromiter(features.values(), np.float32, len(features)))
+        col = np.minimum(np.searchsorted(self._features, ids), len(self._features) - 1)
+        known = self._features[col] == ids
+        q = tf * np.where(known, self._idf[col], self._unseen_idf)
+        q /= np.linalg.norm(q)
+
+        col, q = col[known], q[known]
+        starts, lengths = self._ptr[col], self._ptr[col + 1] - self._ptr[col]
+        total = int(lengths.sum())
+        if not total:
+            return np.zeros(self.ntotal, dtype=np.float32)
+        flat = np.arange(total) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return np.bincount(
+            self._docs[flat], weights=self._weights[flat] * np.repeat(q, lengths), minlength=self.ntotal
+        ).astype(np.float32)
+
+    def search(self, queries: Sequence[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, ids) per query, best first; ids are -1 where nothing matched."""
+        k = max(1, min(k, self.ntotal))
+        scores = np.zeros((len(queries), k), dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, query in enumerate(queries):
+            s = self._scores(query)
+            if not self.ntotal:
+                continue
+            top = np.argpartition(-s, k - 1)[:k]
+            top = top[np.argsort(-s[top], kind="stable")]
+            hit = s[top] > 0
+            scores[row, :hit.sum()] = s[top][hit]
+            ids[row, :hit.sum()] = top[hit]
+        return scores, ids
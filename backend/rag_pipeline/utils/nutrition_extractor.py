@@ -0,0 +1,184 @@
+"""
+utils/nutrition_extractor.py
+────────────────────────────
+Single-pass nutrition value extraction from OCR text.
+
+Shared by every regex extractor in the backend (NERService, the RAG
+ocr_parser, the /scan-label OCR-only fallback and the Indian label side
+pipeline). All nutrient labels and quantities are compiled into one regex;
+the text is tokenised once and each quantity is assigned to the label in
+front of it:
+
+    "Energy 1996 kJ / 477 kcal  Protein (g) 6.9  Salt 0.8g"
+      label  qty(kJ)  qty(kcal) label    qty    label qty(g)
+    → {"calories": 477.0, "protein_g": 6.9, "sodium_mg": 320.0, ...}
+
+Units are normalised per nutrient (g ↔ mg ↔ mcg), kJ → kcal and salt →
+sodium are converted, and %DV columns are skipped. When several values fill
+the same key, explicit ones win over derived ones (kcal over kJ, sodium over
+salt, "label value" over "value label"). A value only goes to the label
+after it ("10 g protein") when it starts its row and that label has no
+value yet, so the second column of "per serving / per 100g" tables never
+spills into the next row.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, Optional, Tuple
+
+# Canonical output keys (values per the units in the name; calories in kcal)
+NUTRIENT_KEYS: Tuple[str, ...] = (
+    "calories", "protein_g", "fat_g", "saturated_fat_g", "trans_fat_g",
+    "carbohydrates_g", "sugars_g", "added_sugars_g", "fiber_g", "sodium_mg",
+    "cholesterol_mg", "calcium_mg", "iron_mg", "serving_size_g",
+)
+
+# Label patterns per nutrient (lower-case text). Longer labels that share a
+# word with a shorter one ("saturated fat" / "fat") start earlier in the
+# text, so the leftmost match already picks the right nutrient.
+_LABELS: Dict[str, str] = {
+    "calories":        r"energy|calories?|ऊर्जा",
+    "protein_g":       r"prot(?:ein|ien)s?|प्रोटीन",
+    "saturated_fat_g": r"saturated(?:\s+fat(?:ty\s+acids?|s)?)?|saturates|sat\.?\s*fat",
+    "trans_fat_g":     r"trans(?:\s+fat(?:ty\s+acids?|s)?)?",
+    "fat_g":           r"(?:total\s+)?(?:fats?|lipids?)|वसा",
+    "carbohydrates_g": r"(?:total\s+)?carb(?:ohydrates?|o|s)?",
+    "added_sugars_g":  r"added\s+sugars?",
+    "sugars_g":        r"(?:total\s+|of\s+which\s+)?sugars?|शर्करा|चीनी",
+    "fiber_g":         r"(?:dietary\s+)?fib(?:re|er)s?|roughage",
+    "sodium_mg":       r"sodium|सोडियम",
+    "salt":            r"salt",
+    "cholesterol_mg":  r"cholesterol",
+    "calcium_mg":      r"calcium",
+    "iron_mg":         r"iron",
+    "serving_size_g":  r"serving\s+size|per\s+serv(?:e|ing)|per\s+packet",
+}
+
+_UNITS: Dict[str, str] = {
+    "kcal": "kcal", "cal": "kcal", "kj": "kj",
+    "mg": "mg", "milligram": "mg", "milligrams": "mg",
+    "mcg": "mcg", "µg": "mcg",
+    "g": "g", "gm": "g", "gms": "g", "gram": "g", "grams": "g",
+    "ml": "ml", "%": "%",
+}
+
+_TOKEN_RE = re.compile(
+    "|".join(f"(?<![a-z])(?P<{key}>{pat})(?![a-z])" for key, pat in _LABELS.items())
+    + r"|(?P<qty>(?<![a-z\d.])(?P<num>\d+(?:\.\d+)?)(?![\d.])\s*"
+    + r"(?P<unit>" + "|".join(sorted(map(re.escape, _UNITS), key=len, reverse=True)) + r")?(?![a-z]))"
+)
+# What may sit between a label and its value: separators and a unit header
+# ("Energy (kcal) 250", "Total Fat - 10 g"). Anything else (", INS 627")
+# breaks the link.
+_GAP_RE = re.compile(r"[\s:|\-–=/.()]*(?:\((?:k?cal|kj|m?g|gms?|mcg)\))?[\s:|\-–=/.()]*")
+_MAX_GAP = 12
+
+# Priorities: lower wins
+_EXPLICIT, _DERIVED, _FALLBACK = 1, 2, 3
+
+_Assignment = Optional[Tuple[str, float, int]]
+
+
+def _grams(key: str) -> Callable[[float, Optional[str]], _Assignment]:
+    factors = {None: 1.0, "g": 1.0, "mg": 1e-3, "mcg": 1e-6}
+    return lambda v, unit: (key, round(v * factors[unit], 4), _EXPLICIT) if unit in factors else None
+
+
+def _milligrams(key: str) -> Callable[[float, Optional[str]], _Assignment]:
+    factors = {None: 1.0, "mg": 1.0, "g": 1e3, "mcg": 1e-3}
+    return lambda v, unit: (key, round(v * factors[unit], 4), _EXPLICIT) if unit in factors else None
+
+
+def _energy(v: float, unit: Optional[str]) -> _Assignment:
+    if unit == "kj":
+        return "calories", round(v / 4.184, 1), _FALLBACK
+    return ("calories", v, _EXPLICIT) if unit in (None, "kcal") else None
+
+
+def _salt(v: float, unit: Optional[str]) -> _Assignment:
+    # Sodium ≈ salt / 2.5
+    if unit in (None, "g"):
+        return "sodium_mg", round(v * 400, 1), _DERIVED
+    return ("sodium_mg", round(v * 0.4, 1), _DERIVED) if unit == "mg" else None
+
+
+def _serving(v: float, unit: Optional[str]) -> _Assignment:
+    return ("serving_size_g", v, _EXPLICIT) if unit in (None, "g", "ml") else None
+
+
+_CONVERTERS: Dict[str, Callable[[float, Optional[str]], _Assignment]] = {
+    "calories": _energy, "salt": _salt, "serving_size_g": _serving,
+    **{k: _grams(k) for k in ("protein_g", "fat_g", "saturated_fat_g", "trans_fat_g",
+                              "carbohydrates_g", "sugars_g", "added_sugars_g", "fiber_g")},
+    **{k: _milligrams(k) for k in ("sodium_mg", "cholesterol_mg", "calcium_mg", "iron_mg")},
+}
+
+_NORMALISE_RE = re.compile(r"[\u00ad\u200b\ufeff]")  # soft hyphen / zero-width
+# Runs of whitespace collapse to one space, or to one newline if they span
+# lines — row boundaries matter for "10 g protein" (see extract_nutrition)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _linked(text: str, start: int, end: int) -> bool:
+    return end - start <= _MAX_GAP and _GAP_RE.fullmatch(text, start, end) is not None
+
+
+def extract_nutrition(raw: str) -> Dict[str, Optional[float]]:
+    """
+    Extract every canonical nutrient from raw OCR text in one pass.
+
+    Returns a dict with all NUTRIENT_KEYS; values are floats or None.
+    """
+    text = _WHITESPACE_RE.sub(
+        lambda ws: "\n" if "\n" in ws.group() else " ", _NORMALISE_RE.sub("", (raw or "").lower())
+    )
+    best: Dict[str, Tuple[int, float]] = {}
+
+    def offer(assignment: _Assignment, demote: int = 0) -> bool:
+        if assignment is None:
+            return False
+        key, value, priority = assignment
+        priority += demote
+        if key not in best or priority < best[key][0]:
+            best[key] = (priority, value)
+        return True
+
+    def back_link(assignment: _Assignment) -> bool:
+        # Only fills a label that has no value yet
+        return assignment is not None and assignment[0] not in best and offer(assignment, demote=_DERIVED)
+
+    label: Optional[Tuple[str, int]] = None       # pending label, end offset
+    orphan: Optional[Tuple[float, str, int]] = None  # row-leading unlabelled value, unit, end offset
+    for m in _TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        if kind != "qty":
+            # "10 g protein": a unit-bearing value that starts its row, right
+            # before the label on the same row. A value after other content
+            # ("Sugars 1.5g / 2.1g") is a second column, not the next label's.
+            if (orphan and orphan[1] in ("g", "mg") and text[orphan[2]:m.start()] == " "
+                    and back_link(_CONVERTERS[kind](orphan[0], orphan[1]))):
+                label = None
+            else:
+                label = (kind, m.end())
+            orphan = None
+            continue
+
+        value, unit = float(m.group("num")), _UNITS.get(m.group("unit") or "")
+        if unit == "%":
+            if label:
+                label = (label[0], m.end())
+            continue
+        if label and _linked(text, label[1], m.start()):
+            offer(_CONVERTERS[label[0]](value, unit))
+            orphan = None
+        else:
+            if unit == "kcal":
+                offer(("calories", value, _DERIVED))
+            elif unit == "kj":
+                offer(("calories", round(value / 4.184, 1), _FALLBACK))
+            row_start = text.rfind("\n", 0, m.start()) + 1
+            orphan = (value, unit, m.end()) if not text[row_start:m.start()].strip() else None
+        label = None
+
+    return {key: best[key][1] if key in best else None for key in NUTRIENT_KEYS}
@@ -13,68 +13,12 @@ Handles the messy, inconsistent output typical of EasyOCR on Indian product labe
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
+from rag_pipeline.utils.nutrition_extractor import extract_nutrition
 
-# ─── Nutrition Table Parser ───────────────────────────────────────────────────
-
-# Comprehensive set of regex patterns to extract each nutrient value.
-# Each pattern returns one named capture group "value" (float or int).
-NUTRITION_PATTERNS: Dict[str, List[str]] = {
-    "calories": [
-        r"(?:energy|calories?|cal|kcal|kj)[^\d]{0,10}([\d]+(?:\.\d+)?)\s*(?:kcal|cal|kj)?",
-        r"([\d]+(?:\.\d+)?)\s*(?:kcal|cal)\b",
-    ],
-    "protein_g": [
-        r"protein[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-        r"([\d]+(?:\.\d+)?)\s*g\s+protein",
-    ],
-    "fat_g": [
-        r"(?:total\s+)?fat[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-        r"(?:total\s+)?lipid[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-    ],
-    "saturated_fat_g": [
-        r"saturated\s+(?:fat|fatty\s+acid)[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-        r"sat[.]\s*fat[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-    ],
-    "trans_fat_g": [
-        r"trans\s+(?:fat|fatty\s+acid)[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-        r"trans[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-    ],
-    "carbohydrates_g": [
-        r"(?:total\s+)?carb(?:ohydrate)?s?[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-        r"carbs?[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-    ],
-    "sugars_g": [
-        r"(?:total\s+)?sug(?:ar)?s?[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-        r"sug(?:ar)?s?\s*[:\-–|]?\s*([\d]+(?:\.\d+)?)\s*g",
-    ],
-    "fiber_g": [
-        r"(?:dietary\s+)?fib(?:re|er)[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-        r"roughage[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-    ],
-    "sodium_mg": [
-        r"sodium[^\d]{0,10}([\d]+(?:\.\d+)?)\s*(?:mg|milligrams?)",
-        r"salt[^\d]{0,10}([\d]+(?:\.\d+)?)\s*(?:mg)",
-        r"([\d]+(?:\.\d+)?)\s*mg\s+sodium",
-    ],
-    "cholesterol_mg": [
-        r"cholesterol[^\d]{0,10}([\d]+(?:\.\d+)?)\s*(?:mg)",
-    ],
-    "calcium_mg": [
-        r"calcium[^\d]{0,10}([\d]+(?:\.\d+)?)\s*(?:mg)",
-    ],
-    "iron_mg": [
-        r"\biron\b[^\d]{0,10}([\d]+(?:\.\d+)?)\s*(?:mg)",
-    ],
-    "serving_size_g": [
-        r"serving\s+size[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-        r"per\s+serve[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-        r"per\s+serving[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-        r"per\s+packet[^\d]{0,10}([\d]+(?:\.\d+)?)\s*g",
-    ],
-}
 
+# ─── Nutrition Table Parser ───────────────────────────────────────────────────
 
 def parse_nutrition_text(raw: str) -> Dict[str, Optional[float]]:
     """
@@ -84,38 +28,13 @@ def parse_nutrition_text(raw: str) -> Dict[str, Optional[float]]:
         raw: Raw OCR text as a single string (can have newlines).
 
     Returns:
-        Dict with keys matching NUTRITION_PATTERNS. Values are floats or None.
+        Dict with keys NUTRIENT_KEYS (see utils/nutrition_extractor.py).
+        Values are floats or None.
         e.g. {"calories": 250.0, "protein_g": 5.0, "sodium_mg": 820.0, ...}
     """
     if not raw:
         return {}
-
-    # Normalise: lowercase, collapse whitespace, remove soft-hyphens
-    text = raw.lower()
-    text = re.sub(r"[\u00ad\u200b\ufeff]", "", text)  # zero-width / soft-hyphen
-    text = re.sub(r"\s+", " ", text)
-
-    result: Dict[str, Optional[float]] = {}
-
-    for nutrient, patterns in NUTRITION_PATTERNS.items():
-        value: Optional[float] = None
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    value = float(match.group(1))
-                    break
-                except (ValueError, IndexError):
-                    continue
-        result[nutrient] = value
-
-    # Calories: kJ → kcal fallback
-    if result.get("calories") is None:
-        kj_match = re.search(r"([\d]+(?:\.\d+)?)\s*kj", text, re.IGNORECASE)
-        if kj_match:
-            result["calories"] = round(float(kj_match.group(1)) / 4.184, 1)
-
-    return result
+    return extract_nutrition(raw)
 
 
 # ─── Ingredients List Parser ──────────────────────────────────────────────────
@@ -135,46 +54,35 @@ _NOISE_TOKENS = re.compile(
     re.IGNORECASE,
 )
 
+# Strings that end the ingredients section
+_INGREDIENT_SECTION_END = re.compile(
+    r"\b(?:contains?|allergen|manufactured\s+in|best\s+before|expiry|mfg|dist|net\s+wt|net\s+weight|nutritional|nutrition\s+info|storage|keep)",
+    re.IGNORECASE,
+)
+
 # Remove percentage values like "(5%)" from ingredient tokens  
 _PERCENTAGE_PATTERN = re.compile(r"\(?\s*[\d]+(?:\.\d+)?\s*%\s*\)?")
 
 
-def parse_ingredients_text(raw: str) -> List[str]:
-    """
-    Convert a raw ingredients string into a clean list of ingredient tokens.
-
-    Handles:
-    - "Ingredients: wheat flour, salt, sugar (5%), ..."
-    - Nested parentheses with sub-ingredients
-    - Multiple separators (,  ;  |  :)
-    - Mixed case
-
-    Args:
-        raw: Raw ingredients text.
-
-    Returns:
-        List of lowercase stripped ingredient strings.
-    """
-    if not raw:
-        return []
-
-    text = raw.strip()
+def _ingredient_section_bounds(text: str) -> Tuple[int, int]:
+    """(start, end) of the ingredients section inside a full label text."""
+    start, end = 0, len(text)
 
     # Try to isolate the ingredients section if the full label text is provided
     trigger_match = _INGREDIENT_SECTION_TRIGGERS.search(text)
     if trigger_match:
-        text = text[trigger_match.end():]
+        start = trigger_match.end()
 
     # Truncate at common section-ending phrases
-    for end_phrase in [
-        r"\b(?:contains?|allergen|manufactured\s+in|best\s+before|expiry|mfg|dist|net\s+wt|net\s+weight|nutritional|nutrition\s+info|storage|keep)",
-    ]:
-        end_match = re.search(end_phrase, text, re.IGNORECASE)
-        if end_match and end_match.start() > 20:
-            text = text[: end_match.start()]
+    end_match = _INGREDIENT_SECTION_END.search(text, start)
+    if end_match and end_match.start() - start > 20:
+        end = end_match.start()
+    return start, end
+
 
+def _tokenize_section(section: str) -> List[str]:
     # Remove percentage values
-    text = _PERCENTAGE_PATTERN.sub("", text)
+    text = _PERCENTAGE_PATTERN.sub("", section)
 
     # Strip common OCR artefacts
     text = re.sub(r"[\*\^\u00ae\u2122]", "", text)  # ®, ™, *
@@ -198,6 +106,78 @@ def parse_ingredients_text(raw: str) -> List[str]:
     return ingredients
 
 
+def parse_ingredients_text(raw: str) -> List[str]:
+    """
+    Convert a raw ingredients string into a clean list of ingredient tokens.
+
+    Handles:
+    - "Ingredients: wheat flour, salt, sugar (5%), ..."
+    - Nested parentheses with sub-ingredients
+    - Multiple separators (,  ;  |  :)
+    - Mixed case
+
+    Args:
+        raw: Raw ingredients text.
+
+    Returns:
+        List of lowercase stripped ingredient strings.
+    """
+    if not raw:
+        return []
+    text = _normalize_whitespace(raw)
+    start, end = _ingredient_section_bounds(text)
+    return _tokenize_section(text[start:end])
+
+
+# ─── Parsed Ingredients (shared per request) ──────────────────────────────────
+
+class ParsedIngredients(NamedTuple):
+    """
+    An ingredients text parsed once and shared by every consumer of a request
+    (AdditivesExpert, dietary rules, RAG additive / allergen / UPF detectors).
+
+    text    — whitespace-normalised input
+    folded  — lower-cased `text`, same length, so offsets are shared
+    tokens  — flat ingredient tokens (same as parse_ingredients_text)
+    joined  — " ".join(tokens), what the RAG keyword detectors scan
+    """
+    text: str
+    folded: str
+    tokens: Tuple[str, ...]
+    joined: str
+
+
+def _normalize_whitespace(raw: str) -> str:
+    return " ".join(raw.split())
+
+
+def _fold(text: str) -> str:
+    # str.lower() can change length for a few code points ("İ"); keep those
+    # as-is so offsets into `text` stay valid in `folded`
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+def parse_ingredients(raw: str) -> ParsedIngredients:
+    """
+    Parse an ingredients text once into a ParsedIngredients.
+
+    Build this once per request and hand it to every consumer instead of
+    each one lower-casing and re-splitting the same text.
+    """
+    text = _normalize_whitespace(raw or "")
+    start, end = _ingredient_section_bounds(text)
+    tokens = tuple(_tokenize_section(text[start:end])) if text else ()
+    return ParsedIngredients(
+        text=text,
+        folded=_fold(text),
+        tokens=tokens,
+        joined=" ".join(tokens),
+    )
+
+
 # ─── Combined Parser ──────────────────────────────────────────────────────────
 
 def parse_label_text(
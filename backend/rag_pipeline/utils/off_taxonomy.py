@@ -0,0 +1,108 @@
+"""
+utils/off_taxonomy.py
+──────────────────────
+Reader for Open Food Facts taxonomy files (ingredients.txt, additives.txt
+from github.com/openfoodfacts/openfoodfacts-server/taxonomies), used to
+extend the vector store beyond the FSSAI additives.
+
+The format is blocks separated by blank lines:
+
+    < en:vegetable                       parent(s)
+    en: carrot, carrots                  names per language, first = preferred
+    fr: carotte, carottes
+    wikidata:en: Q81                     properties (ignored)
+
+Each block becomes one KB-shaped entry:
+
+    {"code": "en:carrot", "name": "carrot", "aliases": [...all other names...],
+     "category": "en:vegetable", "source": "off_ingredients"}
+
+"stopwords:" / "synonyms:" blocks and comments are skipped. Entries carry
+no FSSAI risk fields, so the analyzer only uses them as context.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+_LANG_LINE_RE = re.compile(r"^([a-z]{2,3}(?:_[a-z]{2,3})?):\s*(.+)$")
+_E_NUMBER_RE = re.compile(r"^(?:e|ins)\s*-?(\d{3,4}[a-z]?(?:\([ivx]+\))?)$", re.IGNORECASE)
+
+
+def _canonical_id(lang: str, name: str) -> str:
+    return f"{lang}:{'-'.join(name.lower().split())}"
+
+
+def e_number_key(code: str) -> str:
+    """"E621" / "INS 621" / "en:e621" → "621"; "" if not an additive number."""
+    m = _E_NUMBER_RE.match(code.split(":")[-1].replace(" ", ""))
+    return m.group(1).lower() if m else ""
+
+
+def parse_taxonomy(path: Path) -> List[Dict[str, object]]:
+    """Entries of one taxonomy file, in file order."""
+    path = Path(path)
+    source = f"off_{path.stem}"
+    entries: List[Dict[str, object]] = []
+    parents: List[str] = []
+    names: Dict[str, List[str]] = {}
+
+    def flush() -> None:
+        if names:
+            lang, synonyms = next(iter(names.items()))
+            preferred = names.get("en", synonyms)[0]
+            aliases = [n for syn in names.values() for n in syn if n != preferred]
+            entries.append({
+                "code": _canonical_id(lang, synonyms[0]),
+                "name": preferred,
+                "aliases": list(dict.fromkeys(aliases)),
+                "category": parents[0] if parents else "",
+                "source": source,
+            })
+        parents.clear()
+        names.clear()
+
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            line = raw.strip()
+            if not line:
+                flush()
+            elif line.startswith("#"):
+                continue
+            elif line.startswith("<"):
+                parents.append(line[1:].strip())
+            else:
+                m = _LANG_LINE_RE.match(line)
+                if m and not line.startswith(("stopwords:", "synonyms:")):
+                    synonyms = [s.strip() for s in m.group(2).split(",") if s.strip()]
+                    if synonyms:
+                        names.setdefault(m.group(1), []).extend(synonyms)
+    flush()
+    return entries
+
+
+def taxonomy_entries(paths: Iterable[Path], skip_e_numbers: Set[str] = frozenset()) -> List[Dict[str, object]]:
+    """
+    Entries of several taxonomy files, skipping additives whose E-number is
+    in `skip_e_numbers` (already covered by the FSSAI KB) and duplicate ids.
+    """
+    seen: Set[str] = set()
+    entries = []
+    for path in paths:
+        for entry in parse_taxonomy(path):
+            if entry["code"] in seen or e_number_key(str(entry["code"])) in skip_e_numbers:
+                continue
+            seen.add(str(entry["code"]))
+            entries.append(entry)
+    return entries
+
+
+def file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
@@ -0,0 +1,143 @@
+"""
+utils/onnx_encoder.py
+──────────────────────
+all-MiniLM-L6-v2 as an int8-quantized ONNX model, run with onnxruntime and
+a HuggingFace fast tokenizer — no torch or transformers at serving time.
+
+Produces the same pipeline as SentenceTransformer("all-MiniLM-L6-v2"):
+BERT → mean pooling over the attention mask → L2 normalisation, with the
+model's 256-token limit. Weights are dynamically quantized to int8, so
+vectors differ from the float model only by quantization noise.
+
+Export once (needs torch + transformers + onnxruntime, e.g. in CI):
+    python -m rag_pipeline.utils.onnx_encoder
+which writes rag_pipeline/models/all-MiniLM-L6-v2-onnx-int8/
+    model.onnx       int8 weights (~23 MB)
+    tokenizer.json   fast tokenizer
+
+Serving needs only onnxruntime + tokenizers:
+    encoder = OnnxSentenceEncoder()
+    encoder.encode(["ins 621 monosodium glutamate"])   # float32 (n, 384)
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BASE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+MODEL_DIR = Path(__file__).resolve().parent.parent / "models" / "all-MiniLM-L6-v2-onnx-int8"
+_MAX_LENGTH = 256
+
+# Per-worker CPU budget for onnxruntime (Flask backend only)
+try:
+    from app.runtime import thread_budget
+except Exception:
+    thread_budget = None
+
+
+def is_available(model_dir: Path = MODEL_DIR) -> bool:
+    """True if the exported model is present and onnxruntime + tokenizers import."""
+    model_dir = Path(model_dir)
+    return (
+        (model_dir / "model.onnx").exists()
+        and (model_dir / "tokenizer.json").exists()
+        and importlib.util.find_spec("onnxruntime") is not None
+        and importlib.util.find_spec("tokenizers") is not None
+    )
+
+
+class OnnxSentenceEncoder:
+    """SentenceTransformer.encode-compatible wrapper around the ONNX export."""
+
+    def __init__(self, model_dir: Path = MODEL_DIR, max_length: int = _MAX_LENGTH):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if thread_budget is not None:
+            options.intra_op_num_threads = thread_budget()
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(model_dir / "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = True,
+    ) -> np.ndarray:
+        """Mean-pooled, L2-normalised float32 embeddings, one row per sentence."""
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        out: List[np.ndarray] = []
+        for start in range(0, len(sentences), batch_size):
+            encodings = self.tokenizer.encode_batch(list(sentences[start:start + batch_size]))
+            ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feed = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in self._inputs:
+                feed["token_type_ids"] = np.zeros_like(ids)
+            hidden = self.session.run(None, feed)[0]                  # (batch, seq, 384)
+            weights = mask[..., None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+            if normalize_embeddings:
+                pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            out.append(pooled.astype(np.float32))
+        return np.concatenate(out) if out else np.zeros((0, 384), dtype=np.float32)
+
+
+def export_model(model_dir: Path = MODEL_DIR, base_model: str = BASE_MODEL) -> Path:
+    """Export the HF model to ONNX, quantize weights to int8, save the tokenizer."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(base_model)
+    model = AutoModel.from_pretrained(base_model).eval()
+
+    sample = tokenizer(["ins 621 monosodium glutamate"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic = {n: {0: "batch", 1: "sequence"} for n in names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32_path = Path(tmp) / "model_fp32.onnx"
+        with torch.no_grad():
+            torch.onnx.export(
+                model, tuple(sample[n] for n in names), str(fp32_path),
+                input_names=names, output_names=["last_hidden_state"],
+                dynamic_axes=dynamic, opset_version=14,
+            )
+        quantize_dynamic(str(fp32_path), str(model_dir / "model.onnx"), weight_type=QuantType.QInt8)
+        tokenizer.save_pretrained(tmp)
+        shutil.copy(Path(tmp) / "tokenizer.json", model_dir / "tokenizer.json")
+    logger.info("ONNX encoder: exported %s → %s", base_model, model_dir)
+    return model_dir
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    path = export_model()
+    size = (path / "model.onnx").stat().st_size / 1e6
+    print(f"{path}: model.onnx {size:.1f} MB")
@@ -0,0 +1,210 @@
+"""
+utils/result_cache.py
+──────────────────────
+Two-tier cache of complete label analyses, in front of the RAG pipeline.
+
+Many users scan the same popular products, so the same parsed label comes
+back again and again. Each result is keyed by result_key(): a canonical
+hash of the parsed nutrition values, the ingredient tokens in label order,
+the joined ingredients text the multi-word markers are scanned in, and the
+KB version (rules, additive KB, retrieval artifact, analyzer source hash),
+so editing any knowledge file, rebuilding the vector store or deploying
+new scoring code starts a fresh key space.
+
+  1. in-memory LRU      — per process, bounded by `capacity`
+  2. SQLite on disk     — vector_store/result_cache.db, JSON results;
+                          survives restarts and is shared by gunicorn workers.
+                          Rows of older KB versions are dropped when a new
+                          version is first written; within a version, rows
+                          older than `ttl_s` and the oldest rows beyond
+                          about `max_rows` are pruned every few writes.
+
+Results older than `ttl_s` are misses in both tiers.
+
+Results are stored as JSON text and decoded per hit, so callers always get
+a private copy.
+
+    cache = ResultCache(path, capacity=1024, max_rows=50_000, ttl_s=30 * 86400)
+    result, tier = cache.get(key)          # tier: "memory", "disk" or None
+    cache.put(key, kb_version, result)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Prune the disk tier (TTL + row cap) once per this many writes per process
+_PRUNE_EVERY = 64
+
+
+def result_key(nutrition: Dict[str, Any], tokens: Iterable[str], text: str, kb_version: str) -> str:
+    """
+    Canonical hash of (parsed nutrition, ordered tokens, scanned text, KB version).
+
+    Token order is kept: "corn, syrup" and "syrup, corn" join to different
+    texts and so match different multi-word markers.
+    """
+    canonical = json.dumps(
+        {
+            "kb": kb_version,
+            "nutrition": {k: v for k, v in (nutrition or {}).items() if v is not None},
+            "tokens": [t.lower() for t in tokens],
+            "text": text,
+        },
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+    )
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """LRU + SQLite cache of JSON-serialisable analysis results."""
+
+    def __init__(self, path: Optional[Path], capacity: int = 1024,
+                 max_rows: int = 0, ttl_s: float = 0):
+        self.path = Path(path) if path else None
+        self.capacity = capacity
+        self.max_rows = max_rows    # 0 = no row cap
+        self.ttl_s = ttl_s          # 0 = results never expire
+        self._lru: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_ready = False
+        self._disk_kb: Optional[str] = None
+        self._writes = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    # ── Disk tier ─────────────────────────────────────────────────────────────
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        try:
+            if not self._disk_ready:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with sqlite3.connect(self.path) as conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS results (
+                            key        TEXT PRIMARY KEY,
+                            kb         TEXT NOT NULL,
+                            result     TEXT NOT NULL,
+                            created_at INTEGER NOT NULL
+                        )
+                    """)
+                    conn.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created_at)")
+                self._disk_ready = True
+            return sqlite3.connect(self.path, timeout=5)
+        except sqlite3.Error as exc:
+            logger.warning("Result cache disabled on disk (%s): %s", self.path, exc)
+            self.path = None
+            return None
+
+    def _expired(self, created_at: int) -> bool:
+        return bool(self.ttl_s) and created_at < time.time() - self.ttl_s
+
+    def _read_disk(self, key: str) -> Optional[Tuple[str, int]]:
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            with conn:
+                row = conn.execute("SELECT result, created_at FROM results WHERE key = ?", (key,)).fetchone()
+            return (row[0], row[1]) if row and not self._expired(row[1]) else None
+        except sqlite3.Error as exc:
+            logger.warning("Result cache read failed: %s", exc)
+            return None
+        finally:
+            conn.close()
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Drop expired rows, then the oldest rows beyond max_rows."""
+        if self.ttl_s:
+            conn.execute("DELETE FROM results WHERE created_at < ?", (int(time.time() - self.ttl_s),))
+        if self.max_rows:
+            conn.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+
+    def _write_disk(self, key: str, kb_version: str, payload: str, created_at: int) -> None:
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                if self._disk_kb != kb_version:
+                    conn.execute("DELETE FROM results WHERE kb != ?", (kb_version,))
+                    self._disk_kb = kb_version
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, kb, result, created_at) VALUES (?, ?, ?, ?)",
+                    (key, kb_version, payload, created_at),
+                )
+                if self._writes % _PRUNE_EVERY == 0:
+                    self._prune(conn)
+                self._writes += 1
+        except sqlite3.Error as exc:
+            logger.warning("Result cache write failed: %s", exc)
+        finally:
+            conn.close()
+
+    # ── Memory tier ───────────────────────────────────────────────────────────
+
+    def _remember(self, key: str, payload: str, created_at: int) -> None:
+        self._lru[key] = (payload, created_at)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """(result, "memory" | "disk") on a hit, (None, None) on a miss."""
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None and self._expired(entry[1]):
+                del self._lru[key]
+                entry = None
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self.hits["memory"] += 1
+                return json.loads(entry[0]), "memory"
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None, None
+            self._remember(key, *entry)
+            self.hits["disk"] += 1
+        return json.loads(entry[0]), "disk"
+
+    def put(self, key: str, kb_version: str, result: Dict[str, Any]) -> None:
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+        created_at = int(time.time())
+        with self._lock:
+            self._remember(key, payload, created_at)
+        self._write_disk(key, kb_version, payload, created_at)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits["memory"] + self.hits["disk"] + self.misses
+        return {
+            "memory_entries": len(self._lru),
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "hit_rate": round((total - self.misses) / total, 4) if total else 0.0,
+        }
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
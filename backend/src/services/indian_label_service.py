@@ -26,6 +26,8 @@ from typing import Any, Dict, Optional
 
 import requests
 
+from rag_pipeline.utils.nutrition_extractor import extract_nutrition
+
 logger = logging.getLogger(__name__)
 
 # ── API endpoints ──────────────────────────────────────────────────────────────
@@ -240,48 +242,10 @@ def _extract_from_ocr(
     """
     text_lower = raw_text.lower()
 
-    def _find_number(patterns: list[str]) -> Optional[float]:
-        for pat in patterns:
-            m = re.search(pat, text_lower)
-            if m:
-                try:
-                    return float(m.group(1))
-                except ValueError:
-                    pass
-        return None
-
     # ── Nutrition extraction ─────────────────────────────────────────────────
-    calories = _find_number([
-        r"energy[^\d]*(\d+(?:\.\d+)?)\s*k?cal",
-        r"calories?[^\d]*(\d+(?:\.\d+)?)",
-        r"(\d+(?:\.\d+)?)\s*k?cal",
-    ])
-    protein = _find_number([
-        r"protein[^\d]*(\d+(?:\.\d+)?)\s*g",
-        r"protien[^\d]*(\d+(?:\.\d+)?)\s*g",   # common OCR misspelling
-    ])
-    fat = _find_number([
-        r"total\s+fat[^\d]*(\d+(?:\.\d+)?)\s*g",
-        r"fat[^\d]*(\d+(?:\.\d+)?)\s*g",
-    ])
-    carbs = _find_number([
-        r"total\s+carbo[^\d]*(\d+(?:\.\d+)?)\s*g",
-        r"carbohydrate[^\d]*(\d+(?:\.\d+)?)\s*g",
-        r"carbs?[^\d]*(\d+(?:\.\d+)?)\s*g",
-    ])
-    sugar = _find_number([
-        r"sugar[^\d]*(\d+(?:\.\d+)?)\s*g",
-        r"of which sugar[^\d]*(\d+(?:\.\d+)?)\s*g",
-    ])
-    sodium = _find_number([
-        r"sodium[^\d]*(\d+(?:\.\d+)?)\s*m?g",
-        r"salt[^\d]*(\d+(?:\.\d+)?)\s*g",
-    ])
-    fiber = _find_number([
-        r"dietary\s+fiber[^\d]*(\d+(?:\.\d+)?)\s*g",
-        r"fibre[^\d]*(\d+(?:\.\d+)?)\s*g",
-        r"fiber[^\d]*(\d+(?:\.\d+)?)\s*g",
-    ])
+    n = extract_nutrition(raw_text)
+    calories, protein, fat = n["calories"], n["protein_g"], n["fat_g"]
+    carbs, sugar, sodium, fiber = n["carbohydrates_g"], n["sugars_g"], n["sodium_mg"], n["fiber_g"]
 
     # ── Ingredients extraction ───────────────────────────────────────────────
     ingredients: list[str] = []
@@ -0,0 +1,42 @@
+"""Additive index: both source files come back from the binary index unchanged."""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rag_pipeline.utils.additive_index import (
+    EXPERT_DB_PATH, FSSAI_DB_PATH, AdditiveIndex, build_index, rebuild_index,
+)
+
+
+def _round_trip(expert, fssai):
+    index = AdditiveIndex(build_index(json.dumps(expert).encode(), json.dumps(fssai).encode()))
+    return index.expert_entries(), index.fssai_entries()
+
+
+def test_source_files_round_trip(tmp_path):
+    index = rebuild_index(index_path=tmp_path / "additive_index.bin")
+    with open(EXPERT_DB_PATH, encoding="utf-8") as f:
+        assert index.expert_entries() == json.load(f)
+    with open(FSSAI_DB_PATH, encoding="utf-8") as f:
+        assert index.fssai_entries() == json.load(f)
+
+
+def test_unknown_fields_kept_and_missing_fields_absent():
+    expert = [
+        {"id": "INS 621", "name": "MSG", "risk_level": "YELLOW", "impact": 2,
+         "e_number": "E621", "sources": ["EFSA"]},
+        {"id": "INS 102", "risk_level": "PURPLE", "tags": ["dye", ""], "impact": 1.5},
+    ]
+    fssai = [
+        {"code": "INS 621", "name": "Monosodium glutamate", "aliases": ["MSG"],
+         "adi_mg_per_kg": 30, "banned_in_india": False},
+        {"code": "INS 999", "safety": "red", "category": None},
+    ]
+    expert_out, fssai_out = _round_trip(expert, fssai)
+    assert expert_out == expert
+    assert fssai_out == fssai
+    assert "category" not in expert_out[0]
+    assert fssai_out[1].get("name", "Unknown") == "Unknown"
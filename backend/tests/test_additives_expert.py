@@ -0,0 +1,20 @@
+"""AdditivesExpert.analyze_many: results that share a risk summary stay independent."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.additives_expert import AdditivesExpert
+
+
+def test_batch_results_do_not_share_risk_summary():
+    texts = ["Sugar, INS 621, INS 102", "Salt, INS 102, INS 621", "Sugar, INS 621, INS 102"]
+    results = AdditivesExpert().analyze_many(texts).results
+    assert results[0].risk_summary == results[1].risk_summary == results[2].risk_summary
+
+    results[0].risk_summary["risk_tier"] = "EDITED"
+    results[0].risk_summary["interaction_warnings"].append("edited")
+    assert results[1].risk_summary["risk_tier"] != "EDITED"
+    assert "edited" not in results[1].risk_summary["interaction_warnings"]
+    assert "edited" not in results[2].risk_summary["interaction_warnings"]
@@ -0,0 +1,53 @@
+"""BM25 inverted index: BM25Index.search contract."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pytest
+
+from rag_pipeline.utils.bm25_index import BM25Index
+
+TEXTS = [
+    "INS 102 Tartrazine synthetic yellow azo dye colour",
+    "INS 621 Monosodium glutamate MSG flavour enhancer",
+    "INS 211 Sodium benzoate preservative",
+    "INS 330 Citric acid acidity regulator",
+    "INS 250 Sodium nitrite preservative",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return BM25Index(TEXTS)
+
+
+def test_ranks_more_matching_terms_first_and_pads(index):
+    scores, ids = index.search(["sodium benzoate"], k=4)
+    assert ids[0].tolist() == [2, 4, -1, -1]
+    assert scores[0, 0] > scores[0, 1] > 0
+    assert np.all(scores[0, 2:] == 0)
+
+
+def test_case_and_punctuation_insensitive(index):
+    _, ids = index.search(["TARTRAZINE!"], k=1)
+    assert ids[0, 0] == 0
+
+
+def test_ties_keep_kb_order(index):
+    _, ids = index.search(["preservative"], k=2)
+    assert ids[0].tolist() == [2, 4]
+
+
+@pytest.mark.parametrize("query", ["", "   ", "tartrazne", "qqqq"])
+def test_empty_unknown_and_misspelt_queries_match_nothing(index, query):
+    # Exact tokens only: typo tolerance is the n-gram backend's job
+    scores, ids = index.search([query], k=3)
+    assert np.all(ids == -1) and np.all(scores == 0)
+
+
+def test_k_not_clipped_and_empty_index():
+    assert BM25Index(TEXTS).search(["sodium"], k=10)[1].shape == (1, 10)
+    assert np.all(BM25Index([]).search(["sodium"], k=2)[1] == -1)
@@ -0,0 +1,42 @@
+"""Pre-OCR quality gate: reject unreadable photos, not clean high-contrast labels."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import cv2
+import numpy as np
+import pytest
+
+from app.utils.image_quality import assess_image_quality
+
+
+def _label(background: int, ink: int, size=(900, 1200)) -> np.ndarray:
+    img = np.full((*size, 3), background, dtype=np.uint8)
+    for row in range(12):
+        cv2.putText(img, "Ingredients: wheat flour, sugar, INS 621, salt",
+                    (40, 80 + row * 65), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (ink,) * 3, 3)
+    return img
+
+
+@pytest.mark.parametrize("background, ink", [(255, 0), (235, 0), (0, 255)])
+def test_sharp_high_contrast_label_passes(background, ink):
+    result = assess_image_quality(_label(background, ink))
+    assert result["ok"], result
+
+
+@pytest.mark.parametrize("image, reason", [
+    (np.full((900, 1200, 3), 255, dtype=np.uint8), "overexposed"),
+    (np.full((900, 1200, 3), 5, dtype=np.uint8), "too_dark"),
+    (np.full((900, 1200, 3), 128, dtype=np.uint8), "blurry"),
+])
+def test_unreadable_photo_rejected(image, reason):
+    result = assess_image_quality(image)
+    assert not result["ok"]
+    assert result["reason"] == reason
+
+
+def test_blurred_label_rejected():
+    blurred = cv2.GaussianBlur(_label(200, 40), (0, 0), 12)
+    assert assess_image_quality(blurred)["reason"] == "blurry"
@@ -0,0 +1,58 @@
+"""Char n-gram TF-IDF index: NgramIndex.search contract."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pytest
+
+from rag_pipeline.utils.ngram_index import NgramIndex
+
+TEXTS = [
+    "INS 102 Tartrazine synthetic yellow azo dye colour",
+    "INS 621 Monosodium glutamate MSG flavour enhancer",
+    "INS 211 Sodium benzoate preservative",
+    "INS 330 Citric acid acidity regulator",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return NgramIndex(TEXTS)
+
+
+def test_ranks_best_match_first(index):
+    scores, ids = index.search(["sodium benzoate preservative"], k=4)
+    assert ids[0, 0] == 2
+    assert np.all(np.diff(scores[0][ids[0] >= 0]) <= 0)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("tartrazne", 0),
+    ("monosodium glutamat", 1),
+    ("citrik acid", 3),
+])
+def test_typo_tolerant(index, query, expected):
+    _, ids = index.search([query], k=1)
+    assert ids[0, 0] == expected
+
+
+def test_k_clipped_and_padded_with_minus_one(index):
+    scores, ids = index.search(["tartrazine", "qqqq xxxx"], k=10)
+    assert ids.shape == scores.shape == (2, len(TEXTS))
+    assert ids[0, 0] == 0
+    assert np.all(ids[1] == -1) and np.all(scores[1] == 0)
+
+
+@pytest.mark.parametrize("query", ["", "   ", "@@@"])
+def test_empty_query_matches_nothing(index, query):
+    scores, ids = index.search([query], k=3)
+    assert np.all(ids == -1) and np.all(scores == 0)
+
+
+def test_empty_index_and_no_queries():
+    scores, ids = NgramIndex([]).search(["tartrazine"], k=3)
+    assert np.all(ids == -1)
+    assert NgramIndex(TEXTS).search([], k=3)[1].shape == (0, 3)
@@ -0,0 +1,63 @@
+"""OCR post-correction: fix OCR misreads, leave real ingredient words alone."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from app.utils.ocr_correction import OCRCorrector
+
+
+@pytest.fixture(scope="module")
+def corrector(tmp_path_factory):
+    index_path = tmp_path_factory.mktemp("ocr") / "ocr_lexicon.pkl"
+    return OCRCorrector.load_or_build(index_path=index_path)
+
+
+@pytest.mark.parametrize("text", [
+    "Raisins, Raisin paste",
+    "Almonds, Cashews, Pistachios, Jaggery, Cardamom",
+    "Coconut, Tamarind, Peanuts, Sesame seeds",
+])
+def test_real_ingredient_words_unchanged(corrector, text):
+    fixed, corrections = corrector.correct_text(text)
+    assert fixed == text
+    assert corrections == []
+
+
+@pytest.mark.parametrize("token, expected", [
+    ("Malt0dextrin", "Maltodextrin"),
+    ("Tartrazlne", "Tartrazine"),
+    ("Sodlum", "Sodium"),
+])
+def test_known_misreads_fixed(corrector, token, expected):
+    assert corrector.correct_token(token) == expected
+
+
+@pytest.fixture(scope="module")
+def pipeline_corrector(tmp_path_factory):
+    from app.services.ocr_pipeline import _NUTRIENT_KEYWORDS
+
+    index_path = tmp_path_factory.mktemp("ocr") / "ocr_lexicon.pkl"
+    return OCRCorrector.load_or_build(extra_terms=_NUTRIENT_KEYWORDS, index_path=index_path)
+
+
+@pytest.mark.parametrize("text", [
+    "Protein8g Protein8 Carbohydrate60 Sugar5 Sodium 200mg",
+    "Energy450kcal Fat12g Sodium820mg",
+    "8gProtein 60Carbohydrate",
+])
+def test_values_glued_to_labels_kept(pipeline_corrector, text):
+    fixed, corrections = pipeline_corrector.correct_text(text)
+    assert fixed == text
+    assert corrections == []
+
+
+@pytest.mark.parametrize("token, expected", [
+    ("Tartraz1ne", "Tartrazine"),
+    ("Pa1m", "Palm"),
+])
+def test_interior_digits_still_mapped(pipeline_corrector, token, expected):
+    assert pipeline_corrector.correct_token(token) == expected
@@ -0,0 +1,30 @@
+"""int8 ONNX vs sentence-transformers: same top-1 KB entry for every fixture query.
+
+Skipped unless both runtimes are installed and the ONNX model is exported
+(python -m rag_pipeline.utils.onnx_encoder). RAG_EMBEDDER=auto should only
+prefer ONNX once this passes.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from rag_pipeline.utils import onnx_encoder
+
+
+def test_onnx_top1_matches_sentence_transformers():
+    pytest.importorskip("sentence_transformers")
+    if not onnx_encoder.is_available():
+        pytest.skip("ONNX model not exported or onnxruntime/tokenizers missing")
+    from rag_pipeline.bench_embedder import run_worker
+
+    torch_run, onnx_run = run_worker("sentence-transformers"), run_worker("onnx-int8")
+    disagreements = [
+        (query, a[0], b[0])
+        for query, a, b in zip(torch_run["queries"], torch_run["topk"], onnx_run["topk"])
+        if a[0] != b[0]
+    ]
+    assert disagreements == []
@@ -0,0 +1,50 @@
+"""Result cache disk tier: TTL and row cap."""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rag_pipeline.utils import result_cache
+from rag_pipeline.utils.result_cache import ResultCache, result_key
+
+
+def test_key_keeps_token_order():
+    a = result_key({}, ["corn", "syrup"], "corn syrup", "kb")
+    b = result_key({}, ["syrup", "corn"], "syrup corn", "kb")
+    assert a != b
+    assert a == result_key({}, ["Corn", "Syrup"], "corn syrup", "kb")
+
+
+def test_expired_results_are_misses(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / "results.db", ttl_s=60)
+    cache.put("k", "kb", {"score": 1.0})
+    assert cache.get("k") == ({"score": 1.0}, "memory")
+    monkeypatch.setattr(time, "time", lambda real=time.time: real() + 120)
+    assert cache.get("k") == (None, None)
+    cache.clear_memory()
+    assert cache.get("k") == (None, None)
+
+
+def test_disk_tier_keeps_newest_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "_PRUNE_EVERY", 1)
+    cache = ResultCache(tmp_path / "results.db", max_rows=3)
+    now = time.time()
+    for i in range(6):
+        monkeypatch.setattr(time, "time", lambda t=now + i: t)
+        cache.put(f"k{i}", "kb", {"i": i})
+    cache.clear_memory()
+    assert [cache.get(f"k{i}")[0] for i in range(6)] == [None, None, None, {"i": 3}, {"i": 4}, {"i": 5}]
+
+
+def test_code_version_follows_analyzer_sources(tmp_path, monkeypatch):
+    from rag_pipeline import rag_analyzer
+
+    source = tmp_path / "scoring.py"
+    source.write_text("PENALTY = 1\n", encoding="utf-8")
+    monkeypatch.setattr(rag_analyzer, "_RESULT_SOURCES", (source,))
+    before = rag_analyzer._code_version()
+    source.write_text("PENALTY = 2\n", encoding="utf-8")
+    assert rag_analyzer._code_version() != before
+    assert rag_analyzer._CODE_VERSION in rag_analyzer._result_kb_version(rag_analyzer._load_rule_set())
@@ -0,0 +1,46 @@
+"""Per-worker thread budget: arithmetic and respect for explicit env settings."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from app import runtime
+
+
+@pytest.fixture
+def fresh_budget(monkeypatch):
+    monkeypatch.setattr(runtime, "_budget", None)
+    monkeypatch.setattr(runtime, "_applied", {})
+    # apply_thread_budget() writes os.environ; give it a private copy
+    monkeypatch.setattr(os, "environ", {k: v for k, v in os.environ.items()
+                                        if k not in runtime._BLAS_ENV_VARS})
+
+    def configure(cpus, workers, per_worker=0):
+        monkeypatch.setattr(runtime.os, "cpu_count", lambda: cpus)
+        monkeypatch.setattr(runtime._config, "WEB_CONCURRENCY", workers)
+        monkeypatch.setattr(runtime._config, "THREADS_PER_WORKER", per_worker)
+    return configure
+
+
+@pytest.mark.parametrize("cpus, workers, per_worker, expected", [
+    (8, 1, 0, 8),     # one worker gets every core
+    (8, 4, 0, 2),     # cores split evenly
+    (8, 3, 0, 2),     # rounded down
+    (2, 4, 0, 1),     # never below one thread
+    (None, 2, 0, 1),  # cpu_count unknown
+    (8, 4, 3, 3),     # THREADS_PER_WORKER overrides the split
+])
+def test_thread_budget(fresh_budget, cpus, workers, per_worker, expected):
+    fresh_budget(cpus, workers, per_worker)
+    assert runtime.thread_budget() == expected
+
+
+def test_explicit_env_settings_win(fresh_budget, monkeypatch):
+    fresh_budget(8, 4)
+    os.environ["OMP_NUM_THREADS"] = "1"
+    settings = runtime.apply_thread_budget()
+    assert settings["env"]["OMP_NUM_THREADS"] == "1"
+    assert settings["env"]["MKL_NUM_THREADS"] == "2"
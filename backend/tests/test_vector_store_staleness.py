@@ -0,0 +1,25 @@
+"""Vector store staleness: an edited taxonomy file changes the KB hash."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rag_pipeline.utils.embedder import _artifact_hash, _current_taxonomy
+from rag_pipeline.utils.off_taxonomy import file_sha1
+
+
+def test_changed_taxonomy_file_is_stale(tmp_path):
+    path = tmp_path / "ingredients.txt"
+    path.write_text("en: carrot, carrots\n", encoding="utf-8")
+    built = [{"file": path.name, "path": str(path), "sha1": file_sha1(path), "entries": 1}]
+    kb_hash = _artifact_hash("kb", built)
+
+    assert _artifact_hash("kb", _current_taxonomy(built)) == kb_hash
+    path.write_text("en: carrot, carrots\n\nen: beetroot\n", encoding="utf-8")
+    assert _artifact_hash("kb", _current_taxonomy(built)) != kb_hash
+
+
+def test_missing_taxonomy_file_keeps_recorded_hash(tmp_path):
+    built = [{"file": "additives.txt", "path": str(tmp_path / "gone.txt"), "sha1": "abc", "entries": 3}]
+    assert _artifact_hash("kb", _current_taxonomy(built)) == _artifact_hash("kb", built)
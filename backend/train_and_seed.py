@@ -412,16 +412,14 @@ PRODUCTS = [
 
 def compute_additive_features(products):
     expert = AdditivesExpert()
+    batch = expert.analyze_many(", ".join(p["ingredients"]) for p in products)
     enriched = []
-    for p in products:
-        ing_text = ", ".join(p["ingredients"])
-        detected, impact = expert.analyze_text(ing_text)
-        risk_summary = expert.get_risk_summary(detected)
+    for p, analysis in zip(products, batch.results):
         enriched.append({
             **p,
-            "additive_impact": impact,
-            "detected_additives": detected,
-            "risk_summary": risk_summary,
+            "additive_impact": analysis.impact,
+            "detected_additives": list(analysis.detected),
+            "risk_summary": analysis.risk_summary,
         })
     return enriched, expert
 
@@ -457,6 +457,7 @@ export default function Home() {
         body: JSON.stringify(body),
       });
       const data = await res.json();
+      if (data.status === "retake_photo") throw new Error(data.hint || "Please retake the photo.");
       if (!res.ok && !data.health_score) throw new Error(data.error || "Label analysis failed.");
       setAnalysisResult(data);
       setShowReveal(true);